@@ -0,0 +1,229 @@
+import argparse
+import csv
+import heapq
+import json
+import logging
+import os
+import sys
+
+from ict619_resume_functions import new_cascade_stats, get_prompt_size_stats, summarize_prompt_sizes, EXTRACTION_MODES
+from ict619_resume_engine import iter_screen_pdfs
+from ict619_resume_cache import ExtractionCache, hash_pdf_bytes
+from ict619_resume_metrics import metrics, enable_json_logs, format_breakdown, DEFAULT_METRICS_PATH
+
+
+#############################
+#-------- Batch settings --------#
+#############################
+EDUCATION_LEVELS = ["Diploma", "Bachelor", "Master", "PhD"]
+CSV_FIELDS = [
+    "file", "pdf_hash", "name", "email", "phone", "experience", "education",
+    "skills", "skills_met", "meets_requirements", "skill_ratio", "no_of_skills", "processing_time", "rejected_at",
+    "duplicate_of",
+]
+
+
+# Function to load and check the requirements file
+# e.g. {"experience": 2, "education": "Bachelor", "skills": ["python", "sql"], "mandatory_skills": {"python": 2}}
+def load_requirements(path):
+    with open(path, encoding = "utf-8") as f:
+        requirements = json.load(f)
+
+    required_info = {
+        "experience": int(requirements.get("experience", 0)),
+        "education": requirements.get("education", "Diploma"),
+        "skills": list(requirements.get("skills", [])),
+        "mandatory_skills": {skill: int(years or 0) for skill, years in requirements.get("mandatory_skills", {}).items()},
+    }
+    if required_info["education"] not in EDUCATION_LEVELS:
+        raise ValueError(f"education must be one of {EDUCATION_LEVELS}")
+    if not required_info["skills"]:
+        raise ValueError("skills must list at least one skill")
+    return required_info
+
+# Function to list the PDFs to screen, sorted so every run sees them in the same order
+def find_pdfs(pdf_dir, recursive = False):
+    pdf_paths = []
+    for root, dirs, files in os.walk(pdf_dir):
+        pdf_paths.extend(os.path.join(root, name) for name in files if name.lower().endswith(".pdf"))
+        if not recursive:
+            break
+    return sorted(pdf_paths)
+
+
+#############################
+#-------- Checkpoint --------#
+#############################
+# The checkpoint is an append-only file with one "status<TAB>pdf hash<TAB>path" line per finished PDF,
+# flushed after every line so an interrupted run loses at most the resumes that were in flight
+def load_checkpoint(path):
+    done = set()
+    if os.path.exists(path):
+        with open(path, encoding = "utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) == 3:
+                    done.add((parts[1], parts[2]))
+    return done
+
+def append_checkpoint(checkpoint_file, status, pdf_hash, path):
+    checkpoint_file.write(f"{status}\t{pdf_hash}\t{path}\n")
+    checkpoint_file.flush()
+
+
+#############################
+#-------- Output --------#
+#############################
+# Function to flatten one screening result into an output record
+# duplicate_of is the file whose extraction was reused, for copies of a resume screened earlier in the run
+def build_record(path, pdf_hash, screened, duplicate_of = None):
+    info = screened["info"] if isinstance(screened["info"], dict) else {}
+    extracted_info = screened["extracted_info"]
+    result = screened["result"]
+    return {
+        "file": path,
+        "pdf_hash": pdf_hash,
+        "name": info.get("name"),
+        "email": info.get("email"),
+        "phone": info.get("phone"),
+        "experience": extracted_info["experience"],
+        "education": extracted_info["education"],
+        "skills": extracted_info["skills"],
+        "skills_met": extracted_info["skills_met"],
+        "meets_requirements": result[:3] == [1, 1, 1.0],
+        "skill_ratio": result[3],
+        "no_of_skills": result[4],
+        "processing_time": round(screened["processing_time"], 3),
+        "rejected_at": screened["rejected_at"],
+        "duplicate_of": duplicate_of,
+    }
+
+# Function to return a write(record) function for a .jsonl or .csv output, appending to an existing file
+def open_output(path):
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    output_file = open(path, "a", encoding = "utf-8", newline = "")
+
+    if path.lower().endswith(".csv"):
+        writer = csv.DictWriter(output_file, fieldnames = CSV_FIELDS)
+        if is_new:
+            writer.writeheader()
+
+        def write(record):
+            row = dict(record)
+            row["skills"] = "; ".join(record["skills"])
+            row["skills_met"] = json.dumps(record["skills_met"])
+            writer.writerow(row)
+            output_file.flush()
+    else:
+        def write(record):
+            output_file.write(json.dumps(record) + "\n")
+            output_file.flush()
+
+    return output_file, write
+
+
+#############################
+#-------- Batch run --------#
+#############################
+def run_batch(args):
+    required_info = load_requirements(args.requirements)
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+
+    pdf_paths = find_pdfs(args.pdf_dir, args.recursive)
+    pdf_hashes = [hash_pdf_bytes(path) for path in pdf_paths]
+    done = load_checkpoint(checkpoint_path)
+    todo = [i for i, (path, pdf_hash) in enumerate(zip(pdf_paths, pdf_hashes)) if (pdf_hash, path) not in done]
+    print(f"{len(pdf_paths)} PDF(s) found, {len(pdf_paths) - len(todo)} already screened, {len(todo)} to go.")
+
+    todo_paths = [pdf_paths[i] for i in todo]
+    todo_hashes = [pdf_hashes[i] for i in todo]
+    cache = None if args.no_cache else ExtractionCache()
+    cascade_stats = new_cascade_stats()
+    prompt_stats_before = get_prompt_size_stats()
+    metrics_before = metrics.snapshot()
+    if args.log_prompts:
+        logging.basicConfig(level = logging.INFO, format = "%(message)s")  # One line per Gemini call with its prompt size
+    if args.metrics_json:
+        enable_json_logs()
+
+    screened_count = 0
+    failed_count = 0
+    duplicate_count = 0
+    top_candidates = []  # (skill_ratio, no_of_skills, file, name) of candidates meeting the requirements
+    output_file, write = open_output(args.output)
+    checkpoint_file = open(checkpoint_path, "a", encoding = "utf-8")
+    try:
+        results = iter_screen_pdfs(
+            todo_paths, required_info,
+            max_concurrency = args.max_concurrency, cache = cache,
+            extraction_mode = args.extraction_mode, chunk_size = args.chunk_size,
+            pdf_hashes = todo_hashes, cascade = not args.no_cascade, cascade_stats = cascade_stats,
+            batch = args.batch_requests, dedup = not args.no_dedup,
+        )
+        for item in results:
+            path = todo_paths[item["index"]]
+
+            if item["screened"] is None:
+                print(f"⚠️ {path}: {item['error']}", file = sys.stderr)
+                if item["error"] == "Could not extract text from PDF":
+                    append_checkpoint(checkpoint_file, "unreadable", item["pdf_hash"], path)  # Rerunning will not help
+                    failed_count += 1
+                    continue
+                if item["retry_after"] is not None:  # Quota exhausted, circuit open or the rate limiter queue is full
+                    print(f"Stopped: Gemini quota exhausted, try again in {item['retry_after']:.0f}s. Run the same command again to resume.", file = sys.stderr)
+                    results.close()
+                    break
+                failed_count += 1  # Not checkpointed, so it is retried on the next run
+                continue
+
+            duplicate_of = todo_paths[item["duplicate_of"]] if item["duplicate_of"] is not None else None
+            record = build_record(path, item["pdf_hash"], item["screened"], duplicate_of)
+            write(record)
+            append_checkpoint(checkpoint_file, "done", item["pdf_hash"], path)
+            screened_count += 1
+            duplicate_count += duplicate_of is not None
+            if record["meets_requirements"] and duplicate_of is None:  # One entry per candidate
+                heapq.heappush(top_candidates, (record["skill_ratio"], record["no_of_skills"], path, record["name"]))
+                if len(top_candidates) > args.top:
+                    heapq.heappop(top_candidates)
+            print(f"[{screened_count}/{len(todo)}] {path}: {'meets' if record['meets_requirements'] else 'does not meet'} requirements" + (f" (duplicate of {duplicate_of})" if duplicate_of else ""))
+    except KeyboardInterrupt:
+        print("Interrupted. Run the same command again to resume.", file = sys.stderr)
+    finally:
+        output_file.close()
+        checkpoint_file.close()
+
+    print(f"Screened {screened_count} ({duplicate_count} duplicate(s) reused), failed {failed_count}. Results in {args.output}")
+    print(summarize_prompt_sizes(prompt_stats_before, get_prompt_size_stats()))
+    if args.timings:
+        print(format_breakdown(metrics_before, metrics.snapshot()))
+    metrics.write_prometheus(args.metrics_file)
+    if not args.no_cascade:
+        for stage in cascade_stats["rejected"]:
+            print(f"{stage}: {cascade_stats['rejected'][stage]} rejected, {cascade_stats['calls_saved'][stage]} Gemini call(s) saved")
+    if top_candidates:
+        print(f"Top {len(top_candidates)} candidate(s) from this run:")
+        for skill_ratio, no_of_skills, path, name in sorted(top_candidates, reverse = True):
+            print(f"✅ {path} | {name} | Number of skills: {no_of_skills}/{len(required_info['skills'])}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Screen a directory of PDF resumes without the Streamlit UI.")
+    parser.add_argument("pdf_dir", help = "Directory containing the PDF resumes")
+    parser.add_argument("requirements", help = "JSON file with experience, education, skills and mandatory_skills")
+    parser.add_argument("--output", default = "results.jsonl", help = "Output file, .jsonl or .csv (appended to)")
+    parser.add_argument("--checkpoint", default = None, help = "Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--recursive", action = "store_true", help = "Also screen PDFs in sub-directories")
+    parser.add_argument("--max-concurrency", type = int, default = 5, help = "Resumes sent to Gemini at the same time")
+    parser.add_argument("--chunk-size", type = int, default = 50, help = "PDFs read ahead by the worker pool")
+    parser.add_argument("--extraction-mode", choices = EXTRACTION_MODES, default = "fused")
+    parser.add_argument("--no-cache", action = "store_true", help = "Do not use the on-disk extraction cache")
+    parser.add_argument("--no-cascade", action = "store_true", help = "Send every resume to Gemini, even if it fails the local checks")
+    parser.add_argument("--no-dedup", action = "store_true", help = "Screen duplicate and near-duplicate resumes separately instead of reusing one extraction")
+    parser.add_argument("--batch-requests", action = "store_true", help = "Pack the contact info and skill checks of several resumes into one Gemini request")
+    parser.add_argument("--log-prompts", action = "store_true", help = "Print the size and duration of every Gemini prompt")
+    parser.add_argument("--timings", action = "store_true", help = "Print the time spent per stage and the retry, quota and cache counters at the end")
+    parser.add_argument("--metrics-json", action = "store_true", help = "Log every timing span and counter as a JSON line on stderr")
+    parser.add_argument("--metrics-file", default = DEFAULT_METRICS_PATH, help = "Write the metrics in the Prometheus text format to this file at the end")
+    parser.add_argument("--top", type = int, default = 3, help = "Number of top candidates to print at the end")
+    run_batch(parser.parse_args())
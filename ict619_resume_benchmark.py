@@ -0,0 +1,362 @@
+import argparse
+import datetime
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ict619_resume_functions import scan_resume, get_section_indices, extract_year, get_highest_education, evaluate_candidate, EXTRACTION_MODES
+from ict619_resume_engine import iter_screen_pdfs
+from ict619_resume_scoring import EDUCATION_LEVELS, build_candidate_arrays, score_candidate_arrays, top_k_indices
+from ict619_resume_metrics import metrics, json_logger, summarize_counters
+from ict619_resume_llm import StubBackend, set_llm_backend
+from ict619_resume_synthetic import generate_corpus
+
+
+#############################
+#-------- Pathological inputs --------#
+#############################
+# Each case builds a text of roughly n characters that is hard for backtracking regexes
+SCANNER_CASES = {
+    "long_line": lambda n: ("Software engineer at ABC working with Python 2015 " * (n // 50 + 1))[:n],
+    "digits": lambda n: ("1234567890 2015 " * (n // 16 + 1))[:n],
+    "dashes": lambda n: "Work Experience\n2015 " + ("- " * (n // 2)),
+    "digits_and_dashes": lambda n: "Work Experience\n" + ("2015-2016-" * (n // 10 + 1))[:n],
+    "spaces_after_year": lambda n: "Work Experience\n2015" + " " * n + "x",
+    "spaces_after_heading": lambda n: "education" + " " * n + "x",
+}
+SCANNER_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+# Function to run the original regex sweeps on one text
+def legacy_scan(resume_text):
+    section_index = get_section_indices(resume_text)
+    education_section = next((item for item in section_index if item[0] == "Education"), None)
+    work_section = next((item for item in section_index if item[0] == "Work Experience"), None)
+    extract_year(work_section, resume_text)
+    get_highest_education(education_section, resume_text)
+
+def _time_legacy(case, size, queue):
+    text = SCANNER_CASES[case](size)
+    start = time.perf_counter()
+    legacy_scan(text)
+    queue.put(time.perf_counter() - start)
+
+# Function to time the legacy sweeps in a child process, so a backtracking blowup can be stopped
+def time_legacy(case, size, timeout):
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target = _time_legacy, args = (case, size, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    return queue.get()
+
+def time_scanner(case, size):
+    text = SCANNER_CASES[case](size)
+    start = time.perf_counter()
+    scan_resume(text)
+    return time.perf_counter() - start
+
+# Function to print scanner vs legacy timings for every pathological case and size
+def run_scanner_benchmark(sizes, legacy_timeout):
+    print(f"{'case':<22}{'chars':>10}{'scanner (ms)':>15}{'legacy (ms)':>15}")
+    for case in SCANNER_CASES:
+        for size in sizes:
+            scanner_time = time_scanner(case, size)
+            legacy_time = time_legacy(case, size, legacy_timeout)
+            legacy_str = f">{legacy_timeout * 1000:.0f}" if legacy_time is None else f"{legacy_time * 1000:.1f}"
+            print(f"{case:<22}{size:>10}{scanner_time * 1000:>15.1f}{legacy_str:>15}")
+
+
+#############################
+#-------- Candidate scoring --------#
+#############################
+SCORING_SIZES = [1_000, 10_000, 100_000]
+SCORING_SKILLS = ["python", "java", "sql", "docker", "aws", "react", "kubernetes", "spark", "tableau", "excel"]
+
+# Function to build a random pool of extracted_info dicts and the requirements to score them against
+def make_scoring_pool(size, seed = 0):
+    rng = random.Random(seed)
+    required_info = {"experience": 3, "education": "Bachelor", "skills": SCORING_SKILLS, "mandatory_skills": {"python": 2}}
+    extracted_infos = [{
+        "experience": rng.randint(0, 15),
+        "education": rng.choice(EDUCATION_LEVELS + [None]),
+        "skills": rng.sample(SCORING_SKILLS, rng.randint(0, len(SCORING_SKILLS))),
+        "skills_met": {"python": rng.choice(["meets", "does not meet"])},
+    } for _ in range(size)]
+    return extracted_infos, required_info
+
+# Function to print the per-candidate loop with a full sort vs building the arrays once and re-scoring them
+def run_scoring_benchmark(sizes, k):
+    print(f"{'candidates':>10}{'loop (ms)':>14}{'build (ms)':>14}{'re-score (ms)':>16}")
+    for size in sizes:
+        extracted_infos, required_info = make_scoring_pool(size)
+
+        start = time.perf_counter()
+        results = [evaluate_candidate(extracted_info, required_info) for extracted_info in extracted_infos]
+        sorted([result for result in results if result[:3] == [1, 1, 1.0]], key = lambda result: result[3], reverse = True)[:k]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        arrays = build_candidate_arrays(extracted_infos, required_info)
+        build_time = time.perf_counter() - start
+
+        # What a UI interaction costs once the arrays exist: new thresholds, weights and top k
+        start = time.perf_counter()
+        scores = score_candidate_arrays(arrays, {**required_info, "experience": 5}, {"experience": 0.2})
+        top_k_indices(scores["score"], scores["passes"], k)
+        score_time = time.perf_counter() - start
+
+        print(f"{size:>10}{loop_time * 1000:>14.1f}{build_time * 1000:>14.1f}{score_time * 1000:>16.2f}")
+
+
+
+#############################
+#-------- Startup time --------#
+#############################
+STARTUP_MODULES = ["ict619_resume_functions", "ict619_resume_engine", "ict619_resume_store", "ict619_resume_search"]
+# What ict619_resume_functions used to import up front, before the SDK and pdfplumber were loaded on first use
+EAGER_IMPORTS = ["pdfplumber", "google.genai", "httpx"]
+HEAVY_MODULES = ["google.genai", "pdfplumber", "httpx"]
+
+# Function to import modules in a fresh interpreter, returns (seconds, heavy modules it loaded)
+# preload is imported first inside the timed span, to stand for the eager setup
+def time_import(modules, preload = ()):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"for name in {list(preload) + list(modules)!r}: __import__(name)\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output = True, text = True, check = True,
+        cwd = os.path.dirname(os.path.abspath(__file__)),
+    ).stdout.splitlines()
+    return float(output[-2]), output[-1]
+
+# Function to print the median import time of the app's modules, lazy (as shipped) vs with the eager imports
+def run_startup_benchmark(repeats):
+    print(f"{'setup':<10}{'median (ms)':>14}{'min (ms)':>12}  heavy modules loaded")
+    for label, preload in [("lazy", ()), ("eager", EAGER_IMPORTS)]:
+        runs = [time_import(STARTUP_MODULES, preload) for _ in range(repeats)]
+        times = [seconds for seconds, _ in runs]
+        print(f"{label:<10}{statistics.median(times) * 1000:>14.1f}{min(times) * 1000:>12.1f}  {runs[-1][1] or '-'}")
+
+
+
+#############################
+#-------- Pipeline throughput --------#
+#############################
+PIPELINE_SIZES = [10, 100, 1_000]
+PIPELINE_REQUIREMENTS = {"experience": 3, "education": "Bachelor", "skills": ["python", "sql", "docker", "aws"], "mandatory_skills": {"python": 2}}
+DEFAULT_PIPELINE_OUTPUT = "pipeline_benchmark.json"
+
+# Collects the duration of every span from the metrics JSON log, so percentiles can be computed per stage
+class SpanRecorder(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.durations = {}  # "stage task=..." -> [seconds]
+
+    def emit(self, record):
+        event = json.loads(record.getMessage())
+        if event["event"] == "span":
+            labels = " ".join(f"{key}={value}" for key, value in sorted(event.items()) if key not in ("event", "stage", "seconds", "ts"))
+            self.durations.setdefault(f"{event['stage']} {labels}".strip(), []).append(event["seconds"])
+
+# Function to return the q-th percentile (0-100) of some values, nearest rank
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+# Function to screen a synthetic corpus of size resumes end to end (PDF parsing, local stages and the fake
+# LLM) in this process, returns the run's throughput, latencies, per-stage timings and peak memory
+def run_pipeline_once(size, args):
+    corpus = generate_corpus(size, seed = args.seed)
+    backend = StubBackend(
+        latency = args.latency, jitter = args.jitter, rate_limit_rate = args.rate_limit_rate,
+        server_error_rate = args.server_error_rate, retry_delay = args.retry_delay, seed = args.seed,
+        use_rate_limiter = args.requests_per_minute > 0,
+    )
+    set_llm_backend(backend)
+    recorder = SpanRecorder()
+    json_logger.addHandler(recorder)
+    json_logger.setLevel(logging.INFO)
+    json_logger.propagate = False
+    metrics_before = metrics.snapshot()
+
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    results = iter_screen_pdfs(
+        [item["data"] for item in corpus], PIPELINE_REQUIREMENTS,
+        max_concurrency = args.max_concurrency, cache = None, extraction_mode = args.extraction_mode,
+        chunk_size = args.chunk_size, cascade = args.cascade, batch = args.batch_requests,
+    )
+    for item in results:
+        if item["screened"] is None:
+            errors += 1
+        else:
+            latencies.append(item["screened"]["processing_time"])
+    wall_seconds = time.perf_counter() - start
+
+    stages = {}
+    for stage, durations in sorted(recorder.durations.items()):
+        stages[stage] = {
+            "count": len(durations),
+            "seconds": round(sum(durations), 4),
+            "per_second": round(len(durations) / wall_seconds, 2),
+            "p50_ms": round(percentile(durations, 50) * 1000, 2),
+            "p95_ms": round(percentile(durations, 95) * 1000, 2),
+        }
+    try:
+        import resource
+        # Linux reports kilobytes, macOS bytes; the PDF worker processes are not included
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2)
+    except ImportError:  # Windows
+        peak_rss_mb = None
+
+    return {
+        "size": size,
+        "wall_seconds": round(wall_seconds, 3),
+        "resumes_per_second": round(size / wall_seconds, 2),
+        "errors": errors,
+        "latency_p50_ms": round((percentile(latencies, 50) or 0) * 1000, 1),
+        "latency_p95_ms": round((percentile(latencies, 95) or 0) * 1000, 1),
+        "llm_attempts": backend.calls,
+        "injected_errors": backend.errors,
+        "peak_rss_mb": round(peak_rss_mb, 1) if peak_rss_mb is not None else None,
+        "stages": stages,
+        "counters": summarize_counters(metrics_before, metrics.snapshot()),
+    }
+
+# Function to run every size in a fresh interpreter, so imports, caches and peak memory do not carry over,
+# and save the results as JSON for compare
+def run_pipeline_benchmark(args):
+    child_args = [
+        "--latency", str(args.latency), "--jitter", str(args.jitter), "--rate-limit-rate", str(args.rate_limit_rate),
+        "--server-error-rate", str(args.server_error_rate), "--retry-delay", str(args.retry_delay), "--seed", str(args.seed),
+        "--max-concurrency", str(args.max_concurrency), "--chunk-size", str(args.chunk_size),
+        "--extraction-mode", args.extraction_mode, "--requests-per-minute", str(args.requests_per_minute),
+    ] + (["--cascade"] if args.cascade else []) + (["--batch-requests"] if args.batch_requests else [])
+
+    runs = []
+    print(f"{'resumes':>8}{'wall (s)':>10}{'resumes/s':>11}{'p50 (ms)':>10}{'p95 (ms)':>10}{'errors':>8}{'peak RSS (MB)':>15}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # A private rate limiter file, so a benchmark never shares (or drains) the real Gemini budget
+        env = {**os.environ, "GEMINI_REQUESTS_PER_MINUTE": str(args.requests_per_minute), "RATE_LIMIT_PATH": os.path.join(temp_dir, "rate_limit.sqlite3")}
+        for size in args.sizes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "pipeline-run", "--size", str(size)] + child_args,
+                capture_output = True, text = True, check = True, env = env,
+                cwd = os.path.dirname(os.path.abspath(__file__)),
+            ).stdout.splitlines()
+            run = json.loads(output[-1])
+            runs.append(run)
+            print(f"{size:>8}{run['wall_seconds']:>10.2f}{run['resumes_per_second']:>11.1f}{run['latency_p50_ms']:>10.0f}"
+                  f"{run['latency_p95_ms']:>10.0f}{run['errors']:>8}{run['peak_rss_mb'] or 0:>15.1f}")
+
+    results = {
+        "created_at": datetime.datetime.now().isoformat(timespec = "seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("benchmark", "output")},
+        "runs": runs,
+    }
+    with open(args.output, "w", encoding = "utf-8") as f:
+        json.dump(results, f, indent = 2)
+    print(f"Results in {args.output} (compare two runs with: python ict619_resume_benchmark.py compare OLD NEW)")
+
+# Function to print the change in throughput, latency and per-stage time between two saved pipeline runs
+def compare_pipeline_results(old_path, new_path):
+    with open(old_path, encoding = "utf-8") as f:
+        old = {run["size"]: run for run in json.load(f)["runs"]}
+    with open(new_path, encoding = "utf-8") as f:
+        new = {run["size"]: run for run in json.load(f)["runs"]}
+
+    def change(before, after):
+        return f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+
+    if not old.keys() & new.keys():
+        print("The two runs have no corpus size in common.")
+    for size in sorted(old.keys() & new.keys()):
+        before, after = old[size], new[size]
+        print(f"{size} resumes: {before['resumes_per_second']} -> {after['resumes_per_second']} resumes/s ({change(before['resumes_per_second'], after['resumes_per_second'])}), "
+              f"p95 {before['latency_p95_ms']} -> {after['latency_p95_ms']} ms ({change(before['latency_p95_ms'], after['latency_p95_ms'])}), "
+              f"peak RSS {before['peak_rss_mb']} -> {after['peak_rss_mb']} MB")
+        for stage in sorted(before["stages"].keys() | after["stages"].keys()):
+            old_stage, new_stage = before["stages"].get(stage), after["stages"].get(stage)
+            if old_stage is None or new_stage is None:
+                print(f"    {stage:<32} {'only in new' if old_stage is None else 'only in old'}")
+                continue
+            print(f"    {stage:<32} p95 {old_stage['p95_ms']:>9.2f} -> {new_stage['p95_ms']:>9.2f} ms ({change(old_stage['p95_ms'], new_stage['p95_ms'])})")
+
+# Function to add the options shared by the pipeline benchmark and its per-size child runs
+def add_pipeline_arguments(parser):
+    parser.add_argument("--latency", type = float, default = 0.5, help = "Seconds per fake LLM call")
+    parser.add_argument("--jitter", type = float, default = 0.2, help = "Extra random seconds per call, up to this much")
+    parser.add_argument("--rate-limit-rate", type = float, default = 0.0, help = "Share of calls failing with a 429")
+    parser.add_argument("--server-error-rate", type = float, default = 0.0, help = "Share of calls failing with a 503")
+    parser.add_argument("--retry-delay", type = float, default = 1.0, help = "Retry delay suggested by the fake 429s")
+    parser.add_argument("--requests-per-minute", type = float, default = 0, help = "Also go through a private shared rate limiter (0 = off)")
+    parser.add_argument("--seed", type = int, default = 0, help = "Seed of the corpus and of the injected latency and errors")
+    parser.add_argument("--max-concurrency", type = int, default = 5)
+    parser.add_argument("--chunk-size", type = int, default = 50)
+    parser.add_argument("--extraction-mode", choices = EXTRACTION_MODES, default = "fused")
+    parser.add_argument("--cascade", action = "store_true", help = "Skip the LLM for resumes failing the local checks")
+    parser.add_argument("--batch-requests", action = "store_true", help = "Pack several resumes into one LLM request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmarks for the resume screening pipeline.")
+    subparsers = parser.add_subparsers(dest = "benchmark", required = True)
+
+    scanner_parser = subparsers.add_parser("scanner", help = "Single-pass scanner vs the original regex sweeps on pathological text")
+    scanner_parser.add_argument("--sizes", type = int, nargs = "+", default = SCANNER_SIZES)
+    scanner_parser.add_argument("--legacy-timeout", type = float, default = 5.0, help = "Seconds before a legacy run is stopped")
+
+    scoring_parser = subparsers.add_parser("scoring", help = "Vectorised candidate scoring vs evaluate_candidate in a loop")
+    scoring_parser.add_argument("--sizes", type = int, nargs = "+", default = SCORING_SIZES)
+    scoring_parser.add_argument("--top", type = int, default = 3)
+
+    startup_parser = subparsers.add_parser("startup", help = "Import time of the app's modules, lazy vs eager SDK and pdfplumber imports")
+    startup_parser.add_argument("--repeats", type = int, default = 5, help = "Fresh interpreters per setup")
+
+    pipeline_parser = subparsers.add_parser("pipeline", help = "End-to-end screening of a synthetic corpus against a fake LLM, saved as JSON")
+    pipeline_parser.add_argument("--sizes", type = int, nargs = "+", default = PIPELINE_SIZES)
+    pipeline_parser.add_argument("--output", default = DEFAULT_PIPELINE_OUTPUT, help = "JSON file for the results")
+    add_pipeline_arguments(pipeline_parser)
+
+    pipeline_run_parser = subparsers.add_parser("pipeline-run", help = "One pipeline size in this process, printed as JSON (used by pipeline)")
+    pipeline_run_parser.add_argument("--size", type = int, required = True)
+    add_pipeline_arguments(pipeline_run_parser)
+
+    compare_parser = subparsers.add_parser("compare", help = "Compare two saved pipeline results")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+    if args.benchmark == "scanner":
+        run_scanner_benchmark(args.sizes, args.legacy_timeout)
+    elif args.benchmark == "scoring":
+        run_scoring_benchmark(args.sizes, args.top)
+    elif args.benchmark == "startup":
+        run_startup_benchmark(args.repeats)
+    elif args.benchmark == "pipeline":
+        run_pipeline_benchmark(args)
+    elif args.benchmark == "pipeline-run":
+        print(json.dumps(run_pipeline_once(args.size, args)))
+    elif args.benchmark == "compare":
+        compare_pipeline_results(args.old, args.new)
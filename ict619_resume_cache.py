@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+#############################
+#-------- Cache settings --------#
+#############################
+DEFAULT_CACHE_PATH = os.getenv("RESUME_CACHE_PATH", "resume_cache.sqlite3")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024  # Total size of cached values before least recently used entries are evicted
+DEFAULT_MAX_AGE_DAYS = 30  # Entries not used for this long are evicted
+EVICT_EVERY = 100  # Run eviction after this many writes
+
+
+# Function to hash the raw bytes of an uploaded PDF (path, bytes or file-like object)
+def hash_pdf_bytes(pdf_file):
+    if isinstance(pdf_file, (bytes, bytearray)):
+        data = pdf_file
+    elif hasattr(pdf_file, "getvalue"):  # Streamlit UploadedFile / BytesIO
+        data = pdf_file.getvalue()
+    elif hasattr(pdf_file, "read"):
+        position = pdf_file.tell()
+        data = pdf_file.read()
+        pdf_file.seek(position)  # Leave the file where pdfplumber expects it
+    else:
+        with open(pdf_file, "rb") as f:
+            data = f.read()
+    return hashlib.sha256(data).hexdigest()
+
+
+#############################
+#-------- Extraction cache --------#
+#############################
+# On-disk cache of extraction results keyed by PDF hash, task, prompt template version and model
+class ExtractionCache:
+    def __init__(self, path = DEFAULT_CACHE_PATH, max_bytes = DEFAULT_MAX_BYTES, max_age_days = DEFAULT_MAX_AGE_DAYS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        # Streamlit reruns the script on different threads, so the connection is shared behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread = False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_access ON extraction_cache (last_access)")
+        self._conn.commit()
+        self.evict()
+
+    # Function to build the cache key for one task on one PDF
+    @staticmethod
+    def make_key(pdf_hash, task, prompt_version, model):
+        return hashlib.sha256(f"{pdf_hash}|{task}|{prompt_version}|{model}".encode("utf-8")).hexdigest()
+
+    # Function to return the cached value, or None on a miss
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM extraction_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE extraction_cache SET last_access = ?, hit_count = hit_count + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+            self._conn.commit()
+        return json.loads(row[0])
+
+    # Function to store a JSON-serialisable value
+    def set(self, key, value):
+        encoded = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now, now)
+            )
+            self._conn.commit()
+            self._writes += 1
+            run_eviction = self._writes % EVICT_EVERY == 0
+        if run_eviction:
+            self.evict()
+
+    # Function to drop entries that are too old, then least recently used entries until under max_bytes
+    def evict(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM extraction_cache WHERE last_access < ?",
+                (time.time() - self.max_age_seconds,)
+            )
+            total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM extraction_cache").fetchone()[0]
+            if total_size > self.max_bytes:
+                excess = total_size - self.max_bytes
+                to_delete = []
+                for key, size in self._conn.execute("SELECT key, size FROM extraction_cache ORDER BY last_access ASC"):
+                    if excess <= 0:
+                        break
+                    to_delete.append((key,))
+                    excess -= size
+                self._conn.executemany("DELETE FROM extraction_cache WHERE key = ?", to_delete)
+            self._conn.commit()
+
+    # Function to report hit/miss counters and cache size
+    def stats(self):
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extraction_cache"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "size_bytes": total_size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM extraction_cache")
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
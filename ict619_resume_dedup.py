@@ -0,0 +1,125 @@
+import hashlib
+import os
+import re
+import zlib
+
+import numpy as np
+
+
+#############################
+#-------- Dedup settings --------#
+#############################
+SHINGLE_SIZE = 5  # Words per shingle
+NUM_PERMUTATIONS = 128  # MinHash signature length
+LSH_BANDS = 16  # NUM_PERMUTATIONS = LSH_BANDS * LSH_ROWS; 16 x 8 makes resumes above ~0.7 similar likely candidates
+LSH_ROWS = 8
+# Estimated Jaccard similarity of the shingles above which two resumes are treated as the same candidate
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+MINHASH_PRIME = 4294967291  # Largest prime below 2**32, so (a * x + b) never overflows uint64
+# Fixed seed: signatures must stay comparable between runs and processes
+_rng = np.random.RandomState(619)
+MINHASH_A = _rng.randint(1, MINHASH_PRIME, size = NUM_PERMUTATIONS, dtype = np.uint64)
+MINHASH_B = _rng.randint(0, MINHASH_PRIME, size = NUM_PERMUTATIONS, dtype = np.uint64)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+#############################
+#-------- MinHash signatures --------#
+#############################
+# Function to reduce a resume text to its words, so re-exports that only change spacing, line breaks,
+# punctuation or case compare equal
+def normalize_words(text):
+    return WORD_PATTERN.findall((text or "").lower())
+
+# Function to return the 32-bit hashes of the overlapping word shingles of a text
+def shingle_hashes(words, size = SHINGLE_SIZE):
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+# Function to compute the MinHash signature of a set of shingle hashes, or None for an empty text
+def minhash_signature(hashes):
+    if not hashes:
+        return None
+    values = np.fromiter(hashes, dtype = np.uint64, count = len(hashes))
+    return ((np.outer(values, MINHASH_A) + MINHASH_B) % MINHASH_PRIME).min(axis = 0).astype(np.uint32)
+
+# Function to estimate the Jaccard similarity of two resumes from their signatures
+def estimate_similarity(signature, other_signature):
+    return float(np.mean(signature == other_signature))
+
+
+#############################
+#-------- Duplicate index --------#
+#############################
+# Groups resumes of the same candidate: the same file (PDF hash), the same text in a different file
+# (e.g. re-exported) or a slightly edited version (MinHash similarity, found through LSH buckets so each
+# new resume is only compared with a few candidates however large the pool). Only the first resume of a
+# group is indexed, so every copy maps to the same one, whose extraction result is reused.
+class DuplicateIndex:
+    def __init__(self, threshold = NEAR_DUPLICATE_THRESHOLD, bands = LSH_BANDS, rows = LSH_ROWS):
+        if bands * rows != NUM_PERMUTATIONS:
+            raise ValueError(f"bands * rows must be {NUM_PERMUTATIONS}")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = rows
+        self._by_pdf_hash = {}  # PDF hash -> key of the first resume
+        self._by_text_hash = {}  # hash of the normalised words -> key
+        self._signatures = {}  # key -> MinHash signature
+        self._buckets = [{} for _ in range(bands)]  # band -> {band bytes: [keys]}
+        self.duplicates = {}  # key -> (key of the first resume, "exact" / "same_text" / "near", similarity)
+        self._canonical_keys = set()
+
+    # Function to add a resume and return (canonical key, kind, similarity): the key of the first resume
+    # of its group (its own key if it is new), kind None / "exact" / "same_text" / "near"
+    def add(self, key, pdf_hash = None, text = None):
+        if key in self.duplicates:
+            return self.duplicates[key]
+        if key in self._canonical_keys:  # Added before (e.g. on a Streamlit rerun)
+            return key, None, None
+        if pdf_hash is not None:
+            if pdf_hash in self._by_pdf_hash and self._by_pdf_hash[pdf_hash] != key:
+                return self._record(key, self._by_pdf_hash[pdf_hash], "exact", 1.0)
+            self._by_pdf_hash.setdefault(pdf_hash, key)
+
+        words = normalize_words(text)
+        text_hash = hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+        if text_hash in self._by_text_hash and self._by_text_hash[text_hash] != key:
+            return self._record(key, self._by_text_hash[text_hash], "same_text", 1.0)
+
+        signature = minhash_signature(shingle_hashes(words))
+        self._canonical_keys.add(key)  # Unless it turns out to be a near duplicate below
+        if signature is None:  # No text layer: only an identical file is a duplicate
+            return key, None, None
+        band_keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+        best_key, best_similarity = None, 0.0
+        candidates = {candidate for band, band_key in enumerate(band_keys) for candidate in self._buckets[band].get(band_key, ())}
+        for candidate in candidates:
+            similarity = estimate_similarity(signature, self._signatures[candidate])
+            if similarity > best_similarity:
+                best_key, best_similarity = candidate, similarity
+        if best_key is not None and best_similarity >= self.threshold:
+            self._canonical_keys.discard(key)
+            return self._record(key, best_key, "near", best_similarity)
+
+        self._by_text_hash[text_hash] = key
+        self._signatures[key] = signature
+        for band, band_key in enumerate(band_keys):
+            self._buckets[band].setdefault(band_key, []).append(key)
+        return key, None, None
+
+    def __contains__(self, key):
+        return key in self.duplicates or key in self._canonical_keys
+
+    # Function to return the key of the first resume of the group of an added resume
+    def canonical_key(self, key):
+        return self.duplicates[key][0] if key in self.duplicates else key
+
+    def _record(self, key, canonical_key, kind, similarity):
+        self.duplicates[key] = (canonical_key, kind, similarity)
+        return canonical_key, kind, similarity
@@ -0,0 +1,865 @@
+import asyncio
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+from tenacity import retry, stop_after_attempt, retry_if_exception, RetryError
+
+from ict619_resume_functions import (  # First: it loads .env before the modules below read their settings
+    my_key, get_rate_limiter, is_retryable_gemini_error, wait_before_retry, metric_task, record_llm_sizes,
+    SECTIONS_PROMPT_VERSION, INFO_PROMPT_VERSION, FUSED_PROMPT_VERSION, EXTRACTION_MODES, FUSED_CONFIG, FUSED_RESPONSE_SCHEMA,
+    CONTACT_FIELDS, CONTACT_CONFIDENCE_THRESHOLD, count_tokens, build_prompt_context, log_prompt_size,
+    build_sections_prompt, clean_sections_response, build_info_prompt, parse_dict_response, build_skills_experience_prompt,
+    build_fused_prompt, parse_fused_response, extract_contact_locally, extract_pdf_layouts_cached, get_local_resume_text,
+    scan_resume, calculate_experience, extract_skills, evaluate_candidate,
+    local_prefilter, meets_section_checks, count_extraction_calls, record_cascade_rejection,
+)
+from ict619_resume_pdf import extract_layouts_from_pdfs
+from ict619_resume_cache import hash_pdf_bytes
+from ict619_resume_ratelimit import CircuitOpenError, RateLimitTimeoutError, parse_retry_delay, get_retry_after
+from ict619_resume_metrics import span, observe, increment
+from ict619_resume_dedup import DuplicateIndex
+from ict619_resume_llm import get_llm_backend, load_genai
+
+
+logger = logging.getLogger(__name__)
+
+
+#############################
+#-------- Async screening engine --------#
+#############################
+# Async counterpart of generate_gemini_response, async_client is a session from the LLM backend's open_async()
+@retry(
+    stop = stop_after_attempt(10),  # Retry up to 10 times
+    wait = wait_before_retry,
+    retry = retry_if_exception(is_retryable_gemini_error),
+)
+async def generate_gemini_response_async(prompt, async_client, config = None, task = None):
+    rate_limiter = get_rate_limiter() if async_client.backend.rate_limited else None
+    if rate_limiter is not None:
+        try:
+            with span("rate_limit_wait"):
+                await rate_limiter.acquire_async()
+        except CircuitOpenError:
+            increment("circuit_open_errors")
+            raise
+        except RateLimitTimeoutError:
+            increment("rate_limit_timeouts")
+            raise
+    try:
+        with span("llm_call", task = metric_task(task)):
+            response_text = await async_client.generate(prompt, task, config)
+    except load_genai().errors.ClientError as e:
+        error_message = str(e)
+        if "RESOURCE_EXHAUSTED" in error_message:
+            increment("quota_errors", task = metric_task(task))
+            if rate_limiter is not None:
+                await asyncio.to_thread(rate_limiter.record_rate_limited, parse_retry_delay(e))
+            print("⚠️ API quota exceeded. Retrying...")
+            raise e  # Explicitly re-raise the exception so that retry works
+        else:
+            increment("llm_errors", task = metric_task(task))
+            print(f"⚠️ An unexpected client error occurred: {error_message}")
+            raise e  # Don't retry if it's another error
+    record_llm_sizes(task, prompt, response_text)
+    if rate_limiter is not None:
+        await asyncio.to_thread(rate_limiter.record_success)
+    return response_text
+
+# Function to send the prompt of one task with only the resume text it needs, logging the prompt size
+async def generate_budgeted_response_async(task, resume_text, build_prompt, async_client, config = None):
+    context = build_prompt_context(task, resume_text)
+    prompt = build_prompt(context)
+    start_time = time.time()
+    try:
+        with span("llm_request", task = metric_task(task)):  # All attempts, with the retry and rate limit waits
+            return await generate_gemini_response_async(prompt, async_client, config, task)
+    finally:
+        log_prompt_size(task, prompt, resume_text, context, time.time() - start_time)
+
+# Errors are raised like in the fused mode, so a failed call is reported as a failed resume (and
+# retried by the batch CLI) instead of being screened as a resume without sections
+async def extract_resume_sections_async(initial_resume, async_client):
+    response_text = await generate_budgeted_response_async("sections", initial_resume, build_sections_prompt, async_client)
+    return clean_sections_response(response_text)
+
+async def extract_info_async(resume_text, async_client, fields = None):
+    response = await generate_budgeted_response_async("info", resume_text, lambda context: build_info_prompt(context, fields), async_client)
+    return parse_dict_response(response)
+
+# Function to extract the contact info locally, asking Gemini only for the fields it is not confident about
+# Both read the raw or locally rebuilt text, where the header with the contact details is kept
+async def extract_contact_info_async(initial_resume, async_client, pdf_hash = None, cache = None, batcher = None):
+    with span("contact_local"):
+        candidate_info, confidence = extract_contact_locally(initial_resume)
+    missing = [field for field in CONTACT_FIELDS if confidence[field] < CONTACT_CONFIDENCE_THRESHOLD]
+    if not missing:
+        return candidate_info
+
+    task = "info" if missing == CONTACT_FIELDS else "info:" + "+".join(missing)
+    llm_info = await cached_llm_result(
+        cache, pdf_hash, task, INFO_PROMPT_VERSION,
+        lambda: request_info_async(initial_resume, async_client, missing, batcher),
+        is_valid = lambda info: info != {},
+    )
+    if not isinstance(llm_info, dict):
+        llm_info = {}
+    for field in missing:
+        if llm_info.get(field) is not None:  # Keep the local guess if Gemini did not find the field either
+            candidate_info[field] = llm_info[field]
+    return candidate_info
+
+async def extract_experience_for_skills_async(resume_text, skills_experience, async_client):
+    response = await generate_budgeted_response_async(
+        "skills", resume_text, lambda context: build_skills_experience_prompt(context, skills_experience), async_client
+    )
+    return parse_dict_response(response)
+
+# Function to run the rule-based extraction (experience, education and skills) on a restructured resume
+def extract_local_info(resume_text, skills_required):
+    # One scan finds the sections, the dates in each section and the degrees mentioned
+    scan = scan_resume(resume_text)
+    skills_span = scan["sections"].get("Skills")
+    skills_section = ("Skills", *skills_span) if skills_span else None
+
+    return {
+        "experience": calculate_experience(scan["years"].get("Work Experience", [])),
+        "education": scan["highest_education"],
+        "skills": extract_skills(skills_section, resume_text, skills_required),
+    }
+
+# Function to return a resume-only LLM result from the cache, calling Gemini only on a miss
+async def cached_llm_result(cache, pdf_hash, task, prompt_version, compute, is_valid = lambda value: True):
+    if cache is None or pdf_hash is None:
+        return await compute()
+
+    key = cache.make_key(pdf_hash, task, prompt_version, get_llm_backend(my_key).model_for(task))
+    value = cache.get(key)
+    increment("cache_hits" if value is not None else "cache_misses", task = metric_task(task))
+    if value is None:
+        value = await compute()
+        if is_valid(value):  # Never cache failed calls, they should be retried next time
+            cache.set(key, value)
+    return value
+
+async def extract_fused_async(initial_resume, skills_experience, async_client):
+    response = await generate_budgeted_response_async(
+        "fused", initial_resume, lambda context: build_fused_prompt(context, skills_experience), async_client, config = FUSED_CONFIG
+    )
+    return parse_fused_response(response, skills_experience)
+
+#############################
+#-------- Multi-resume batched requests --------#
+#############################
+# Contact info and skill verdict requests waiting at the same time are packed into one Gemini request,
+# each resume between <document id="..."> tags, and the JSON answer is split back per resume.
+# Batches close when the resume text reaches BATCH_TOKEN_BUDGET (so fewer long resumes share a request),
+# MAX_BATCH_DOCUMENTS resumes are waiting, or BATCH_WINDOW_SECONDS has passed since the first one.
+MAX_BATCH_DOCUMENTS = 10
+BATCH_TOKEN_BUDGET = 12000
+BATCH_WINDOW_SECONDS = 0.5
+
+BATCH_INFO_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "documents": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "doc_id": {"type": "STRING"},
+                    "name": {"type": "STRING", "nullable": True},
+                    "email": {"type": "STRING", "nullable": True},
+                    "phone": {"type": "STRING", "nullable": True},
+                },
+                "required": ["doc_id", "name", "email", "phone"],
+            },
+        },
+    },
+    "required": ["documents"],
+}
+
+BATCH_SKILLS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "documents": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "doc_id": {"type": "STRING"},
+                    "mandatory_skills": FUSED_RESPONSE_SCHEMA["properties"]["mandatory_skills"],
+                },
+                "required": ["doc_id", "mandatory_skills"],
+            },
+        },
+    },
+    "required": ["documents"],
+}
+
+BATCH_CONFIGS = {
+    "info": {"response_mime_type": "application/json", "response_schema": BATCH_INFO_SCHEMA},
+    "skills": {"response_mime_type": "application/json", "response_schema": BATCH_SKILLS_SCHEMA},
+}
+
+# Function to wrap the resumes of a batch in numbered document tags
+def format_batch_documents(contexts):
+    return "\n".join(
+        f'<document id="{doc_id}">\n{context.replace("</document>", "")}\n</document>'
+        for doc_id, context in enumerate(contexts, start = 1)
+    )
+
+# Function to build the prompt that extracts the contact info (or only the given fields) of several resumes
+def build_batch_info_prompt(contexts, fields):
+    field_names = {"name": "name", "email": "email address", "phone": "phone number"}
+    prompt = f"""
+    The following are {len(contexts)} resumes, each between <document id="..."> and </document> tags.
+    For every document, extract the candidate's {" and ".join(field_names[field] for field in fields)}.
+    Phone numbers usually start with 65. Use null if the detail is not found.
+    Return exactly one entry per document, with its id as doc_id, and never mix details between documents.
+
+    {format_batch_documents(contexts)}
+    """
+    return prompt
+
+# Function to build the prompt that checks the same mandatory skills on several resumes
+def build_batch_skills_prompt(contexts, skills_experience):
+    skills_experience_str = "\n".join([f"{skill}: {years}" for skill, years in skills_experience.items()])
+    prompt = f"""
+    The following are {len(contexts)} resumes, each between <document id="..."> and </document> tags.
+    For every document, check if the candidate meets the required skills as specified in the format
+    (skill: required years), returning one verdict per listed skill:
+    {skills_experience_str}
+    Return exactly one entry per document, with its id as doc_id, and judge each document on its own text only.
+
+    {format_batch_documents(contexts)}
+    """
+    return prompt
+
+# Function to split a batched JSON response into {doc number: result}
+# Documents missing from the answer or with an incomplete answer are left out, so they can be asked again alone
+def parse_batch_response(response, task, batch_size, fields = None, skills_experience = None):
+    try:
+        entries = json.loads(response)["documents"]
+        if not isinstance(entries, list):
+            raise TypeError("documents is not a list")
+    except (ValueError, KeyError, TypeError) as e:
+        print(f"Error parsing batched response: {e}")
+        return {}
+    # A malformed entry only costs its own document
+    by_id = {str(entry["doc_id"]).strip(): entry for entry in entries if isinstance(entry, dict) and "doc_id" in entry}
+
+    results = {}
+    for doc_number in range(batch_size):
+        entry = by_id.get(str(doc_number + 1))
+        if not isinstance(entry, dict):
+            continue
+        try:
+            if task == "info":
+                results[doc_number] = {field: entry[field] for field in fields}
+            else:
+                verdicts = {item["skill"].lower(): item["status"] for item in entry["mandatory_skills"]}
+                if all(skill.lower() in verdicts for skill in skills_experience):
+                    results[doc_number] = {skill: verdicts[skill.lower()] for skill in skills_experience}
+        except (KeyError, TypeError, AttributeError):
+            continue
+    return results
+
+# Collects the requests of concurrently screened resumes and sends them in shared Gemini requests
+# Same results as extract_info_async / extract_experience_for_skills_async, which are also used for a batch
+# of one and for every document the batched answer does not cover
+class GeminiBatcher:
+    def __init__(self, async_client, max_concurrency = 5, max_documents = MAX_BATCH_DOCUMENTS, token_budget = BATCH_TOKEN_BUDGET, window_seconds = BATCH_WINDOW_SECONDS):
+        self.async_client = async_client
+        self.max_documents = max_documents
+        self.token_budget = token_budget
+        self.window_seconds = window_seconds
+        self.batched_calls = 0  # Requests carrying more than one resume
+        self.batched_documents = 0
+        self.fallback_documents = 0  # Documents asked again alone after a malformed answer
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending = {}  # group key -> {"items": [(resume_text, context, future)], "tokens": n, "timer": handle}
+        self._tasks = set()
+
+    async def extract_info(self, resume_text, fields = None):
+        fields = list(fields or CONTACT_FIELDS)
+        return await self._submit(("info", tuple(fields)), "info", resume_text, fields = fields)
+
+    async def extract_experience_for_skills(self, resume_text, skills_experience):
+        return await self._submit(("skills", tuple(skills_experience.items())), "skills", resume_text, skills_experience = dict(skills_experience))
+
+    async def _submit(self, key, task, resume_text, **options):
+        context = build_prompt_context(task, resume_text)
+        tokens = count_tokens(context)
+        # Close the open batch first if this resume would take it over the token budget
+        group = self._pending.get(key)
+        if group is not None and group["tokens"] + tokens > self.token_budget:
+            self._flush(key)
+
+        future = asyncio.get_running_loop().create_future()
+        if key not in self._pending:
+            self._pending[key] = {
+                "task": task, "options": options, "items": [], "tokens": 0,
+                "timer": asyncio.get_running_loop().call_later(self.window_seconds, self._flush, key),
+            }
+        group = self._pending[key]
+        group["items"].append((resume_text, context, future))
+        group["tokens"] += tokens
+        if len(group["items"]) >= self.max_documents:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key):
+        group = self._pending.pop(key, None)
+        if group is None:
+            return
+        group["timer"].cancel()
+        task = asyncio.ensure_future(self._run(group["task"], group["items"], **group["options"]))
+        self._tasks.add(task)  # Keep a reference until it is done
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, task, items, fields = None, skills_experience = None):
+        results = {}
+        if len(items) > 1:
+            contexts = [context for _, context, _ in items]
+            if task == "info":
+                prompt = build_batch_info_prompt(contexts, fields)
+            else:
+                prompt = build_batch_skills_prompt(contexts, skills_experience)
+            start_time = time.time()
+            try:
+                async with self._semaphore:
+                    with span("llm_request", task = f"{task}_batch"):
+                        response = await generate_gemini_response_async(prompt, self.async_client, config = BATCH_CONFIGS[task], task = task)
+            except Exception as e:  # e.g. quota exhausted after all retries, single calls would fail the same way
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                log_prompt_size(f"{task}_batch", prompt, "\n".join(text for text, _, _ in items), "\n".join(contexts), time.time() - start_time)
+            results = parse_batch_response(response, task, len(items), fields, skills_experience)
+            if len(results) < len(items):
+                print(f"⚠️ Batched {task} response covered {len(results)} of {len(items)} resumes. Asking the others alone...")
+            self.batched_calls += 1
+            self.batched_documents += len(results)
+            self.fallback_documents += len(items) - len(results)
+            increment("batched_documents", len(results), task = task)
+            increment("batch_fallback_documents", len(items) - len(results), task = task)
+
+        async def answer(doc_number, resume_text, future):
+            try:
+                if doc_number in results:
+                    result = results[doc_number]
+                else:
+                    async with self._semaphore:
+                        if task == "info":
+                            result = await extract_info_async(resume_text, self.async_client, fields)
+                        else:
+                            result = await extract_experience_for_skills_async(resume_text, skills_experience, self.async_client)
+                if not future.done():  # The waiting resume may have been cancelled
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+
+        await asyncio.gather(*(answer(doc_number, resume_text, future) for doc_number, (resume_text, _, future) in enumerate(items)))
+
+# Functions to ask for contact info / skill verdicts on their own, or through the batcher when batching
+def request_info_async(resume_text, async_client, fields = None, batcher = None):
+    if batcher is not None:
+        return batcher.extract_info(resume_text, fields)
+    return extract_info_async(resume_text, async_client, fields)
+
+def request_skill_verdicts_async(resume_text, skills_experience, async_client, batcher = None):
+    if batcher is not None:
+        return batcher.extract_experience_for_skills(resume_text, skills_experience)
+    return extract_experience_for_skills_async(resume_text, skills_experience, async_client)
+
+
+# Function to run the original three calls, keeping the order sections -> (contact info, mandatory skills)
+# The restructuring call is skipped when the local layout engine already rebuilt the sections
+# stop_after_sections(resume_text) returning True skips the other two calls and returns (resume_text, None, None)
+async def run_three_call_extraction_async(initial_resume, skills_experience, async_client, pdf_hash = None, cache = None, local_resume_text = None, stop_after_sections = None, batcher = None):
+    # Sections and contact info depend only on the resume, so they are cached by PDF hash
+    if local_resume_text is not None:
+        resume_text = local_resume_text
+    else:
+        resume_text = await cached_llm_result(
+            cache, pdf_hash, "sections", SECTIONS_PROMPT_VERSION,
+            lambda: extract_resume_sections_async(initial_resume, async_client),
+        )
+    if stop_after_sections is not None and stop_after_sections(resume_text):
+        return resume_text, None, None
+
+    # The contact details are in the header, which the restructured sections may leave out, but the
+    # local layout keeps it with the columns apart (the name is not run together with the next column)
+    contact_text = local_resume_text if local_resume_text is not None else initial_resume
+    info_task = extract_contact_info_async(contact_text, async_client, pdf_hash, cache, batcher)
+
+    # Contact info and mandatory skills only depend on the restructured text, so run them together
+    if skills_experience != {}:
+        candidate_info, skills_met = await asyncio.gather(
+            info_task,
+            request_skill_verdicts_async(resume_text, skills_experience, async_client, batcher),
+        )
+    else: #  Handle if no mandatory skills entered
+        candidate_info = await info_task
+        skills_met = "no_mandatory_skills"
+
+    return resume_text, candidate_info, skills_met
+
+# Function to run the fused single call, falling back to three calls if the JSON is malformed
+# stop_after_sections is checked when the sections come from the cache, before the separate skill check
+async def run_fused_extraction_async(initial_resume, skills_experience, async_client, pdf_hash = None, cache = None, stop_after_sections = None, batcher = None):
+    use_cache = cache is not None and pdf_hash is not None
+    if use_cache:
+        fused_model = get_llm_backend(my_key).model_for("fused")
+        sections_key = cache.make_key(pdf_hash, "fused_sections", FUSED_PROMPT_VERSION, fused_model)
+        info_key = cache.make_key(pdf_hash, "fused_info", FUSED_PROMPT_VERSION, fused_model)
+        resume_text = cache.get(sections_key)
+        candidate_info = cache.get(info_key)
+        increment("cache_hits" if resume_text is not None and candidate_info is not None else "cache_misses", task = "fused")
+
+        # Known resume: only the requirement-dependent skill check still needs Gemini
+        if resume_text is not None and candidate_info is not None:
+            if stop_after_sections is not None and stop_after_sections(resume_text):
+                return resume_text, None, None
+            if skills_experience != {}:
+                skills_met = await request_skill_verdicts_async(resume_text, skills_experience, async_client, batcher)
+            else:
+                skills_met = "no_mandatory_skills"
+            return resume_text, candidate_info, skills_met
+
+    fused = await extract_fused_async(initial_resume, skills_experience, async_client)
+    if fused is None:
+        print("⚠️ Structured response could not be parsed. Falling back to three calls...")
+        return await run_three_call_extraction_async(initial_resume, skills_experience, async_client, pdf_hash, cache, stop_after_sections = stop_after_sections, batcher = batcher)
+
+    resume_text, candidate_info, skills_met = fused
+    if use_cache:
+        cache.set(sections_key, resume_text)
+        cache.set(info_key, candidate_info)
+    if skills_experience == {}:
+        skills_met = "no_mandatory_skills"
+
+    return resume_text, candidate_info, skills_met
+
+# Function to screen one resume with the selected extraction mode ("fused" or "three_calls")
+# local_layout is the layout from extract_pdf_layouts_cached, used instead of Gemini's restructuring when confident
+# With cascade, candidates failing the local checks get no Gemini call and candidates failing the exact
+# experience / education checks on the sections get no contact info or skill calls (counted in cascade_stats)
+async def screen_resume_async(initial_resume, required_info, async_client, pdf_hash = None, cache = None, extraction_mode = "fused", local_layout = None, cascade = False, cascade_stats = None, batcher = None):
+    start_time = time.time()
+    skills_experience = required_info["mandatory_skills"]
+    local_resume_text = get_local_resume_text(local_layout)
+    if extraction_mode not in EXTRACTION_MODES:
+        raise ValueError(f"Unknown extraction mode: {extraction_mode}")
+    if cascade_stats is not None:
+        cascade_stats["resumes"] += 1
+
+    rejected_at = None
+    stop_after_sections = None
+    if cascade:
+        # Stage 1: local checks on the raw text
+        with span("local_prefilter"):
+            can_pass, reasons = local_prefilter(initial_resume, required_info)
+        if not can_pass:
+            record_cascade_rejection(cascade_stats, "local_checks", count_extraction_calls(extraction_mode, skills_experience, local_resume_text is not None))
+            rejected_at = "local_checks"
+
+        # Stage 2: exact experience and education checks once the sections are known
+        def stop_after_sections(resume_text):
+            return not meets_section_checks(extract_local_info(resume_text, []), required_info)
+
+    if rejected_at == "local_checks":
+        resume_text, candidate_info = initial_resume, {}
+        skills_met = {skill: "does not meet" if "mandatory_skills" in reasons else "not checked" for skill in skills_experience}
+    elif extraction_mode == "fused":
+        # Still one call for contact info and skill verdicts, but it reads the text in the right order
+        fused_input = local_resume_text if local_resume_text is not None else initial_resume
+        resume_text, candidate_info, skills_met = await run_fused_extraction_async(fused_input, skills_experience, async_client, pdf_hash, cache, stop_after_sections, batcher)
+    else:
+        resume_text, candidate_info, skills_met = await run_three_call_extraction_async(initial_resume, skills_experience, async_client, pdf_hash, cache, local_resume_text, stop_after_sections, batcher)
+
+    if skills_met is None:  # Stopped by the section checks
+        rejected_at = "section_checks"
+        record_cascade_rejection(cascade_stats, "section_checks", (extraction_mode == "three_calls") + (skills_experience != {}))
+        candidate_info = {}
+        skills_met = {skill: "not checked" for skill in skills_experience}
+    if skills_experience == {}:
+        skills_met = "no_mandatory_skills"
+
+    with span("local_extract"):
+        extracted_info = extract_local_info(resume_text, required_info["skills"])
+    extracted_info["skills_met"] = skills_met
+    with span("evaluate"):
+        result = evaluate_candidate(extracted_info, required_info)
+
+    processing_time = time.time() - start_time
+    observe("screen_resume", processing_time, mode = extraction_mode, rejected_at = rejected_at)
+    return {
+        "info": candidate_info,
+        "extracted_info": extracted_info,
+        "result": result,
+        "processing_time": processing_time,
+        "used_local_layout": local_resume_text is not None,
+        "rejected_at": rejected_at,  # None, or the cascade stage that rejected the candidate
+    }
+
+#############################
+#-------- Shared event loop --------#
+#############################
+# The synchronous entry points (Streamlit reruns, batch and worker runs) all run on one event loop per
+# process, started in a daemon thread on first use, instead of a new loop per call. The LLM session on
+# that loop is kept too, so its open connections are reused from one call to the next, and closed at exit.
+_event_loop = None
+_event_loop_lock = threading.Lock()
+_shared_async_client = None
+
+# Function to return the shared event loop, starting it on first use
+def get_event_loop():
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target = _event_loop.run_forever, name = "resume-screening-loop", daemon = True).start()
+            atexit.register(close_event_loop)
+        return _event_loop
+
+# Function to close the shared LLM session and its connections at exit, on the loop that opened them
+# (atexit runs before daemon threads are stopped, so the loop is still running)
+def close_event_loop(timeout = 5):
+    async def close():
+        global _shared_async_client
+        if _shared_async_client is not None:
+            async_client, _shared_async_client = _shared_async_client, None
+            await async_client.aclose()
+            await async_client.backend.aclose()
+    try:
+        asyncio.run_coroutine_threadsafe(close(), _event_loop).result(timeout)
+    except Exception as e:
+        logger.warning("Could not close the shared LLM session: %s", e)
+    _event_loop.call_soon_threadsafe(_event_loop.stop)
+
+# Function to run a coroutine on the shared event loop and wait for its result
+# make_coroutine(on_result) builds the coroutine; its on_result calls are handed back to this thread,
+# so callbacks that touch the UI (Streamlit only allows that from the script thread) still work
+def run_on_event_loop(make_coroutine, on_result = None):
+    if on_result is None:
+        return asyncio.run_coroutine_threadsafe(make_coroutine(None), get_event_loop()).result()
+
+    results = queue.Queue()
+    future = asyncio.run_coroutine_threadsafe(make_coroutine(lambda *args: results.put(args)), get_event_loop())
+    future.add_done_callback(lambda _: results.put(None))
+    try:
+        while (args := results.get()) is not None:
+            on_result(*args)
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
+
+# Function to return an LLM session for the running event loop: the shared loop reuses one session for
+# the life of the process, any other loop (e.g. asyncio.run by a caller) gets a fresh one
+async def open_async_client():
+    global _shared_async_client
+    backend = get_llm_backend(my_key)
+    if asyncio.get_running_loop() is not _event_loop:
+        return backend.open_async()
+    if _shared_async_client is not None and _shared_async_client.backend is not backend:  # The backend was swapped
+        await _shared_async_client.aclose()
+        _shared_async_client = None
+    if _shared_async_client is None:
+        _shared_async_client = backend.open_async()
+    return _shared_async_client
+
+# Function to close a session from open_async_client, unless it is the shared one
+async def close_async_client(async_client):
+    if async_client is not _shared_async_client:
+        await async_client.aclose()
+
+# Function to screen many resumes concurrently with at most max_concurrency resumes in flight
+# With batch, the contact info and skill verdict requests of resumes in flight share Gemini requests
+async def screen_resumes_async(initial_resumes, required_info, max_concurrency = 5, on_result = None, pdf_hashes = None, cache = None, extraction_mode = "fused", local_layouts = None, cascade = False, cascade_stats = None, batch = False):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async_client = await open_async_client()
+    batcher = GeminiBatcher(async_client, max_concurrency) if batch else None
+    if pdf_hashes is None:
+        pdf_hashes = [None] * len(initial_resumes)
+    if local_layouts is None:
+        local_layouts = [None] * len(initial_resumes)
+
+    async def screen_one(index, initial_resume):
+        async with semaphore:
+            screened = await screen_resume_async(
+                initial_resume, required_info, async_client,
+                pdf_hashes[index], cache, extraction_mode, local_layouts[index], cascade, cascade_stats, batcher
+            )
+        if on_result is not None:
+            on_result(index, screened)
+        return screened
+
+    try:
+        # gather returns the results in the same order as the uploads
+        return await asyncio.gather(*(screen_one(i, text) for i, text in enumerate(initial_resumes)))
+    finally:
+        await close_async_client(async_client)
+
+# Async generator that screens PDFs chunk by chunk and yields each result as soon as it is ready
+# The next chunk is read by the PDF worker pool while the current one is with Gemini, so memory stays
+# bounded by chunk_size however many files there are. Errors are yielded, not raised, so one resume
+# (e.g. quota exhausted after all retries) does not lose the results of the others. Quota errors (a 429 after
+# every retry, an open circuit, too long a wait for a request slot) come with "retry_after", the seconds
+# to wait before trying again, None for any other error.
+# With dedup, copies of a resume seen earlier in the run (same file, same text or a near duplicate) are
+# not screened again: they get the result of the first one, with its index in "duplicate_of" (the results
+# of first resumes are kept until the end of the run for later copies)
+async def iter_screen_pdfs_async(pdf_files, required_info, max_concurrency = 5, cache = None, extraction_mode = "fused", chunk_size = 50, pdf_hashes = None, cascade = False, cascade_stats = None, batch = False, dedup = True):
+    event_loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async_client = await open_async_client()
+    batcher = GeminiBatcher(async_client, max_concurrency) if batch else None
+    duplicate_index = DuplicateIndex() if dedup else None
+    screen_tasks = {}  # index of the first resume of each group -> its screening task
+    tasks = []
+
+    def read_chunk(start):
+        chunk = pdf_files[start:start + chunk_size]
+        if pdf_hashes is not None:
+            chunk_hashes = pdf_hashes[start:start + chunk_size]
+        else:
+            chunk_hashes = [hash_pdf_bytes(pdf_file) for pdf_file in chunk]
+        if cache is not None:
+            return chunk_hashes, extract_pdf_layouts_cached(chunk, chunk_hashes, cache)
+        with span("pdf_parse_batch"):
+            return chunk_hashes, extract_layouts_from_pdfs(chunk)
+
+    async def screen_one(index, pdf_hash, layout):
+        async with semaphore:
+            try:
+                screened = await screen_resume_async(
+                    layout["text"], required_info, async_client,
+                    pdf_hash, cache, extraction_mode, layout, cascade, cascade_stats, batcher
+                )
+                return {"index": index, "pdf_hash": pdf_hash, "screened": screened, "error": None, "retry_after": None, "duplicate_of": None}
+            except Exception as e:
+                if isinstance(e, RetryError):  # Report the error of the last attempt (e.g. RESOURCE_EXHAUSTED)
+                    e = e.last_attempt.exception()
+                return {"index": index, "pdf_hash": pdf_hash, "screened": None, "error": f"{type(e).__name__}: {e}", "retry_after": get_retry_after(e), "duplicate_of": None}
+
+    # Shielded so a copy being cancelled does not cancel the screening of the first resume
+    async def reuse_result(index, pdf_hash, canonical_index, kind):
+        result = await asyncio.shield(screen_tasks[canonical_index])
+        return {**result, "index": index, "pdf_hash": pdf_hash, "duplicate_of": canonical_index, "duplicate_kind": kind}
+
+    try:
+        next_chunk = event_loop.run_in_executor(None, read_chunk, 0)
+        for start in range(0, len(pdf_files), chunk_size):
+            chunk_hashes, layouts = await next_chunk
+            if start + chunk_size < len(pdf_files):
+                next_chunk = event_loop.run_in_executor(None, read_chunk, start + chunk_size)
+
+            tasks = []
+            for offset, (pdf_hash, layout) in enumerate(zip(chunk_hashes, layouts)):
+                index = start + offset
+                if layout is None:
+                    yield {"index": index, "pdf_hash": pdf_hash, "screened": None, "error": "Could not extract text from PDF", "retry_after": None, "duplicate_of": None}
+                    continue
+                if duplicate_index is not None:
+                    with span("dedup"):
+                        canonical_index, kind, _ = duplicate_index.add(index, pdf_hash, layout["text"])
+                    if canonical_index != index:
+                        increment("duplicates", kind = kind)
+                        tasks.append(asyncio.ensure_future(reuse_result(index, pdf_hash, canonical_index, kind)))
+                        continue
+                screen_tasks[index] = asyncio.ensure_future(screen_one(index, pdf_hash, layout))
+                tasks.append(screen_tasks[index])
+
+            for task in asyncio.as_completed(tasks):
+                yield await task
+    finally:
+        # The caller may stop early (e.g. quota exhausted), cancel whatever is still running
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions = True)
+        await close_async_client(async_client)
+
+# Function to consume iter_screen_pdfs_async from synchronous code as a plain generator
+def iter_screen_pdfs(pdf_files, required_info, **options):
+    results = iter_screen_pdfs_async(pdf_files, required_info, **options)
+    done = object()
+
+    async def next_result():
+        try:
+            return await results.__anext__()
+        except StopAsyncIteration:
+            return done
+
+    async def close_results():
+        await results.aclose()
+
+    try:
+        while (item := run_on_event_loop(lambda _: next_result())) is not done:
+            yield item
+    finally:
+        run_on_event_loop(lambda _: close_results())
+
+# Function to run the async screening engine from synchronous code (e.g. Streamlit)
+def screen_resumes(initial_resumes, required_info, max_concurrency = 5, on_result = None, pdf_hashes = None, cache = None, extraction_mode = "fused", local_layouts = None, cascade = False, cascade_stats = None, batch = False):
+    return run_on_event_loop(
+        lambda on_result: screen_resumes_async(initial_resumes, required_info, max_concurrency, on_result, pdf_hashes, cache, extraction_mode, local_layouts, cascade, cascade_stats, batch),
+        on_result
+    )
+
+
+#############################
+#-------- Candidate profiles (extraction without scoring) --------#
+#############################
+# A profile holds everything extracted from a resume that does not depend on the requirements, so changing
+# the years, education or skills only re-scores profiles. Mandatory skill verdicts depend on the required
+# years, they are kept per profile and only the ones never asked before go back to Gemini.
+
+# Function to extract the requirement-independent profile of one resume
+# The verdicts for the current mandatory skills come from the same calls (one call in fused mode) and seed the profile
+async def extract_profile_async(initial_resume, async_client, pdf_hash = None, cache = None, extraction_mode = "fused", local_layout = None, skills_experience = None, batcher = None):
+    start_time = time.time()
+    skills_experience = skills_experience or {}
+    local_resume_text = get_local_resume_text(local_layout)
+
+    if extraction_mode == "fused":
+        fused_input = local_resume_text if local_resume_text is not None else initial_resume
+        resume_text, candidate_info, skills_met = await run_fused_extraction_async(fused_input, skills_experience, async_client, pdf_hash, cache, batcher = batcher)
+    elif extraction_mode == "three_calls":
+        resume_text, candidate_info, skills_met = await run_three_call_extraction_async(initial_resume, skills_experience, async_client, pdf_hash, cache, local_resume_text, batcher = batcher)
+    else:
+        raise ValueError(f"Unknown extraction mode: {extraction_mode}")
+
+    with span("local_extract"):
+        scan = scan_resume(resume_text)
+    profile = {
+        "info": candidate_info,
+        "resume_text": resume_text,
+        "skills_span": scan["sections"].get("Skills"),
+        "experience": calculate_experience(scan["years"].get("Work Experience", [])),
+        "education": scan["highest_education"],
+        "skill_verdicts": {},  # {skill (lower case): {required years: "meets" / "does not meet"}}
+        "processing_time": time.time() - start_time,
+        "used_local_layout": local_resume_text is not None,
+    }
+    if skills_met != "no_mandatory_skills":
+        store_skill_verdicts(profile, skills_experience, skills_met)
+    observe("extract_profile", profile["processing_time"], mode = extraction_mode)
+    return profile
+
+# Function to extract the profiles of many resumes concurrently, results come back in upload order
+async def extract_profiles_async(initial_resumes, max_concurrency = 5, on_result = None, pdf_hashes = None, cache = None, extraction_mode = "fused", local_layouts = None, skills_experience = None, batch = False):
+    semaphore = asyncio.Semaphore(max_concurrency)
+    async_client = await open_async_client()
+    batcher = GeminiBatcher(async_client, max_concurrency) if batch else None
+    if pdf_hashes is None:
+        pdf_hashes = [None] * len(initial_resumes)
+    if local_layouts is None:
+        local_layouts = [None] * len(initial_resumes)
+
+    async def extract_one(index, initial_resume):
+        async with semaphore:
+            profile = await extract_profile_async(
+                initial_resume, async_client,
+                pdf_hashes[index], cache, extraction_mode, local_layouts[index], skills_experience, batcher
+            )
+        if on_result is not None:
+            on_result(index, profile)
+        return profile
+
+    try:
+        return await asyncio.gather(*(extract_one(i, text) for i, text in enumerate(initial_resumes)))
+    finally:
+        await close_async_client(async_client)
+
+# Function to look up a mandatory skill verdict, or None if Gemini has to be asked
+def lookup_skill_verdict(profile, skill, years):
+    known = profile["skill_verdicts"].get(skill.lower(), {})
+    if years in known:
+        return known[years]
+    # Meeting more years implies meeting fewer, and failing fewer years implies failing more
+    if any(known_years >= years and status == "meets" for known_years, status in known.items()):
+        return "meets"
+    if any(known_years <= years and status == "does not meet" for known_years, status in known.items()):
+        return "does not meet"
+    return None
+
+# Function to keep the verdicts Gemini returned for the asked skills
+def store_skill_verdicts(profile, skills_experience, skill_status):
+    statuses = {str(skill).lower(): status for skill, status in skill_status.items()}
+    for skill, years in skills_experience.items():
+        status = statuses.get(skill.lower())
+        if status in ("meets", "does not meet"):  # Unparsable verdicts are not stored, so they are asked again
+            profile["skill_verdicts"].setdefault(skill.lower(), {})[years] = status
+
+# Function to ask Gemini only for the mandatory skills of a profile without a known verdict
+# Returns True if a call was made
+async def update_skill_verdicts_async(profile, skills_experience, async_client, batcher = None):
+    missing = {skill: years for skill, years in skills_experience.items() if lookup_skill_verdict(profile, skill, years) is None}
+    if not missing:
+        return False
+
+    skill_status = await request_skill_verdicts_async(profile["resume_text"], missing, async_client, batcher)
+    store_skill_verdicts(profile, missing, skill_status)
+    return True
+
+# Function to fill in the missing mandatory skill verdicts of many profiles, returns the number of profiles asked about
+# With batch, profiles missing the same verdicts share Gemini requests (the batcher limits the requests in flight)
+async def update_skill_verdicts_many_async(profiles, skills_experience, max_concurrency = 5, batch = False):
+    pending = [profile for profile in profiles
+               if any(lookup_skill_verdict(profile, skill, years) is None for skill, years in skills_experience.items())]
+    if not pending:  # Re-ranking with known verdicts needs no client at all
+        return 0
+    semaphore = asyncio.Semaphore(len(pending) if batch else max_concurrency)
+    async_client = await open_async_client()
+    batcher = GeminiBatcher(async_client, max_concurrency) if batch else None
+
+    async def update_one(profile):
+        async with semaphore:
+            return await update_skill_verdicts_async(profile, skills_experience, async_client, batcher)
+
+    try:
+        calls = await asyncio.gather(*(update_one(profile) for profile in pending))
+    finally:
+        await close_async_client(async_client)
+    return sum(calls)
+
+# Function to build the extracted_info that evaluate_candidate expects from a profile, without any Gemini call
+def get_profile_extracted_info(profile, required_info):
+    skills_experience = required_info["mandatory_skills"]
+    if skills_experience == {}:
+        skills_met = "no_mandatory_skills"
+    else:  # A verdict that is still unknown (e.g. the call failed) does not meet
+        skills_met = {skill: lookup_skill_verdict(profile, skill, years) or "does not meet" for skill, years in skills_experience.items()}
+
+    skills_span = profile["skills_span"]
+    skills_section = ("Skills", *skills_span) if skills_span else None
+    extracted_info = {
+        "experience": profile["experience"],
+        "education": profile["education"],
+        "skills": extract_skills(skills_section, profile["resume_text"], required_info["skills"]),
+        "skills_met": skills_met,
+    }
+    return extracted_info
+
+# Function to score a profile against the requirements without any Gemini call
+def score_profile(profile, required_info):
+    extracted_info = get_profile_extracted_info(profile, required_info)
+    return extracted_info, evaluate_candidate(extracted_info, required_info)
+
+# Functions to run the profile stages from synchronous code (e.g. Streamlit)
+def extract_profiles(initial_resumes, max_concurrency = 5, on_result = None, pdf_hashes = None, cache = None, extraction_mode = "fused", local_layouts = None, skills_experience = None, batch = False):
+    return run_on_event_loop(
+        lambda on_result: extract_profiles_async(initial_resumes, max_concurrency, on_result, pdf_hashes, cache, extraction_mode, local_layouts, skills_experience, batch),
+        on_result
+    )
+
+def update_skill_verdicts(profiles, skills_experience, max_concurrency = 5, batch = False):
+    return run_on_event_loop(lambda _: update_skill_verdicts_many_async(profiles, skills_experience, max_concurrency, batch))
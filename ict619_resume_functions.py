@@ -1,83 +1,280 @@
 import datetime
-import pdfplumber # parse pdf
 import re # regex
-from google import  genai
 import os
 from dotenv import load_dotenv
-import asyncio
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import time
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+import json
+import ast
+import functools
+import logging
+import random
 
+load_dotenv()  # Before the modules below, which read their settings from the environment
+from ict619_resume_pdf import iter_layouts_from_pdfs
+from ict619_resume_ratelimit import GeminiRateLimiter, CircuitOpenError, RateLimitTimeoutError, DEFAULT_REQUESTS_PER_MINUTE, is_rate_limit_error, parse_retry_delay
+from ict619_resume_metrics import span, increment
+from ict619_resume_llm import get_llm_backend, load_genai, DEFAULT_BACKEND, DEFAULT_MODEL
 
-load_dotenv()
+
+logger = logging.getLogger(__name__)
 
 
 #############################
 #-------- Gemini API key initialisation --------#
 #############################
 my_key = os.getenv("GEMINI_API_KEY")  # Get API key from env variable
-# Check if API key is loaded correctly
-if not my_key:
+# Check if API key is loaded correctly (the client itself is created by the LLM backend on first use)
+if not my_key and DEFAULT_BACKEND == "gemini":
     print("API Key is missing or not loaded correctly.")
-else:
-    try:
-        # Initialize the client asynchronously
-        async def init_client():
-            client = genai.Client(api_key=my_key)
-            return client
-        
-        # Run the initialization asynchronously
-        loop = asyncio.new_event_loop()  # Create a new event loop
-        asyncio.set_event_loop(loop)  # Set this loop as the current event loop
-        
-        # Now call the init_client function within the event loop
-        client = loop.run_until_complete(init_client())  # Initialize the client
-        print("Client initialized successfully!")
-    except Exception as e:
-        print(f"Error initializing client: {e}")
+
+
+#############################
+#-------- Model and prompt versions --------#
+#############################
+GEMINI_MODEL = DEFAULT_MODEL  # Per-task models: GEMINI_MODEL_<TASK> (see ict619_resume_llm.py)
+# Bump a version whenever its prompt template changes so cached results are not reused
+SECTIONS_PROMPT_VERSION = 1
+INFO_PROMPT_VERSION = 2
+FUSED_PROMPT_VERSION = 1
+PDF_LAYOUT_VERSION = 1  # pdfplumber text and local column-aware layout
+LAYOUT_CONFIDENCE_THRESHOLD = 0.8  # Below this the restructuring call to Gemini is still made
 
 
 #############################
 #-------- Gemini retry handling --------#
 #############################
+# Function to return the rate limiter shared by every Gemini call (and every process using the same file),
+# or None if GEMINI_REQUESTS_PER_MINUTE is 0
+@functools.lru_cache(maxsize = 1)
+def get_rate_limiter():
+    if DEFAULT_REQUESTS_PER_MINUTE <= 0:
+        return None
+    return GeminiRateLimiter()
+
+# Only quota errors are retried, other client errors would fail the same way again
+def is_retryable_gemini_error(error):
+    return isinstance(error, load_genai().errors.ClientError) and is_rate_limit_error(error)
+
+# Function to return the metric label of a task ("info:name+email" is counted as "info")
+def metric_task(task):
+    return (task or "").split(":")[0] or None
+
+exponential_wait = wait_exponential(multiplier = 1, min = 2, max = 10)  # Exponential "retry time" (2s, 4s, 8s...)
+
+# The rate limiter already holds every caller back until Gemini's retry delay has passed,
+# so retries only add a little jitter to keep them from firing together
+def wait_before_retry(retry_state):
+    increment("llm_retries")
+    if get_rate_limiter() is not None:
+        return random.uniform(0, 1)
+    return exponential_wait(retry_state)
+
 @retry(
     stop = stop_after_attempt(10),  # Retry up to 10 times
-    wait = wait_exponential(multiplier = 1, min = 2, max = 10),  # Exponential "retry time" (2s, 4s, 8s...)
-    retry = retry_if_exception_type(genai.errors.ClientError),
+    wait = wait_before_retry,
+    retry = retry_if_exception(is_retryable_gemini_error),
 )
 # To retry if exceeded usage quota
-def generate_gemini_response(prompt):
+# task ("sections", "info", "skills" or "fused") picks the model
+def generate_gemini_response(prompt, config = None, task = None):
+    backend = get_llm_backend(my_key)
+    rate_limiter = get_rate_limiter() if backend.rate_limited else None
+    if rate_limiter is not None:
+        try:
+            with span("rate_limit_wait"):
+                rate_limiter.acquire()  # Raises CircuitOpenError instead of queueing when Gemini keeps refusing
+        except CircuitOpenError:
+            increment("circuit_open_errors")
+            raise
+        except RateLimitTimeoutError:
+            increment("rate_limit_timeouts")
+            raise
     try:
-        response = client.models.generate_content(
-            model = 'gemini-2.0-flash',
-            contents = prompt
-        )
-        return response.text
-    except genai.errors.ClientError as e:
+        with span("llm_call", task = metric_task(task)):
+            response_text = backend.generate(prompt, task, config)
+    except load_genai().errors.ClientError as e:
         error_message = str(e)
         if "RESOURCE_EXHAUSTED" in error_message:
+            increment("quota_errors", task = metric_task(task))
+            if rate_limiter is not None:
+                rate_limiter.record_rate_limited(parse_retry_delay(e))
             print("⚠️ API quota exceeded. Retrying...")
             raise e  # Explicitly re-raise the exception so that retry works
         else:
+            increment("llm_errors", task = metric_task(task))
             print(f"⚠️ An unexpected client error occurred: {error_message}")
             raise e  # Don't retry if it's another error
+    record_llm_sizes(task, prompt, response_text)
+    if rate_limiter is not None:
+        rate_limiter.record_success()
+    return response_text
+
+# Function to count the characters sent to and received from Gemini by one call
+def record_llm_sizes(task, prompt, response_text):
+    increment("prompt_chars", len(prompt), task = metric_task(task))
+    increment("response_chars", len(response_text or ""), task = metric_task(task))
 
 
 this_year = int(datetime.date.today().year)
 
 
+#############################
+#-------- Prompt token budgets --------#
+#############################
+# Most resume text sent to Gemini per task, in estimated tokens (override with e.g. PROMPT_TOKEN_BUDGET_SKILLS=2000)
+PROMPT_TOKEN_BUDGETS = {
+    task: int(os.getenv(f"PROMPT_TOKEN_BUDGET_{task.upper()}", default))
+    for task, default in {"sections": 6000, "info": 500, "skills": 3000, "fused": 6000}.items()
+}
+# Sections each task needs. Contact info comes from the header (the text before the first section heading)
+PROMPT_SECTIONS = {
+    "sections": ["Education", "Work Experience", "Skills"],
+    "skills": ["Work Experience", "Skills"],
+    "fused": ["Education", "Work Experience", "Skills"],
+}
+# Local stand-in for Gemini's tokenizer (counting with the API would cost a request per prompt):
+# short words are one token, longer words are split every 6 letters and digits count one each,
+# so the estimate errs on the high side for English text
+TOKEN_ESTIMATE_PATTERN = re.compile(r"[^\W\d_]{1,6}|\d|[^\w\s]")
+
+# Prompt sizes per task since the app started, like ExtractionCache.hits / misses
+prompt_size_stats = {}
+
+# Function to estimate the number of tokens in a text
+def count_tokens(text):
+    return sum(1 for _ in TOKEN_ESTIMATE_PATTERN.finditer(text))
+
+# Function to cut a text to at most max_tokens estimated tokens, at a line break when one is close
+def trim_to_tokens(text, max_tokens):
+    if max_tokens <= 0:
+        return ""
+    end = None
+    for count, match in enumerate(TOKEN_ESTIMATE_PATTERN.finditer(text), start = 1):
+        if count == max_tokens:
+            end = match.end()
+            break
+    if end is None or not text[end:].strip():
+        return text
+
+    line_end = text.rfind("\n", 0, end)
+    return text[:line_end if line_end > end // 2 else end]
+
+# Function to share a token budget between text parts: the smaller parts are kept whole and what is left
+# is split evenly between the larger ones. Returns the trimmed parts in their original order
+def fit_parts_to_budget(parts, budget):
+    token_counts = [count_tokens(part) for part in parts]
+    fitted = list(parts)
+    remaining = budget
+    by_size = sorted(range(len(parts)), key = lambda i: token_counts[i])
+    for position, i in enumerate(by_size):
+        share = remaining // (len(parts) - position)
+        if token_counts[i] > share:
+            fitted[i] = trim_to_tokens(parts[i], share)
+        remaining -= min(token_counts[i], share)
+    return fitted
+
+# Function to return the header of a resume (where the name and contact details are), within the budget
+def select_header(resume_text, budget):
+    section_ranges = scan_resume(resume_text)["section_ranges"]
+    header = resume_text[:section_ranges[0][1]] if section_ranges else ""
+    if not header.strip():  # No heading found, or the resume starts with one: use the top of the text
+        header = resume_text
+    return trim_to_tokens(header, budget)
+
+# Function to return only the parts of a resume a task needs, within the budget
+# The header is kept with the sections (always_select = False) when the whole text does not fit,
+# a text without any of the sections is only trimmed
+def select_resume_context(resume_text, sections, budget, always_select = True):
+    if not always_select and count_tokens(resume_text) <= budget:
+        return resume_text
+
+    section_ranges = scan_resume(resume_text)["section_ranges"]
+    spans = [(start, end) for section, start, end in section_ranges if section in sections]
+    if not spans:
+        return trim_to_tokens(resume_text, budget)
+    if not always_select and section_ranges[0][1] > 0:
+        spans.insert(0, (0, section_ranges[0][1]))
+
+    return "\n".join(part.strip("\n") for part in fit_parts_to_budget([resume_text[start:end] for start, end in spans], budget))
+
+# Function to return the resume text to embed in the prompt of a task
+def build_prompt_context(task, resume_text):
+    if task == "info":
+        return select_header(resume_text, PROMPT_TOKEN_BUDGETS["info"])
+    return select_resume_context(resume_text, PROMPT_SECTIONS[task], PROMPT_TOKEN_BUDGETS[task], always_select = task == "skills")
+
+# Function to record the size of one prompt, and how many resume tokens the budget kept out of it
+def log_prompt_size(task, prompt, resume_text, context, seconds):
+    prompt_tokens = count_tokens(prompt)
+    saved_tokens = count_tokens(resume_text) - count_tokens(context) if context is not resume_text else 0
+    stats = prompt_size_stats.setdefault(task, {"calls": 0, "prompt_tokens": 0, "saved_tokens": 0, "seconds": 0.0})
+    stats["calls"] += 1
+    stats["prompt_tokens"] += prompt_tokens
+    stats["saved_tokens"] += saved_tokens
+    stats["seconds"] += seconds
+    increment("prompt_tokens", prompt_tokens, task = task)
+    increment("budget_saved_tokens", saved_tokens, task = task)
+    logger.info("prompt task=%s tokens=%d saved=%d seconds=%.2f", task, prompt_tokens, saved_tokens, seconds)
+
+# Function to return a copy of the prompt size totals, e.g. to report the difference after a batch
+def get_prompt_size_stats():
+    return {task: dict(stats) for task, stats in prompt_size_stats.items()}
+
+# Function to summarise the prompts sent between two get_prompt_size_stats() snapshots
+def summarize_prompt_sizes(before, after):
+    calls = sum(stats["calls"] - before.get(task, {}).get("calls", 0) for task, stats in after.items())
+    prompt_tokens = sum(stats["prompt_tokens"] - before.get(task, {}).get("prompt_tokens", 0) for task, stats in after.items())
+    saved_tokens = sum(stats["saved_tokens"] - before.get(task, {}).get("saved_tokens", 0) for task, stats in after.items())
+    return f"Prompts: {calls} call(s), ~{prompt_tokens} tokens sent, ~{saved_tokens} resume tokens left out by the token budgets"
+
+
 #############################
 #-------- Functions --------#
 #############################
 # Function to extract text from PDF
 def extract_text_from_pdf(pdf_path):
-    text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
-
-def extract_resume_sections(initial_resume):   
+    import pdfplumber  # parse pdf, imported on first use as it is slow to import
+    with span("pdf_parse"), pdfplumber.open(pdf_path) as pdf:
+        # Pages without a text layer return None, and one join keeps this linear in the number of pages
+        return "".join((page.extract_text() or "") + "\n" for page in pdf.pages)
+
+# Function to extract text and local layout from many PDFs in the process pool, skipping PDFs already in the cache
+# Returns the layouts in input order, with None for PDFs that could not be read
+def extract_pdf_layouts_cached(pdf_files, pdf_hashes, cache, **pool_options):
+    keys = [cache.make_key(pdf_hash, "pdf_layout", PDF_LAYOUT_VERSION, "pdfplumber") for pdf_hash in pdf_hashes]
+    layouts = [cache.get(key) for key in keys]
+    missing = [i for i, layout in enumerate(layouts) if layout is None]
+    increment("cache_hits", len(layouts) - len(missing), task = "pdf_layout")
+    increment("cache_misses", len(missing), task = "pdf_layout")
+    if not missing:
+        return layouts
+
+    with span("pdf_parse_batch"):  # Parsed in parallel, so this is the wall time of the whole batch
+        for j, layout, error in iter_layouts_from_pdfs([pdf_files[i] for i in missing], **pool_options):
+            i = missing[j]
+            if error is not None:
+                print(f"⚠️ Could not extract text from PDF #{i + 1}: {error}")
+                continue
+            layouts[i] = layout
+            cache.set(keys[i], layout)
+
+    return layouts
+
+# Function to return the locally rebuilt resume text if it can replace the restructuring call, else None
+def get_local_resume_text(layout):
+    if layout is None or layout["layout_confidence"] < LAYOUT_CONFIDENCE_THRESHOLD:
+        return None
+
+    # Rule-based extraction needs at least the education and work experience headings
+    resume_text = clean_sections_response(layout["layout_text"])
+    found_sections = set(scan_resume(resume_text)["sections"])
+    if not {"Education", "Work Experience"} <= found_sections:
+        return None
+
+    return resume_text
+
+# Function to build the prompt that restructures the raw pdfplumber text
+def build_sections_prompt(initial_resume):
     prompt = f"""
     The following text is extracted from a resume and may be disorganized due to multi-column formatting. 
     Please identify and structure the key sections properly:
@@ -94,34 +291,29 @@ def extract_resume_sections(initial_resume):
 
     Return the sections in an easy-to-read format.
     """
-    try:
-        # response = client.models.generate_content(
-        #     model = 'gemini-2.0-flash',
-        #     contents = prompt
-        # )
+    return prompt
 
-        # # Ensure response is a string
-        # if isinstance(response, str):
-        #     response_text = response
-        # elif hasattr(response, 'text'):
-        #     response_text = response.text
-        # else:
-        #     response_text = str(response)
+# Function to clean the restructured resume returned by Gemini
+def clean_sections_response(response_text):
+    # Clean bullet points if necessary
+    cleaned_text = re.sub(r"[-•]\s*", "", response_text)
+    return cleaned_text
 
-        response_text = generate_gemini_response(prompt)
-
-        # Clean bullet points if necessary
-        cleaned_text = re.sub(r"[-•]\s*", "", response_text)
+def extract_resume_sections(initial_resume):   
+    prompt = build_sections_prompt(build_prompt_context("sections", initial_resume))
+    try:
+        response_text = generate_gemini_response(prompt, task = "sections")
 
-        return cleaned_text
+        return clean_sections_response(response_text)
     
     except Exception as e:
         return f"Error processing resume: {str(e)}"
 
 
-# Function to extract candidate name, email and phone
-def extract_info(resume_text):
-    prompt = f'''
+# Function to build the prompt that extracts candidate name, email and phone (or only the given fields)
+def build_info_prompt(resume_text, fields = None):
+    if fields is None or list(fields) == CONTACT_FIELDS:
+        prompt = f'''
         This is the candidate's resume:
         {resume_text}
         Extract the candidate's name, email address and phone number.
@@ -136,9 +328,28 @@ def extract_info(resume_text):
         }}
         Now, return the dictionary:
     '''
+        return prompt
 
-    response = generate_gemini_response(prompt)
-    
+    field_names = {"name": "name", "email": "email address", "phone": "phone number"}
+    example = {"name": '"Linus Chia"', "email": "None", "phone": '"6599990000"'}
+    example_str = ",\n            ".join(f'"{field}": {example[field]}' for field in fields)
+    prompt = f'''
+        This is the candidate's resume:
+        {resume_text}
+        Extract only the candidate's {" and ".join(field_names[field] for field in fields)}.
+        Return the result **ONLY** as a valid Python dictionary. Do not include explanations, additional text, or markdown formatting.
+        {"Phone numbers usually start with 65" if "phone" in fields else ""}
+        If the detail is not found, return None
+        Example output:
+        {{
+            {example_str}
+        }}
+        Now, return the dictionary:
+    '''
+    return prompt
+
+# Function to parse the dictionary returned by Gemini
+def parse_dict_response(response):
     # Extract dictionary-like content using regex
     match = re.search(r"\{.*\}", response, re.DOTALL) # Extract the part between { and }
     if match:
@@ -148,16 +359,131 @@ def extract_info(resume_text):
     
     # Try to parse the cleaned response as a dictionary
     try:
-        candidate_info = eval(clean_response)  # Convert string to dictionary
+        parsed = ast.literal_eval(clean_response)  # Convert string to dictionary without running code
     except Exception as e:
         print(f"Error parsing response: {e}")
-        candidate_info = {}
+        parsed = {}
 
+    return parsed
+
+# Function to extract candidate name, email and phone
+def extract_info(resume_text):
+    prompt = build_info_prompt(build_prompt_context("info", resume_text))
+
+    response = generate_gemini_response(prompt, task = "info")
+    candidate_info = parse_dict_response(response)
 
     return candidate_info
 
 
+#############################
+#-------- Local contact extraction --------#
+#############################
+CONTACT_FIELDS = ["name", "email", "phone"]
+CONTACT_CONFIDENCE_THRESHOLD = 0.7  # Fields below this are asked from Gemini
+CONTACT_HEADER_LINES = 8  # The name is looked for in the first lines of the resume
+
+EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}\b")
+# Singapore numbers: 8 digits starting with 3, 6, 8 or 9, optionally after +65 / (65) / 65
+SG_PHONE_PATTERN = re.compile(r"(?<![\d+])(?:(?P<prefix>\+65|\(65\)|65)[ .-]?)?(?P<number>[3689]\d{3}[ .-]?\d{4})(?!\d)")
+# International numbers written with a + country code, e.g. +60 12-345 6789 or +44 (0)20 7946 0958
+INTL_PHONE_PATTERN = re.compile(r"(?<![\w+])\+(?P<number>[1-9]\d{0,2}(?:[ .-]?\(?\d{1,4}\)?){2,5})(?!\d)")
+PHONE_LABEL_PATTERN = re.compile(r"\b(?:phone|mobile|mob|tel|telephone|contact|hp|cell|whatsapp)\b", re.IGNORECASE)
+NAME_TOKEN_PATTERN = re.compile(r"^[A-Z][A-Za-z'’.-]*$|^[A-Z]{2,}$")
+NAME_STOP_WORDS = {
+    "resume", "curriculum", "vitae", "cv", "profile", "summary", "objective", "education", "experience",
+    "skills", "contact", "email", "phone", "mobile", "address", "singapore", "linkedin", "github", "page",
+}
+# Job title words: a first line such as "Software Engineer" is the candidate's title, not the name
+NAME_TITLE_WORDS = {
+    "engineer", "scientist", "analyst", "developer", "manager", "consultant", "designer", "architect",
+    "specialist", "administrator", "officer", "executive", "director", "assistant", "intern", "accountant",
+    "programmer", "technician", "coordinator", "associate", "lead", "senior", "junior", "software", "data",
+}
+
+# Function to turn a phone match into digits with the country code, as in the Gemini prompt ("6599990000")
+def normalize_phone(match, international = False):
+    digits = re.sub(r"\D", "", match.group("number"))
+    if international:
+        return digits
+    return "65" + digits
+
+# Function to find the email address, with confidence 1.0 if there is one distinct address
+def find_email(resume_text):
+    emails = list(dict.fromkeys(email.lower() for email in EMAIL_PATTERN.findall(resume_text)))
+    if not emails:
+        return None, 0.0
+    return emails[0], 1.0 if len(emails) == 1 else 0.8  # Several addresses: the first one is usually the candidate's
+
+# Function to find the phone number, more confident when it has a country code or a label such as "Mobile:"
+def find_phone(resume_text):
+    candidates = []
+    for match in SG_PHONE_PATTERN.finditer(resume_text):
+        labelled = PHONE_LABEL_PATTERN.search(resume_text[max(0, match.start() - 20):match.start()])
+        # Without a +65 prefix or a label any 8 digits match (e.g. a salary "9000 8000"), so Gemini checks it
+        confidence = 0.95 if match.group("prefix") or labelled else 0.6
+        candidates.append((match.start(), normalize_phone(match), confidence))
+    for match in INTL_PHONE_PATTERN.finditer(resume_text):
+        digits = normalize_phone(match, international = True)
+        if 8 <= len(digits) <= 15 and not digits.startswith("65"):
+            candidates.append((match.start(), digits, 0.9))
+    if not candidates:
+        return None, 0.0
+
+    candidates.sort()
+    numbers = {number for _, number, _ in candidates}
+    _, number, confidence = max(candidates, key = lambda candidate: candidate[2])  # The first of the most confident
+    return number, confidence if len(numbers) == 1 else confidence - 0.1
+
+# Function to guess the name from the first lines: 2 to 4 capitalised words and no contact details or headings
+def find_name(resume_text, email = None):
+    lines = [line.strip() for line in resume_text.splitlines() if line.strip()][:CONTACT_HEADER_LINES]
+    for position, line in enumerate(lines):
+        # Contact details are often on the same line as the name ("Linus Chia | linus@mail.com")
+        line = re.split(r"\s[|•·]\s|\t", line)[0].strip()
+        words = line.split()
+        if not 2 <= len(words) <= 4 or EMAIL_PATTERN.search(line) or any(char.isdigit() for char in line):
+            continue
+        if any(word.lower().strip(".,:") in NAME_STOP_WORDS or word.lower().strip(".,:") in NAME_TITLE_WORDS for word in words):
+            continue
+        if not all(NAME_TOKEN_PATTERN.match(word) for word in words):
+            continue
+
+        name = " ".join(word.capitalize() if word.isupper() else word for word in words)
+        confidence = 0.8 if position == 0 else 0.6
+        # The name usually shows up in the email address (linus.chia@..., lchia@...)
+        if email and any(len(word) > 2 and word.lower().strip(".") in email.split("@")[0] for word in words):
+            confidence = 0.95
+        return name, confidence
+    return None, 0.0
+
+# Function to extract name, email and phone with regexes and header heuristics
+# Returns (candidate_info, confidence) with a 0-1 confidence per field
+def extract_contact_locally(resume_text):
+    email, email_confidence = find_email(resume_text)
+    phone, phone_confidence = find_phone(resume_text)
+    name, name_confidence = find_name(resume_text, email)
+    candidate_info = {"name": name, "email": email, "phone": phone}
+    confidence = {"name": name_confidence, "email": email_confidence, "phone": phone_confidence}
+    return candidate_info, confidence
+
+
+# Keywords for each section heading, compiled once
+SECTION_KEYWORD_PATTERNS = {
+    section: re.compile(pattern, re.IGNORECASE) for section, pattern in {
+        "Summary": r"(?m)^\s*(\w+\s+)?(summary|objective|profile)\s*$",
+        "Work Experience": r"(?m)^\s*(work|job|professional)\s+experience(s)?\s*$",
+        "Education": r"(?m)^\s*(education|academic|educational)\s*(and|&)?\s*(\w+\s+)?(background|history|qualifications|degree)?\s*$",
+        "Skills": r"(?m)^\s*(\w+\s+)?skill(s)?(\s*\w+)?(\s*(and|&)\s*competencies)?\s*$",
+        "Projects": r"(?m)^\s*(projects?)\s*$",
+        "Certifications": r"(?m)^\s*(\w+\s+)?(certificates?|certifications?)\s*$"
+        #(?m)^\s*(\w+\s+)?skill(s)?(\s*\w+)?(\s*(and|&)\s*competencies)?\s*$
+    }.items()
+}
+
 # Function to determine the start index of key sections
+# Kept as the baseline of the scanner benchmark: these patterns backtrack on long runs of spaces,
+# the app uses scan_resume instead
 def get_section_indices(text):
     sections = {
         "Summary": None,
@@ -168,20 +494,9 @@ def get_section_indices(text):
         "Certifications": None
     }
     
-    # Define the keywords for each section with
-    section_keywords = {
-        "Summary": r"(?m)^\s*(\w+\s+)?(summary|objective|profile)\s*$",
-        "Work Experience": r"(?m)^\s*(work|job|professional)\s+experience(s)?\s*$",
-        "Education": r"(?m)^\s*(education|academic|educational)\s*(and|&)?\s*(\w+\s+)?(background|history|qualifications|degree)?\s*$",
-        "Skills": r"(?m)^\s*(\w+\s+)?skill(s)?(\s*\w+)?(\s*(and|&)\s*competencies)?\s*$",
-        "Projects": r"(?m)^\s*(projects?)\s*$",
-        "Certifications": r"(?m)^\s*(\w+\s+)?(certificates?|certifications?)\s*$"
-        #(?m)^\s*(\w+\s+)?skill(s)?(\s*\w+)?(\s*(and|&)\s*competencies)?\s*$
-    }
-    
     # Loop through each section and search for the keyword
-    for section, pattern in section_keywords.items():
-        match = re.search(pattern, text, re.IGNORECASE)
+    for section, pattern in SECTION_KEYWORD_PATTERNS.items():
+        match = pattern.search(text)
         if match:
             sections[section] = match.start()  # Get the start index of the match
     
@@ -200,6 +515,17 @@ def get_section_indices(text):
 
     return section_ranges
 
+# Date range pattern, compiled once (verbose mode for clarity)
+YEAR_RANGE_PATTERN = re.compile(r'''
+    (\b(?:JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER|
+    JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)?\s*(\d{4})\b)  # (1) Optional Month + (2) Year
+    (?:\s*[-–—]?\s*|\s*to\s*)  # Tweaked Separator: Allows optional spaces before/after dash, or "to"
+    (\b(?:JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER|
+    JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)?\s*(\d{4})\b  # (3) Optional Month + (4) Year
+    |\b(PRESENT|CURRENT)\b)  # (5) "PRESENT" or "CURRENT"
+''', re.IGNORECASE | re.VERBOSE)
+STANDALONE_YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")  # Corrected to capture the full year
+
 # Function to extract year based on sections
 def extract_year(section, resume_text):
     if section is None:
@@ -212,17 +538,7 @@ def extract_year(section, resume_text):
     section_text = resume_text[start_index:end_index]
     
     # Find all the years in the text, preserving the order
-    pattern = r'''
-        (\b(?:JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER|
-        JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)?\s*(\d{4})\b)  # (1) Optional Month + (2) Year
-        (?:\s*[-–—]?\s*|\s*to\s*)  # Tweaked Separator: Allows optional spaces before/after dash, or "to"
-        (\b(?:JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER|
-        JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)?\s*(\d{4})\b  # (3) Optional Month + (4) Year
-        |\b(PRESENT|CURRENT)\b)  # (5) "PRESENT" or "CURRENT"
-    '''
-
-    # Apply regex with verbose mode for clarity
-    matches = re.finditer(pattern, section_text, re.IGNORECASE | re.VERBOSE)
+    matches = YEAR_RANGE_PATTERN.finditer(section_text)
     
     for match in matches:
         start_year = int(match.group(2))  # First captured year
@@ -237,15 +553,11 @@ def extract_year(section, resume_text):
         years.append((start_year, end_year))
 
     if not years:
-        standalone_pattern = r"\b(19|20)\d{2}\b"  # Corrected to capture the full year
-        standalone_matches = re.finditer(standalone_pattern, section_text)
+        standalone_matches = STANDALONE_YEAR_PATTERN.finditer(section_text)
         
         # Add the standalone years to the result (we assume the latest one is the relevant year)
         for match in standalone_matches:
             year = match.group(0)  # Capture the full year
-            match_start = match.start() + start_index  # Adjust for section's starting index
-            match_end = match.end() + start_index  # Adjust for section's starting index
-
             years.append(int(year))
 
     return years
@@ -258,8 +570,13 @@ def calculate_experience(year_ranges):
     # Flatten the list to get all years (both start and end years)
     all_years = []
 
-    for start_year, end_year in year_ranges:
+    for year_range in year_ranges:
+        if isinstance(year_range, int):  # Standalone year found when a section has no date ranges
+            all_years.append(year_range)
+            continue
+
         # Add both start year and end year (for range)
+        start_year, end_year = year_range
         all_years.append(start_year)
         if isinstance(end_year, int):
             all_years.append(end_year)
@@ -272,6 +589,98 @@ def calculate_experience(year_ranges):
     experience_years = max_year - min_year
     return experience_years
 
+#############################
+#-------- Skill matcher --------#
+#############################
+# Words are whole tokens and symbols are their own tokens, so "java" never matches "javascript" but "c++" works
+SKILL_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Names that mean the same skill, a required skill matches any name in its group
+DEFAULT_SKILL_ALIASES = {
+    "javascript": ["js"],
+    "kubernetes": ["k8s"],
+    "postgresql": ["postgres"],
+    "machine learning": ["ml"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "amazon web services": ["aws"],
+    "google cloud platform": ["gcp"],
+    "microsoft excel": ["excel", "ms excel"],
+    "c#": ["csharp"],
+}
+
+# Function to normalize skill names and resume text the same way (case and hyphens do not matter)
+def normalize_skill_text(text):
+    return text.lower().replace('-', ' ')
+
+# Optional JSON taxonomy of more skill names, in the same format as DEFAULT_SKILL_ALIASES
+SKILL_TAXONOMY_PATH = os.getenv("SKILL_TAXONOMY_PATH")
+
+# Function to load a skill taxonomy file in the same format as DEFAULT_SKILL_ALIASES ({"skill": ["alias", ...]})
+def load_skill_aliases(path):
+    with open(path, encoding = "utf-8") as f:
+        return json.load(f)
+
+# Function to return the alias groups used for matching: the defaults, plus the taxonomy file if
+# SKILL_TAXONOMY_PATH is set (its aliases are added to those of the same skill)
+@functools.lru_cache(maxsize = 1)
+def get_skill_aliases():
+    if not SKILL_TAXONOMY_PATH:
+        return DEFAULT_SKILL_ALIASES
+    aliases = {canonical: list(names) for canonical, names in DEFAULT_SKILL_ALIASES.items()}
+    for canonical, names in load_skill_aliases(SKILL_TAXONOMY_PATH).items():
+        aliases.setdefault(canonical, []).extend(names)
+    return aliases
+
+# Matches every required skill and its aliases in one pass over the text
+# Built once per job requisition: a trie over skill tokens, walked from each token of the resume
+# (at most as deep as the longest skill), so overlapping skills like "machine learning" and "learning" are all found
+class SkillMatcher:
+    def __init__(self, skills_required, aliases = None):
+        self.skills = list(skills_required)
+        self._trie = {}
+
+        # Every name in an alias group points at the whole group
+        groups = {}
+        for canonical, names in (DEFAULT_SKILL_ALIASES if aliases is None else aliases).items():
+            group = {normalize_skill_text(name) for name in [canonical, *names]}
+            for name in group:
+                groups.setdefault(name, set()).update(group)
+
+        for skill in self.skills:
+            name = normalize_skill_text(skill)
+            for variant in {name} | groups.get(name, set()):
+                tokens = SKILL_TOKEN_PATTERN.findall(variant)
+                if not tokens:
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(None, set()).add(skill)  # None marks the end of a skill name
+
+    # Function to return the set of required skills found in the text
+    def find(self, text):
+        tokens = SKILL_TOKEN_PATTERN.findall(normalize_skill_text(text))
+        found = set()
+        for start in range(len(tokens)):
+            node = self._trie
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                found.update(node.get(None, ()))
+        return found
+
+    # Function to return the required skills found in the text, in the order they were entered
+    def match(self, text):
+        found = self.find(text)
+        return [skill for skill in self.skills if skill in found]
+
+# Function to reuse the matcher for the same skill list (e.g. every resume in a batch)
+@functools.lru_cache(maxsize = 32)
+def get_skill_matcher(skills_required):
+    return SkillMatcher(skills_required, get_skill_aliases())
+
 # Function to extract skills
 def extract_skills(skills_section, resume_text, skills_required):
 
@@ -282,24 +691,14 @@ def extract_skills(skills_section, resume_text, skills_required):
     else:
         skills_text = resume_text
 
-    # Clean up the text by removing newlines and excessive spaces
-    skills_text = re.sub(r'\n', ' ', skills_text)  # Remove newline characters
-    skills_text = re.sub(r'\s+', ' ', skills_text)  # Remove extra spaces
-    skills_text = skills_text.lower()  # Convert to lowercase for case-insensitive search
-    skills_text = skills_text.replace('-', ' ')  # Replace hyphens with spaces
-
-    extracted_skills = []
-
-    # Check each skill in the skills_required list
-    for skill in skills_required:
-        pattern = r'\b' + re.escape(skill.lower()) + r'\b' #  Use \b for word boundary to ensure it's a standalone skill
-        if re.search(pattern, skills_text):
-            extracted_skills.append(skill)
+    # One pass over the text finds every required skill (matching ignores case, hyphens and extra whitespace)
+    matcher = skills_required if isinstance(skills_required, SkillMatcher) else get_skill_matcher(tuple(skills_required))
+    extracted_skills = matcher.match(skills_text)
 
     return extracted_skills
 
-# Function to extract mandatory skills and relevant years of experience
-def extract_experience_for_skills(resume_text, skills_experience):   
+# Function to build the prompt that checks mandatory skills and relevant years of experience
+def build_skills_experience_prompt(resume_text, skills_experience):
     skills_experience_str = "\n".join([f"{skill}: {years}" for skill, years in skills_experience.items()])
     prompt = f'''
         This is the candidate's resume:
@@ -315,25 +714,116 @@ def extract_experience_for_skills(resume_text, skills_experience):
         }}
         Now, return the dictionary:
     '''
+    return prompt
 
-    response = generate_gemini_response(prompt)
+# Function to extract mandatory skills and relevant years of experience
+def extract_experience_for_skills(resume_text, skills_experience):   
+    prompt = build_skills_experience_prompt(build_prompt_context("skills", resume_text), skills_experience)
+
+    response = generate_gemini_response(prompt, task = "skills")
+    skill_status = parse_dict_response(response)
+
+    return skill_status
     
-    # Extract dictionary-like content using regex
-    match = re.search(r"\{.*\}", response, re.DOTALL) # Extract the part between { and }
-    if match:
-        clean_response = match.group(0)
+#############################
+#-------- Fused structured-output extraction --------#
+#############################
+# One call returns the sections, contact details and mandatory skill verdicts as JSON
+FUSED_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "education": {"type": "STRING"},
+        "work_experience": {"type": "STRING"},
+        "skills": {"type": "STRING"},
+        "name": {"type": "STRING", "nullable": True},
+        "email": {"type": "STRING", "nullable": True},
+        "phone": {"type": "STRING", "nullable": True},
+        "mandatory_skills": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "skill": {"type": "STRING"},
+                    "status": {"type": "STRING", "enum": ["meets", "does not meet"]},
+                },
+                "required": ["skill", "status"],
+            },
+        },
+    },
+    "required": ["education", "work_experience", "skills", "name", "email", "phone", "mandatory_skills"],
+}
+
+# Plain dicts are accepted wherever the SDK takes a GenerateContentConfig, and need no SDK import
+FUSED_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": FUSED_RESPONSE_SCHEMA,
+}
+
+EXTRACTION_MODES = ["fused", "three_calls"]
+
+# Function to build the prompt for the fused extraction
+def build_fused_prompt(initial_resume, skills_experience):
+    if skills_experience:
+        skills_experience_str = "\n".join([f"{skill}: {years}" for skill, years in skills_experience.items()])
     else:
-        clean_response = response.strip()
-    
-    # Try to parse the cleaned response as a dictionary
+        skills_experience_str = "(none)"
+    prompt = f"""
+    The following text is extracted from a resume and may be disorganized due to multi-column formatting.
+    If some information appears misplaced, attempt to logically reconstruct it.
+
+    1. Return the Education, Work Experience and Skills sections as plain text, keeping every date,
+       and DO NOT use markdown formatting such as '**', '*', '-', '|', or bullet points.
+    2. Extract the candidate's name, email address and phone number (phone numbers usually start with 65).
+       Use null if the detail is not found.
+    3. Check if the candidate meets the required skills as specified in the format (skill: required years),
+       returning one verdict per listed skill:
+    {skills_experience_str}
+
+    Resume Text:
+    {initial_resume}
+    """
+    return prompt
+
+# Function to parse the fused JSON response into (resume_text, candidate_info, skills_met), or None if malformed
+def parse_fused_response(response, skills_experience):
     try:
-        skill_status = eval(clean_response)  # Convert string to dictionary
-    except Exception as e:
+        parsed = json.loads(response)
+        sections = {
+            "Education": parsed["education"],
+            "Work Experience": parsed["work_experience"],
+            "Skills": parsed["skills"],
+        }
+        candidate_info = {field: parsed.get(field) for field in ["name", "email", "phone"]}
+        verdicts = {item["skill"].lower(): item["status"] for item in parsed["mandatory_skills"]}
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
         print(f"Error parsing response: {e}")
-        skill_status = {}
+        return None
+
+    # Rebuild the resume with one heading per line so scan_resume can find the sections
+    resume_text = "\n\n".join(f"{heading}\n{clean_sections_response(text or '')}" for heading, text in sections.items())
+
+    # Keep the skill names as entered by the recruiter, a skill the model skipped does not meet
+    skills_met = {skill: verdicts.get(skill.lower(), "does not meet") for skill in skills_experience}
+
+    return resume_text, candidate_info, skills_met
+
+# Function to extract sections, contact info and mandatory skills in one Gemini call
+def extract_fused(initial_resume, skills_experience):
+    prompt = build_fused_prompt(build_prompt_context("fused", initial_resume), skills_experience)
+    response = generate_gemini_response(prompt, config = FUSED_CONFIG, task = "fused")
+    return parse_fused_response(response, skills_experience)
+
+
+# Regex patterns for each degree, compiled once
+DEGREE_KEYWORD_PATTERNS = {
+    degree: re.compile(pattern, re.IGNORECASE) for degree, pattern in {
+        'PhD': r'\b(?:PhD|Doctor of Philosophy)[^|]*',
+        'Master': r'\b(?:Master(?:’s|s)?|MSc|MA|MEng|M\.B\.A\.|MBA)\b',
+        'Bachelor': r'\b(?:Bachelor(?:’s|s)?|B\.?S\.?|BSc|BA|BEng|BBA)[^|]*',
+        'Diploma': r'\b(?:Diploma|Associate)[^|]*'
+    }.items()
+}
 
-    return skill_status
-    
 # Function to get highest education (can combine with meet_education_requirement but kept to ensure output is correct)
 def get_highest_education(education_section, resume_text):
     # Extract text from education section or full resume
@@ -341,24 +831,122 @@ def get_highest_education(education_section, resume_text):
         _, start_index, end_index = education_section
         education_text = resume_text[start_index:end_index]
     else:
-        education_text = education_section
-
-    # Define regex patterns for each degree
-    degree_keywords = {
-        'PhD': r'\b(?:PhD|Doctor of Philosophy)[^|]*',
-        'Master': r'\b(?:Master(?:’s|s)?|MSc|MA|MEng|M\.B\.A\.|MBA)\b',
-        'Bachelor': r'\b(?:Bachelor(?:’s|s)?|B\.?S\.?|BSc|BA|BEng|BBA)[^|]*',
-        'Diploma': r'\b(?:Diploma|Associate)[^|]*'
-    }
+        education_text = resume_text
 
     # Check for degrees in order of hierarchy
-    for degree, pattern in degree_keywords.items():
-        if re.search(pattern, education_text, re.IGNORECASE):
+    for degree, pattern in DEGREE_KEYWORD_PATTERNS.items():
+        if pattern.search(education_text):
             return degree
 
     return 'No degree found'
 
 
+#############################
+#-------- Single-pass resume scanner --------#
+#############################
+# The heading, date and degree patterns above rewritten so that no two quantifiers can match the same
+# characters (e.g. "\s*[-–—]?\s*" followed by "\s*"), which keeps matching linear on long lines of
+# spaces, digits and dashes. They are combined into one alternation so the text is scanned once.
+MONTH_NAMES = r"(?:JANUARY|FEBRUARY|MARCH|APRIL|MAY|JUNE|JULY|AUGUST|SEPTEMBER|OCTOBER|NOVEMBER|DECEMBER|JAN|FEB|MAR|APR|MAY|JUN|JUL|AUG|SEP|OCT|NOV|DEC)"
+
+SCANNER_HEADING_PATTERNS = {
+    "Summary": r"(?:\w+[ \t]+)?(?:summary|objective|profile)",
+    "Work Experience": r"(?:work|job|professional)[ \t]+experiences?",
+    "Education": r"(?:education|academic|educational)(?:[ \t]*(?:and|&))?(?:[ \t]+\w+)?(?:[ \t]+(?:background|history|qualifications|degree))?",
+    "Skills": r"(?:\w+[ \t]+)?skills?(?:[ \t]*\w+)?(?:[ \t]*(?:and|&)[ \t]*competencies)?",
+    "Projects": r"projects?",
+    "Certifications": r"(?:\w+[ \t]+)?(?:certificates?|certifications?)",
+}
+SCANNER_HEADING_CLASSIFIERS = {
+    section: re.compile(pattern, re.IGNORECASE) for section, pattern in SCANNER_HEADING_PATTERNS.items()
+}
+
+SCANNER_DEGREE_PATTERNS = {
+    'PhD': r'\b(?:PhD|Doctor[ ]of[ ]Philosophy)',
+    'Master': r'\b(?:Master(?:’s|s)?|MSc|MA|MEng|M\.B\.A\.|MBA)\b',
+    'Bachelor': r'\b(?:Bachelor(?:’s|s)?|B\.?S\.?|BSc|BA|BEng|BBA)',
+    'Diploma': r'\b(?:Diploma|Associate)',
+}
+
+# Dates and degrees share one word boundary check and a lookahead on the first letter,
+# so most positions in the text are rejected before any alternative is tried
+RESUME_SCANNER_PATTERN = re.compile(
+    r"(?P<heading>^[ \t]*(?:" + "|".join(SCANNER_HEADING_PATTERNS.values()) + r")[ \t]*$)"
+    + r"|\b(?=[0-9JFMASONDPB])(?:"
+    + r"(?P<range>(?:" + MONTH_NAMES + r"\s*)?(?P<start_year>\d{4})\b"  # Optional Month + Year
+    + r"\s*(?:[-–—]\s*|to\s*)?"  # Separator: dash or "to", with optional spaces
+    + r"(?:(?:" + MONTH_NAMES + r"\s*)?(?P<end_year>\d{4})\b|\b(?P<present>PRESENT|CURRENT)\b))"
+    + r"|(?P<year>(?:19|20)\d{2}\b)"
+    + "".join(f"|(?P<degree_{degree}>{pattern[2:]})" for degree, pattern in SCANNER_DEGREE_PATTERNS.items())
+    + ")",
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Function to scan a resume once and return section spans, date ranges per section and degree mentions
+def scan_resume(resume_text):
+    sections = {}
+    dates = []  # (offset, date range) where a range is (start, end) and a standalone year is an int
+    degrees = []  # (offset, degree)
+
+    for match in RESUME_SCANNER_PATTERN.finditer(resume_text):
+        kind = match.lastgroup
+        if kind == "heading":
+            heading = match.group(0).strip()
+            for section, classifier in SCANNER_HEADING_CLASSIFIERS.items():
+                if section not in sections and classifier.fullmatch(heading):
+                    sections[section] = match.start()  # Keep the first heading of each section
+        elif kind == "range":
+            if match.group("present"):
+                end_year = this_year  # Convert "PRESENT" or "CURRENT" to current year
+            else:
+                end_year = int(match.group("end_year"))
+            dates.append((match.start(), (int(match.group("start_year")), end_year)))
+        elif kind == "year":
+            dates.append((match.start(), int(match.group(0))))
+        else:
+            degrees.append((match.start(), kind[len("degree_"):]))
+
+    # Generate (section, start, end) tuples, in the same format as get_section_indices
+    sorted_sections = sorted(sections.items(), key = lambda x: x[1])
+    section_ranges = []
+    for i, (section_name, start_index) in enumerate(sorted_sections):
+        end_index = sorted_sections[i + 1][1] if i + 1 < len(sorted_sections) else len(resume_text)
+        section_ranges.append((section_name, start_index, end_index))
+
+    # Function to find the section an offset belongs to (None for text before the first heading)
+    def section_at(offset):
+        for section_name, start_index, end_index in section_ranges:
+            if start_index <= offset < end_index:
+                return section_name
+        return None
+
+    # Date ranges per section, falling back to standalone years when a section has no ranges (as extract_year)
+    ranges_by_section = {}
+    years_by_section = {}
+    for offset, date in dates:
+        bucket = years_by_section if isinstance(date, int) else ranges_by_section
+        bucket.setdefault(section_at(offset), []).append(date)
+    section_years = {
+        section_name: ranges_by_section.get(section_name) or years_by_section.get(section_name, [])
+        for section_name, _, _ in section_ranges
+    }
+
+    degree_mentions = [(degree, offset, section_at(offset)) for offset, degree in degrees]
+
+    # Highest degree in the education section, or anywhere in the resume if there is no such section
+    education_degrees = {degree for degree, _, section_name in degree_mentions if section_name == "Education" or "Education" not in sections}
+    highest_education = next((degree for degree in SCANNER_DEGREE_PATTERNS if degree in education_degrees), 'No degree found')
+
+    return {
+        "section_ranges": section_ranges,
+        "sections": {section_name: (start_index, end_index) for section_name, start_index, end_index in section_ranges},
+        "years": section_years,
+        "degrees": degree_mentions,
+        "highest_education": highest_education,
+        "dates": [date for _, date in dates],  # Every date range and standalone year, in text order
+    }
+
+
 # Function to evaluate whether the candidate meets the requirement
 def evaluate_candidate(extracted_info, required_info):
     requirement_check = []
@@ -407,6 +995,92 @@ def evaluate_candidate(extracted_info, required_info):
 
 
 
+#############################
+#-------- Screening cascade --------#
+#############################
+# Cheap checks run before the Gemini calls, so candidates that cannot meet the requirements never reach them.
+# The local checks read the raw pdfplumber text, where sections may be jumbled, so each one is an upper bound:
+# dates and degrees anywhere in the resume count, and only a clear miss rejects the candidate.
+CASCADE_STAGES = ["local_checks", "section_checks"]
+
+# Words that an end date may be written as, the restructured text can turn them into "Present"
+PRESENT_WORDS_PATTERN = re.compile(r"\b(?:present|current|now|today|ongoing|to date)\b", re.IGNORECASE)
+
+# Dotted degree abbreviations the scanner does not match but Gemini may spell out (e.g. "B.Eng." -> "Bachelor")
+PREFILTER_DEGREE_PATTERNS = {
+    degree: re.compile(pattern, re.IGNORECASE) for degree, pattern in {
+        'PhD': r'\b(?:Ph\.\s?D|D\.\s?Phil|Doctorate)\b',
+        'Master': r'\bM\.\s?(?:Eng|Sc|A|S|Tech|Phil|Com)\b',
+        'Bachelor': r'\bB\.\s?(?:Eng|Sc|A|S|Tech|Com|E)\b',
+    }.items()
+}
+
+# Function to check on the raw text whether a candidate can still meet the requirements
+# Returns (can_pass, reasons) where reasons lists the requirements that are clearly not met
+def local_prefilter(initial_resume, required_info):
+    education_order = ["Diploma", "Bachelor", "Master", "PhD"]
+    scan = scan_resume(initial_resume)
+    reasons = []
+
+    # 1. Most experience possible: from the earliest to the latest year anywhere in the resume
+    years = []
+    for date in scan["dates"]:
+        years.extend([date] if isinstance(date, int) else date)
+    if PRESENT_WORDS_PATTERN.search(initial_resume):
+        years.append(this_year)
+    max_experience = max(years) - min(years) if years else 0
+    if max_experience < required_info["experience"]:
+        reasons.append("experience")
+
+    # 2. Highest degree mentioned anywhere in the resume
+    degrees = {degree for degree, _, _ in scan["degrees"]}
+    degrees.update(degree for degree, pattern in PREFILTER_DEGREE_PATTERNS.items() if pattern.search(initial_resume))
+    highest_rank = max((education_order.index(degree) for degree in degrees), default = -1)
+    if highest_rank < education_order.index(required_info["education"]):
+        reasons.append("education")
+
+    # 3. Every mandatory skill (or one of its aliases) has to be mentioned somewhere
+    skills_experience = required_info["mandatory_skills"]
+    if skills_experience:
+        found = get_skill_matcher(tuple(skills_experience)).find(initial_resume)
+        if any(skill not in found for skill in skills_experience):
+            reasons.append("mandatory_skills")
+
+    return not reasons, reasons
+
+# Function to check the exact experience and education (as evaluate_candidate) on the restructured text
+def meets_section_checks(extracted_info, required_info):
+    education_order = ["Diploma", "Bachelor", "Master", "PhD"]
+    highest_education = extracted_info["education"]
+    return (
+        extracted_info["experience"] >= required_info["experience"]
+        and highest_education in education_order
+        and education_order.index(highest_education) >= education_order.index(required_info["education"])
+    )
+
+# Function to start the per-stage counters of a cascade run
+def new_cascade_stats():
+    return {
+        "resumes": 0,
+        "rejected": {stage: 0 for stage in CASCADE_STAGES},
+        "calls_saved": {stage: 0 for stage in CASCADE_STAGES},  # Gemini calls that were not made (cache hits aside)
+    }
+
+# Function to count the Gemini calls a full extraction makes (cache hits aside)
+def count_extraction_calls(extraction_mode, skills_experience, has_local_resume_text = False):
+    if extraction_mode == "fused":
+        return 1
+    return (not has_local_resume_text) + 1 + (skills_experience != {})
+
+# Function to count a candidate rejected at a stage and the Gemini calls that were skipped because of it
+def record_cascade_rejection(cascade_stats, stage, calls_saved):
+    increment("cascade_rejections", stage = stage)
+    increment("llm_calls_saved", calls_saved, stage = stage)
+    if cascade_stats is not None:
+        cascade_stats["rejected"][stage] += 1
+        cascade_stats["calls_saved"][stage] += calls_saved
+
+
 
 
 # Prompt user to run ict619_resume_streamlit.py instead
@@ -0,0 +1,294 @@
+import asyncio
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import threading
+import time
+
+
+#############################
+#-------- LLM settings --------#
+#############################
+LLM_TASKS = ["sections", "info", "skills", "fused"]
+DEFAULT_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+# Model per task, e.g. GEMINI_MODEL_INFO=gemini-2.0-flash-lite for the cheap contact info call
+DEFAULT_TASK_MODELS = {task: os.getenv(f"GEMINI_MODEL_{task.upper()}", DEFAULT_MODEL) for task in LLM_TASKS}
+DEFAULT_BACKEND = os.getenv("LLM_BACKEND", "gemini")  # "gemini" or "stub"
+# Connections kept open to the Gemini API, shared by every call of a client (httpx.Limits arguments,
+# aiohttp keeps its own defaults)
+HTTP_POOL_LIMITS = {"max_connections": 20, "max_keepalive_connections": 20, "keepalive_expiry": 60}
+HTTP_TIMEOUT_SECONDS = 120
+
+
+# Function to import the google-genai SDK on first use: it is most of the app's import time, and
+# the stub backend and the local-only paths (cache hits, rejected resumes) never need it
+@functools.lru_cache(maxsize = 1)
+def load_genai():
+    from google import genai
+    import google.genai.errors
+    return genai
+
+
+#############################
+#-------- Backend interface --------#
+#############################
+# Every Gemini call goes through a backend: generate(prompt, task, config) for synchronous code, and a
+# session from open_async() (generate / aclose) for async code. task is one of LLM_TASKS and picks the model.
+class LLMBackend:
+    rate_limited = False  # Whether calls take a slot from the shared Gemini rate limiter
+
+    def __init__(self, task_models = None, default_model = DEFAULT_MODEL):
+        self.default_model = default_model
+        self.task_models = {**DEFAULT_TASK_MODELS, **(task_models or {})}
+
+    # Function to return the model used for a task ("info:name+email" is the "info" task)
+    def model_for(self, task):
+        return self.task_models.get((task or "").split(":")[0], self.default_model)
+
+    def generate(self, prompt, task = None, config = None):
+        raise NotImplementedError
+
+    def open_async(self):
+        raise NotImplementedError
+
+    # Function to close the connections of the async sessions, awaited on the loop that used them
+    async def aclose(self):
+        pass
+
+    def close(self):
+        pass
+
+
+#############################
+#-------- Gemini backend --------#
+#############################
+# Gemini through the google-genai SDK, with one client per backend: its synchronous side serves the
+# synchronous calls, its async side (client.aio) every async session. Async connections belong to the
+# event loop that opened them, so async calls are meant to run on one loop (the app's shared loop).
+class GeminiBackend(LLMBackend):
+    rate_limited = True
+
+    def __init__(self, api_key, task_models = None, default_model = DEFAULT_MODEL, pool_limits = HTTP_POOL_LIMITS, timeout = HTTP_TIMEOUT_SECONDS):
+        super().__init__(task_models, default_model)
+        import httpx
+        genai = load_genai()
+        self.api_key = api_key
+        http_args = {"limits": httpx.Limits(**pool_limits)}
+        # The SDK makes its async calls with aiohttp when it is installed, which takes no httpx arguments
+        async_http_args = dict(http_args) if not has_aiohttp() else None
+        self.http_options = genai.types.HttpOptions(timeout = timeout * 1000, client_args = http_args, async_client_args = async_http_args)
+        self.client = genai.Client(api_key = api_key, http_options = self.http_options)
+
+    def generate(self, prompt, task = None, config = None):
+        response = self.client.models.generate_content(model = self.model_for(task), contents = prompt, config = config)
+        return response.text
+
+    def open_async(self):
+        return GeminiAsyncSession(self)
+
+    async def aclose(self):
+        await self.client.aio.aclose()
+
+    def close(self):
+        self.client.close()
+
+class GeminiAsyncSession:
+    def __init__(self, backend):
+        self.backend = backend
+        self._client = backend.client.aio
+
+    async def generate(self, prompt, task = None, config = None):
+        response = await self._client.models.generate_content(model = self.backend.model_for(task), contents = prompt, config = config)
+        return response.text
+
+    async def aclose(self):
+        pass  # The connections belong to the backend's client, closed by backend.aclose()
+
+# Function to check whether the SDK will use aiohttp instead of httpx for async calls
+@functools.lru_cache(maxsize = 1)
+def has_aiohttp():
+    return importlib.util.find_spec("aiohttp") is not None
+
+
+#############################
+#-------- Local stub backend --------#
+#############################
+STUB_RESUME_PATTERN = re.compile(r"Resume Text:\s*\n(.*?)(?:\n\s*Return the sections in an easy-to-read format\.\s*)?$", re.DOTALL)
+STUB_CANDIDATE_RESUME_PATTERN = re.compile(r"This is the candidate's resume:\s*\n(.*?)\n\s*(?:Extract|Check if)", re.DOTALL)
+STUB_DOCUMENT_PATTERN = re.compile(r'<document id="(\d+)">\n(.*?)\n</document>', re.DOTALL)
+STUB_SKILL_LINE_PATTERN = re.compile(r"^\s*(.+?): (\d+)\s*$", re.MULTILINE)
+STUB_EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+STUB_PHONE_PATTERN = re.compile(r"\+65[ -]?\d{4}[ -]?\d{4}")
+STUB_HEADING_PATTERN = re.compile(r"(?im)^\s*(education|work experience|experience|skills)\s*$")
+
+# Offline stand-in for Gemini: answers every task in the format the parsers expect, worked out from the
+# prompt alone, so the same prompt always gets the same answer. Latency and errors are injected per
+# (prompt, attempt), so a run is reproducible whatever order concurrent calls happen in:
+# rate_limit_rate of attempts raise a 429 RESOURCE_EXHAUSTED (with retry_delay as the hint) and
+# server_error_rate raise a 503, so retries, the rate limiter and fallbacks can be load-tested.
+# The calls and errors counters report what a run did.
+class StubBackend(LLMBackend):
+    def __init__(self, latency = 0.0, jitter = 0.0, rate_limit_rate = 0.0, server_error_rate = 0.0, retry_delay = 1.0, seed = 0, task_models = None, use_rate_limiter = False):
+        super().__init__(task_models)
+        self.rate_limited = use_rate_limiter  # Also go through the shared rate limiter, to load-test it
+        # A different model name keeps stub answers out of the cache entries of real models
+        self.task_models = {task: f"stub:{model}" for task, model in self.task_models.items()}
+        self.default_model = f"stub:{self.default_model}"
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.retry_delay = retry_delay
+        self.seed = seed
+        self.calls = 0
+        self.errors = 0
+        self._attempts = {}  # prompt hash -> attempts so far
+        self._lock = threading.Lock()
+
+    # Function to return a deterministic number in [0, 1) for a prompt attempt and purpose
+    def _fraction(self, prompt_hash, attempt, purpose):
+        digest = hashlib.sha256(f"{self.seed}|{prompt_hash}|{attempt}|{purpose}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+    # Function to return (delay, error or None) for the next attempt of a prompt
+    def _plan_call(self, prompt):
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts.get(prompt_hash, 0)
+            self._attempts[prompt_hash] = attempt + 1
+            self.calls += 1
+        delay = self.latency + self.jitter * self._fraction(prompt_hash, attempt, "latency")
+        error = None
+        failure = self._fraction(prompt_hash, attempt, "error")
+        errors = load_genai().errors if failure < self.rate_limit_rate + self.server_error_rate else None
+        if failure < self.rate_limit_rate:
+            error = errors.ClientError(429, {"error": {
+                "code": 429, "status": "RESOURCE_EXHAUSTED", "message": "Stub quota exceeded.",
+                "details": [{"@type": "type.googleapis.com/google.rpc.RetryInfo", "retryDelay": f"{self.retry_delay}s"}],
+            }})
+        elif failure < self.rate_limit_rate + self.server_error_rate:
+            error = errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE", "message": "Stub overloaded."}})
+        if error is not None:
+            with self._lock:
+                self.errors += 1
+        return delay, error
+
+    def generate(self, prompt, task = None, config = None):
+        delay, error = self._plan_call(prompt)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return self.respond(prompt, task)
+
+    def open_async(self):
+        return StubAsyncSession(self)
+
+    # Function to answer a prompt like Gemini would, from the text in the prompt
+    def respond(self, prompt, task = None):
+        task = (task or "").split(":")[0]
+        documents = STUB_DOCUMENT_PATTERN.findall(prompt)
+        if documents:  # Batched request
+            skills = self._listed_skills(STUB_DOCUMENT_PATTERN.sub("", prompt))
+            if task == "skills":
+                entries = [{"doc_id": doc_id, "mandatory_skills": self._verdicts(text, skills)} for doc_id, text in documents]
+            else:
+                entries = [{"doc_id": doc_id, **self._contact(text)} for doc_id, text in documents]
+            return json.dumps({"documents": entries})
+
+        resume_text = self._resume_text(prompt)
+        skills = self._listed_skills(prompt.replace(resume_text, ""))  # Lines like "python: 2" in the resume are not requirements
+        if task == "fused":
+            return json.dumps({**self._sections(resume_text), **self._contact(resume_text), "mandatory_skills": self._verdicts(resume_text, skills)})
+        if task == "skills":
+            return repr({item["skill"]: item["status"] for item in self._verdicts(resume_text, skills)})
+        if task == "info":
+            return repr(self._contact(resume_text))
+        return resume_text  # Restructuring: the text comes back as it is
+
+    @staticmethod
+    def _resume_text(prompt):
+        match = STUB_RESUME_PATTERN.search(prompt) or STUB_CANDIDATE_RESUME_PATTERN.search(prompt)
+        return match.group(1) if match else prompt
+
+    @staticmethod
+    def _listed_skills(prompt):
+        return [skill.strip() for skill, _ in STUB_SKILL_LINE_PATTERN.findall(prompt)]
+
+    @staticmethod
+    def _verdicts(resume_text, skills):
+        lower_text = resume_text.lower()
+        return [{"skill": skill, "status": "meets" if skill.lower() in lower_text else "does not meet"} for skill in skills]
+
+    @staticmethod
+    def _contact(resume_text):
+        lines = [line.strip() for line in resume_text.splitlines() if line.strip()]
+        email = STUB_EMAIL_PATTERN.search(resume_text)
+        phone = STUB_PHONE_PATTERN.search(resume_text)
+        return {
+            "name": lines[0] if lines else None,
+            "email": email.group(0) if email else None,
+            "phone": re.sub(r"\D", "", phone.group(0)) if phone else None,  # Digits only, like the prompt asks
+        }
+
+    @staticmethod
+    def _sections(resume_text):
+        sections = {"education": "", "work_experience": "", "skills": ""}
+        matches = list(STUB_HEADING_PATTERN.finditer(resume_text))
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            heading = match.group(1).lower()
+            key = "work_experience" if "experience" in heading else heading
+            sections[key] += resume_text[match.end():next_match.start() if next_match else len(resume_text)].strip()
+        return sections
+
+class StubAsyncSession:
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def generate(self, prompt, task = None, config = None):
+        delay, error = self.backend._plan_call(prompt)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return self.backend.respond(prompt, task)
+
+    async def aclose(self):
+        pass
+
+
+#############################
+#-------- Backend selection --------#
+#############################
+_backend = None
+_backend_lock = threading.Lock()
+
+# Function to build the backend named by LLM_BACKEND (STUB_LATENCY, STUB_RATE_LIMIT_RATE and
+# STUB_SERVER_ERROR_RATE configure the stub)
+def create_backend(name = DEFAULT_BACKEND, api_key = None):
+    if name == "stub":
+        return StubBackend(
+            latency = float(os.getenv("STUB_LATENCY", "0")),
+            jitter = float(os.getenv("STUB_JITTER", "0")),
+            rate_limit_rate = float(os.getenv("STUB_RATE_LIMIT_RATE", "0")),
+            server_error_rate = float(os.getenv("STUB_SERVER_ERROR_RATE", "0")),
+        )
+    if name == "gemini":
+        return GeminiBackend(api_key)
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+# Function to return the backend every call goes through, created on first use
+def get_llm_backend(api_key = None):
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(DEFAULT_BACKEND, api_key)
+        return _backend
+
+# Function to swap the backend (e.g. a StubBackend for load tests), returns the previous one
+def set_llm_backend(backend):
+    global _backend
+    with _backend_lock:
+        previous, _backend = _backend, backend
+    return previous
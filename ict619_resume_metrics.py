@@ -0,0 +1,209 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+#############################
+#-------- Metrics settings --------#
+#############################
+METRICS_PREFIX = "resume"
+# Upper bounds (seconds) of the stage duration histogram buckets
+SPAN_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+DEFAULT_METRICS_PATH = os.getenv("METRICS_PATH")  # Prometheus text file written after each run, unset = off
+JSON_LOGS = os.getenv("METRICS_JSON_LOGS", "0") == "1"
+
+# One JSON object per finished span and per counter update, e.g.
+# {"event": "span", "stage": "llm_call", "task": "fused", "seconds": 1.52, "ts": 1760000000.0}
+json_logger = logging.getLogger("ict619_resume.metrics")
+
+
+#############################
+#-------- Metrics registry --------#
+#############################
+# Timing spans and counters of this process, keyed by name and labels (e.g. stage="llm_call", task="info")
+# Spans of nested stages overlap: a resume's "screen_resume" span contains its "llm_request" spans,
+# which contain the "llm_call" attempts and the "rate_limit_wait" before each of them.
+class Metrics:
+    def __init__(self, buckets = SPAN_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._spans = {}  # (stage, labels) -> {"count", "seconds", "max", "buckets"}
+        self._counters = {}  # (name, labels) -> value
+
+    @staticmethod
+    def _labels(labels):
+        return tuple(sorted((key, str(value)) for key, value in labels.items() if value is not None))
+
+    # Function to record one finished stage
+    def observe(self, stage, seconds, **labels):
+        key = (stage, self._labels(labels))
+        with self._lock:
+            span = self._spans.get(key)
+            if span is None:
+                span = self._spans[key] = {"count": 0, "seconds": 0.0, "max": 0.0, "buckets": [0] * len(self.buckets)}
+            span["count"] += 1
+            span["seconds"] += seconds
+            span["max"] = max(span["max"], seconds)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    span["buckets"][i] += 1
+                    break
+        if json_logger.isEnabledFor(logging.INFO):
+            json_logger.info(json.dumps({"event": "span", "stage": stage, **dict(key[1]), "seconds": round(seconds, 6), "ts": time.time()}))
+
+    # Function to time the block under it, in sync and async code alike (the time spent awaiting is included)
+    @contextmanager
+    def span(self, stage, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def increment(self, name, amount = 1, **labels):
+        if not amount:
+            return
+        key = (name, self._labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        if json_logger.isEnabledFor(logging.INFO):
+            json_logger.info(json.dumps({"event": "counter", "name": name, **dict(key[1]), "amount": amount, "ts": time.time()}))
+
+    # Function to return a copy of every span and counter, e.g. to report the difference after a run
+    def snapshot(self):
+        with self._lock:
+            return {
+                "spans": {key: {**span, "buckets": list(span["buckets"])} for key, span in self._spans.items()},
+                "counters": dict(self._counters),
+            }
+
+    # Function to render the metrics in the Prometheus text exposition format
+    def render_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {METRICS_PREFIX}_stage_seconds Time spent per screening stage",
+            f"# TYPE {METRICS_PREFIX}_stage_seconds histogram",
+        ]
+        for (stage, labels), span in sorted(snapshot["spans"].items()):
+            label_text = format_labels((("stage", stage),) + labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, span["buckets"]):
+                cumulative += count
+                lines.append(f"{METRICS_PREFIX}_stage_seconds_bucket{format_labels((('stage', stage),) + labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{METRICS_PREFIX}_stage_seconds_bucket{format_labels((('stage', stage),) + labels + (('le', '+Inf'),))} {span['count']}")
+            lines.append(f"{METRICS_PREFIX}_stage_seconds_sum{label_text} {span['seconds']:.6f}")
+            lines.append(f"{METRICS_PREFIX}_stage_seconds_count{label_text} {span['count']}")
+
+        for name in sorted({name for name, _ in snapshot["counters"]}):
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name}_total counter")
+            for (counter_name, labels), value in sorted(snapshot["counters"].items()):
+                if counter_name == name:
+                    lines.append(f"{METRICS_PREFIX}_{name}_total{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    # Function to write the Prometheus text to a file, e.g. for node_exporter's textfile collector
+    # Written to a temporary file first so a scrape never sees half a file
+    def write_prometheus(self, path = DEFAULT_METRICS_PATH):
+        if not path:
+            return
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding = "utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+metrics = Metrics()  # Shared by every module of this process
+span = metrics.span
+observe = metrics.observe
+increment = metrics.increment
+
+
+#############################
+#-------- Export --------#
+#############################
+# Function to send the JSON metric events to a stream (stderr by default)
+def enable_json_logs(stream = None):
+    if any(getattr(handler, "_metrics_json", False) for handler in json_logger.handlers):
+        return
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler._metrics_json = True
+    json_logger.addHandler(handler)
+    json_logger.setLevel(logging.INFO)
+    json_logger.propagate = False
+
+if JSON_LOGS:
+    enable_json_logs()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # No access log for every scrape
+
+# Function to serve the metrics at http://<host>:<port>/metrics from a daemon thread, returns the server
+def serve_metrics(port, host = "0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target = server.serve_forever, name = "metrics-server", daemon = True).start()
+    return server
+
+
+#############################
+#-------- Run breakdown --------#
+#############################
+# Function to return the spans recorded between two snapshots, slowest stage first:
+# [{"stage", "labels", "count", "seconds", "mean_ms"}]
+def summarize_spans(before, after):
+    rows = []
+    for (stage, labels), span in after["spans"].items():
+        previous = before["spans"].get((stage, labels), {"count": 0, "seconds": 0.0})
+        count = span["count"] - previous["count"]
+        if count <= 0:
+            continue
+        seconds = span["seconds"] - previous["seconds"]
+        rows.append({
+            "stage": stage,
+            "labels": " ".join(f"{key}={value}" for key, value in labels),
+            "count": count,
+            "seconds": round(seconds, 3),
+            "mean_ms": round(seconds / count * 1000, 1),
+        })
+    return sorted(rows, key = lambda row: row["seconds"], reverse = True)
+
+# Function to return the counters increased between two snapshots: {"name{labels}": increase}
+def summarize_counters(before, after):
+    increases = {}
+    for (name, labels), value in sorted(after["counters"].items()):
+        increase = value - before["counters"].get((name, labels), 0)
+        if increase:
+            increases[name + format_labels(labels)] = increase
+    return increases
+
+# Function to format the breakdown of a run as text, e.g. at the end of a batch run
+def format_breakdown(before, after):
+    lines = [f"{'stage':<22}{'labels':<28}{'count':>8}{'seconds':>11}{'mean (ms)':>12}"]
+    for row in summarize_spans(before, after):
+        lines.append(f"{row['stage']:<22}{row['labels']:<28}{row['count']:>8}{row['seconds']:>11.3f}{row['mean_ms']:>12.1f}")
+    for name, increase in summarize_counters(before, after).items():
+        lines.append(f"{name}: {increase}")
+    return "\n".join(lines)
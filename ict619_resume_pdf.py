@@ -0,0 +1,379 @@
+import io
+import math
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource  # Unix only, used for the worker memory cap
+except ImportError:
+    resource = None
+
+
+#############################
+#-------- Pool settings --------#
+#############################
+DEFAULT_TIMEOUT = 60  # Seconds of worker time one PDF may use, summed over its chunks of pages
+DEFAULT_MEMORY_LIMIT_MB = 2048  # Address space cap per worker process
+DEFAULT_PAGES_PER_TASK = 8  # Larger PDFs are split into chunks of this many pages
+STUCK_GRACE = 10  # Extra seconds before a worker that ignores its timeout is considered stuck
+
+#############################
+#-------- Layout settings --------#
+#############################
+LINE_TOLERANCE = 3  # Words whose tops are this close (in points) are on the same line
+MIN_GUTTER_WIDTH = 10  # Narrowest empty vertical strip (in points) treated as a column gap
+MIN_COLUMN_SHARE = 0.15  # Each column needs at least this share of the page's words
+NARROW_COLUMN_SHARE = 0.25  # A right "column" narrower than this share of the text width holds dates, not a column
+
+# This module imports nothing heavy (pdfplumber is imported by the workers) so "spawn" workers start quickly and do not set up Gemini
+_pool = None
+_pool_settings = None
+
+
+class PdfTimeoutError(Exception):
+    pass
+
+
+#############################
+#-------- Worker side --------#
+#############################
+# Function to cap the memory of each worker, so one pathological PDF raises MemoryError instead of OOM-ing the app
+def _init_worker(memory_limit_mb):
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _raise_timeout(signum, frame):
+    raise PdfTimeoutError("PDF extraction timed out")
+
+# Function run in a worker: extract pages [start, stop) and return them with the total page count and
+# the seconds spent, which count against the PDF's timeout (the budget its earlier chunks left)
+# With layout=True each page is (pdfplumber text, column-aware text, layout confidence)
+def _extract_pages(source, start, stop, timeout, layout = False):
+    use_alarm = timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        import pdfplumber  # parse pdf, imported in the worker on first use as it is slow to import
+        started = time.perf_counter()
+        pdf_source = source if isinstance(source, str) else io.BytesIO(source)
+        with pdfplumber.open(pdf_source) as pdf:
+            page_count = len(pdf.pages)
+            pages = []
+            for page in pdf.pages[start:stop]:
+                text = page.extract_text() or ""  # Pages without a text layer return None
+                if layout:
+                    layout_text, confidence = reconstruct_page_layout(page)
+                    pages.append((text, layout_text, confidence))
+                else:
+                    pages.append(text)
+                page.close()  # Release the parsed layout objects of this page
+        return page_count, pages, time.perf_counter() - started
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+#############################
+#-------- Column-aware layout --------#
+#############################
+# Function to group words into lines by their top coordinate, left to right within a line
+def _group_lines(words):
+    lines = []
+    for word in sorted(words, key = lambda w: (w["top"], w["x0"])):
+        if lines and word["top"] - lines[-1][0] <= LINE_TOLERANCE:
+            lines[-1][1].append(word)
+        else:
+            lines.append((word["top"], [word]))
+    return [(top, sorted(line_words, key = lambda w: w["x0"])) for top, line_words in lines]
+
+def _line_text(line_words):
+    return " ".join(word["text"] for word in line_words)
+
+# Function to split one line into segments of words separated by less than a gutter
+def _split_segments(line_words):
+    segments = [[line_words[0]]]
+    for word in line_words[1:]:
+        if word["x0"] - max(w["x1"] for w in segments[-1]) >= MIN_GUTTER_WIDTH:
+            segments.append([word])
+        else:
+            segments[-1].append(word)
+    return [(min(w["x0"] for w in segment), max(w["x1"] for w in segment)) for segment in segments]
+
+def _line_segments(words):
+    return [segment for _, line_words in _group_lines(words) for segment in _split_segments(line_words)]
+
+# Function to find the widest empty vertical strip in the middle of the text, or None
+# With strict=True no line may cross it, used to look for a further split inside a column
+def _find_gutter(words, strict = False):
+    left = int(min(word["x0"] for word in words))
+    right = int(math.ceil(max(word["x1"] for word in words)))
+    width = right - left
+    if width <= 0:
+        return None
+
+    # Difference array of how many line segments cover each point along the x axis, and how many
+    # segments end before / start after each point (the lines of the columns on either side)
+    segments = _line_segments(words)
+    coverage = [0] * (width + 2)
+    ends = [0] * (width + 2)
+    starts = [0] * (width + 2)
+    for x0, x1 in segments:
+        coverage[int(x0) - left] += 1
+        coverage[int(math.ceil(x1)) - left + 1] -= 1
+        ends[int(math.ceil(x1)) - left + 1] += 1
+        starts[int(x0) - left] += 1
+
+    best = None
+    run_start = None
+    covered = 0
+    lines_left = 0
+    lines_right = len(segments)
+    for x in range(width + 1):
+        covered += coverage[x]
+        lines_left += ends[x]
+        lines_right -= starts[x]
+        # Allow a few lines to cross the gap (e.g. a full-width name or address in the header), in
+        # proportion to the shorter column so the tail of a short sidebar is not mistaken for the gap
+        allowed = 0 if strict else min(lines_left, lines_right) // 10
+        in_middle = 0.2 * width <= x <= 0.8 * width
+        if in_middle and covered <= allowed:
+            if run_start is None:
+                run_start = x
+        elif run_start is not None:
+            if x - run_start >= MIN_GUTTER_WIDTH and (best is None or x - run_start > best[1] - best[0]):
+                best = (run_start, x)
+            run_start = None
+
+    if best is None:
+        return None
+    return left + (best[0] + best[1]) / 2
+
+# Function to rebuild the reading order of one page and score how sure we are about it (0 to 1)
+def reconstruct_page_layout(page):
+    words = page.extract_words()
+    if not words:
+        return "", 0.0  # Scanned or empty page, nothing to rebuild
+
+    lines = _group_lines(words)
+    gutter = _find_gutter(words)
+    if gutter is None:
+        return "\n".join(_line_text(line_words) for _, line_words in lines), 0.95  # Single column
+
+    # Lines with a segment across the gutter (e.g. the name and contact line in the header) span both columns
+    spanning = [any(x0 < gutter < x1 for x0, x1 in _split_segments(line_words)) for _, line_words in lines]
+    column_words = [word for (_, line_words), spans in zip(lines, spanning) if not spans for word in line_words]
+    left_words = [word for word in column_words if word["x1"] <= gutter]
+    right_words = [word for word in column_words if word["x0"] >= gutter]
+    if min(len(left_words), len(right_words)) < MIN_COLUMN_SHARE * len(words):
+        # A one-sided tail of words: stray words or a short column, too unsure to skip the LLM
+        return "\n".join(_line_text(line_words) for _, line_words in lines), 0.5
+
+    # Columns that share baselines line by line are rows of one column (e.g. dates aligned to the right)
+    left_tops = [top for top, _ in _group_lines(left_words)]
+    right_lines = _group_lines(right_words)
+    aligned = sum(1 for top, _ in right_lines if any(abs(top - left_top) <= LINE_TOLERANCE for left_top in left_tops))
+    aligned_share = aligned / len(right_lines)
+    text_width = max(word["x1"] for word in words) - min(word["x0"] for word in words)
+    right_width = max(word["x1"] for word in right_words) - gutter
+
+    if aligned_share >= 0.8:
+        confidence = 0.9 if right_width < NARROW_COLUMN_SHARE * text_width else 0.6
+        return "\n".join(_line_text(line_words) for _, line_words in lines), confidence
+    if aligned_share > 0.5:
+        return "\n".join(_line_text(line_words) for _, line_words in lines), 0.5  # Could be either, leave it to the LLM
+
+    # Two columns: read the left column then the right one, between lines that span both columns
+    output = []
+    left_buffer = []
+    right_buffer = []
+    interruptions = 0
+    for (_, line_words), spans in zip(lines, spanning):
+        if spans:
+            if left_buffer or right_buffer:
+                interruptions += 1  # A full-width line between column lines makes the order less certain
+            output.extend(left_buffer + right_buffer)
+            left_buffer, right_buffer = [], []
+            output.append(_line_text(line_words))
+            continue
+        left_part = [word for word in line_words if word["x1"] <= gutter]
+        right_part = [word for word in line_words if word["x0"] >= gutter]
+        if left_part:
+            left_buffer.append(_line_text(left_part))
+        if right_part:
+            right_buffer.append(_line_text(right_part))
+    output.extend(left_buffer + right_buffer)
+
+    # A gutter inside either column means three or more columns, which this engine does not handle
+    confidence = 0.9 - min(0.4, 0.1 * interruptions)
+    if _find_gutter(left_words, strict = True) is not None or _find_gutter(right_words, strict = True) is not None:
+        confidence = min(confidence, 0.5)
+
+    return "\n".join(output), confidence
+
+
+#############################
+#-------- Pool management --------#
+#############################
+# Function to return the shared worker pool, created on first use and reused across Streamlit reruns
+def get_pdf_pool(max_workers = None, memory_limit_mb = DEFAULT_MEMORY_LIMIT_MB):
+    global _pool, _pool_settings
+    settings = (max_workers or os.cpu_count() or 1, memory_limit_mb)
+    if _pool is None or _pool_settings != settings:
+        shutdown_pdf_pool()
+        _pool = ProcessPoolExecutor(
+            max_workers = settings[0],
+            mp_context = multiprocessing.get_context("spawn"),  # Forking a threaded Streamlit server is unsafe
+            initializer = _init_worker,
+            initargs = (memory_limit_mb,),
+        )
+        _pool_settings = settings
+    return _pool
+
+# Function to stop the shared pool, killing workers that are stuck outside Python code
+def shutdown_pdf_pool(kill = False):
+    global _pool, _pool_settings
+    if _pool is None:
+        return
+    if kill:
+        # ProcessPoolExecutor has no public way to stop a worker that is stuck mid-task
+        for process in list((getattr(_pool, "_processes", None) or {}).values()):
+            process.terminate()
+    _pool.shutdown(wait = not kill, cancel_futures = True)
+    _pool = None
+    _pool_settings = None
+
+# Function to turn a path, bytes or file-like object into something a worker can receive
+def _to_source(pdf_file):
+    if isinstance(pdf_file, (str, os.PathLike)):
+        return os.fspath(pdf_file)
+    if isinstance(pdf_file, (bytes, bytearray)):
+        return bytes(pdf_file)
+    if hasattr(pdf_file, "getvalue"):  # Streamlit UploadedFile / BytesIO
+        return pdf_file.getvalue()
+    position = pdf_file.tell()
+    data = pdf_file.read()
+    pdf_file.seek(position)
+    return data
+
+
+#############################
+#-------- Parallel extraction --------#
+#############################
+# Generator yielding (index, pages, error) for each PDF as soon as all of its pages are extracted
+# Small PDFs are one task each, larger PDFs are split into page chunks once the first chunk reports the page count
+def _iter_pdf_pages(pdf_files, layout, max_workers = None, timeout = DEFAULT_TIMEOUT,
+                    memory_limit_mb = DEFAULT_MEMORY_LIMIT_MB, pages_per_task = DEFAULT_PAGES_PER_TASK):
+    sources = [_to_source(pdf_file) for pdf_file in pdf_files]
+    chunks = [{} for _ in sources]  # chunk start page -> list of page results
+    expected_chunks = [None] * len(sources)
+    spent = [0.0] * len(sources)  # Worker seconds used by the finished chunks of each PDF
+    finished = set()
+    pending = {}
+
+    def submit(index, start):
+        budget = timeout - spent[index] if timeout else timeout  # The chunks of a PDF share its timeout
+        try:
+            future = get_pdf_pool(max_workers, memory_limit_mb).submit(
+                _extract_pages, sources[index], start, start + pages_per_task, budget, layout
+            )
+        except BrokenProcessPool:
+            shutdown_pdf_pool(kill = True)  # A worker crashed, start again with a fresh pool
+            future = get_pdf_pool(max_workers, memory_limit_mb).submit(
+                _extract_pages, sources[index], start, start + pages_per_task, budget, layout
+            )
+        pending[future] = (index, start)
+
+    # Function to give up on a PDF, cancelling its chunks that have not started yet
+    def drop(index):
+        finished.add(index)
+        chunks[index] = None
+        for future, (other_index, _) in list(pending.items()):
+            if other_index == index and future.cancel():
+                del pending[future]
+
+    for index in range(len(sources)):
+        submit(index, 0)
+
+    while pending:
+        done, _ = wait(pending, timeout = (timeout or 0) + STUCK_GRACE, return_when = FIRST_COMPLETED)
+
+        if not done:
+            # Nothing finished even after the timeout: the workers are stuck below Python, give up on them
+            shutdown_pdf_pool(kill = True)
+            for index in sorted({index for index, _ in pending.values()} - finished):
+                finished.add(index)
+                yield index, None, "PdfTimeoutError: PDF extraction did not finish"
+            return
+
+        for future in done:
+            index, start = pending.pop(future)
+            if index in finished:
+                continue
+
+            try:
+                page_count, pages, seconds = future.result()
+            except Exception as e:
+                drop(index)
+                yield index, None, f"{type(e).__name__}: {e}"
+                continue
+            spent[index] += seconds
+            if timeout and spent[index] > timeout:  # Chunks running side by side used up the budget together
+                drop(index)
+                yield index, None, "PdfTimeoutError: PDF extraction timed out"
+                continue
+
+            chunks[index][start] = pages
+            if start == 0:
+                expected_chunks[index] = max(1, math.ceil(page_count / pages_per_task))
+                for next_start in range(pages_per_task, page_count, pages_per_task):
+                    submit(index, next_start)
+
+            if len(chunks[index]) == expected_chunks[index]:
+                finished.add(index)
+                pages = [page for chunk_start in sorted(chunks[index]) for page in chunks[index][chunk_start]]
+                chunks[index] = None
+                yield index, pages, None
+
+# Generator yielding (index, text, error) for each PDF as soon as it is extracted
+def iter_texts_from_pdfs(pdf_files, **pool_options):
+    for index, pages, error in _iter_pdf_pages(pdf_files, False, **pool_options):
+        # Join every page once instead of growing a string page by page
+        yield index, None if pages is None else "".join(page_text + "\n" for page_text in pages), error
+
+# Generator yielding (index, layout, error) for each PDF, where layout holds the pdfplumber text,
+# the column-aware text and the lowest page confidence
+def iter_layouts_from_pdfs(pdf_files, **pool_options):
+    for index, pages, error in _iter_pdf_pages(pdf_files, True, **pool_options):
+        if pages is None:
+            yield index, None, error
+            continue
+        confidences = [confidence for text, _, confidence in pages if text.strip()]
+        yield index, {
+            "text": "".join(text + "\n" for text, _, _ in pages),
+            "layout_text": "".join(layout_text + "\n" for _, layout_text, _ in pages),
+            "layout_confidence": min(confidences) if confidences else 0.0,
+        }, None
+
+# Function to extract text from many PDFs in parallel, in input order (None for PDFs that failed)
+def extract_texts_from_pdfs(pdf_files, **pool_options):
+    texts = [None] * len(pdf_files)
+    for index, text, error in iter_texts_from_pdfs(pdf_files, **pool_options):
+        if error is not None:
+            print(f"⚠️ Could not extract text from PDF #{index + 1}: {error}")
+        texts[index] = text
+    return texts
+
+# Function to extract text and local layout from many PDFs in parallel, in input order (None for PDFs that failed)
+def extract_layouts_from_pdfs(pdf_files, **pool_options):
+    layouts = [None] * len(pdf_files)
+    for index, layout, error in iter_layouts_from_pdfs(pdf_files, **pool_options):
+        if error is not None:
+            print(f"⚠️ Could not extract text from PDF #{index + 1}: {error}")
+        layouts[index] = layout
+    return layouts
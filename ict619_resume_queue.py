@@ -0,0 +1,226 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ict619_resume_cache import hash_pdf_bytes
+
+
+#############################
+#-------- Queue settings --------#
+#############################
+DEFAULT_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "job_queue.sqlite3")
+DEFAULT_LEASE_SECONDS = 600  # A claimed resume goes back to the queue if its worker is silent for this long
+MAX_ATTEMPTS = 3  # Resumes failing this many times (e.g. quota exhausted every time) are marked failed
+
+
+#############################
+#-------- Job queue --------#
+#############################
+# Durable queue of screening jobs in SQLite. The UI submits a job (the PDFs and the requirements) and any
+# number of workers (ict619_resume_worker.py), in one process each and on any machine that can open the
+# same file, claim its resumes a few at a time. A claim is a lease: a worker that dies stops renewing it
+# and its resumes are claimed again by the others. Results are written per resume so they can be shown
+# while the rest of the job is still running.
+class JobQueue:
+    def __init__(self, path = DEFAULT_QUEUE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        # Claims must be atomic across processes, so transactions are started by hand (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(path, check_same_thread = False, isolation_level = None, timeout = 30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                required_info TEXT NOT NULL,
+                options TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+
+            -- The PDFs, once per content
+            CREATE TABLE IF NOT EXISTS job_pdfs (
+                pdf_hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL
+            ) WITHOUT ROWID;
+
+            -- One row per resume of a job: queued -> running -> done / failed
+            CREATE TABLE IF NOT EXISTS job_items (
+                id INTEGER PRIMARY KEY,
+                job_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                file_name TEXT,
+                pdf_hash TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                worker_id TEXT,
+                lease_until REAL,
+                not_before REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                finished_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_job_items_status ON job_items (status, id);
+            CREATE INDEX IF NOT EXISTS idx_job_items_job ON job_items (job_id, position);
+        """)
+        # Queue files created before resumes could be put off for a while
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        if "not_before" not in columns:
+            self._conn.execute("ALTER TABLE job_items ADD COLUMN not_before REAL")
+
+    # Function to run fn(conn) in one write transaction, so no other process claims the same rows in between
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(self._conn)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    # Function to queue a screening job, pdf_files is a list of (file name, path / bytes / uploaded file)
+    # options are passed to the worker's screening call (extraction_mode, cascade, batch)
+    # Returns the job id
+    def submit_job(self, pdf_files, required_info, **options):
+        pdfs = []
+        for file_name, pdf_file in pdf_files:
+            if isinstance(pdf_file, (str, os.PathLike)):
+                with open(pdf_file, "rb") as f:
+                    data = f.read()
+            elif hasattr(pdf_file, "getvalue"):  # Streamlit UploadedFile / BytesIO
+                data = pdf_file.getvalue()
+            else:
+                data = bytes(pdf_file)
+            pdfs.append((file_name, hash_pdf_bytes(data), data))
+
+        def insert(conn):
+            job_id = conn.execute(
+                "INSERT INTO jobs (required_info, options, created_at) VALUES (?, ?, ?)",
+                (json.dumps(required_info), json.dumps(options), time.time())
+            ).lastrowid
+            conn.executemany("INSERT OR IGNORE INTO job_pdfs (pdf_hash, data) VALUES (?, ?)", [(pdf_hash, data) for _, pdf_hash, data in pdfs])
+            conn.executemany(
+                "INSERT INTO job_items (job_id, position, file_name, pdf_hash) VALUES (?, ?, ?, ?)",
+                [(job_id, position, file_name, pdf_hash) for position, (file_name, pdf_hash, _) in enumerate(pdfs)]
+            )
+            return job_id
+        return self._transaction(insert)
+
+    # Function to claim up to limit resumes of one job for a worker, oldest first
+    # Resumes whose lease ran out (their worker died) are claimed again, resumes put off by defer wait their turn
+    # Returns (job, items): job is {"id", "required_info", "options"} or None if there is nothing to do,
+    # items are {"id", "position", "file_name", "pdf_hash", "data"}
+    def claim(self, worker_id, limit = 5, lease_seconds = DEFAULT_LEASE_SECONDS):
+        def claim_items(conn):
+            now = time.time()
+            row = conn.execute(
+                """SELECT job_id FROM job_items
+                   WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?)) OR (status = 'running' AND lease_until < ?)
+                   ORDER BY id LIMIT 1""",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None, []
+            job_id = row[0]
+            rows = conn.execute(
+                """SELECT i.id, i.position, i.file_name, i.pdf_hash, p.data FROM job_items i
+                   JOIN job_pdfs p ON p.pdf_hash = i.pdf_hash
+                   WHERE i.job_id = ? AND ((i.status = 'queued' AND (i.not_before IS NULL OR i.not_before <= ?)) OR (i.status = 'running' AND i.lease_until < ?))
+                   ORDER BY i.id LIMIT ?""",
+                (job_id, now, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE job_items SET status = 'running', worker_id = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                [(worker_id, now + lease_seconds, item_id) for item_id, *_ in rows]
+            )
+            required_info, options = conn.execute("SELECT required_info, options FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            job = {"id": job_id, "required_info": json.loads(required_info), "options": json.loads(options)}
+            items = [{"id": item_id, "position": position, "file_name": file_name, "pdf_hash": pdf_hash, "data": data}
+                     for item_id, position, file_name, pdf_hash, data in rows]
+            return job, items
+        return self._transaction(claim_items)
+
+    # Function to extend the lease of the resumes a worker is still busy with
+    def renew(self, worker_id, item_ids, lease_seconds = DEFAULT_LEASE_SECONDS):
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE job_items SET lease_until = ? WHERE id = ? AND worker_id = ? AND status = 'running'",
+            [(time.time() + lease_seconds, item_id, worker_id) for item_id in item_ids]
+        ))
+
+    # Function to store the result of a resume (JSON-serialisable), unless another worker took it over
+    def complete(self, worker_id, item_id, result):
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE job_items SET status = 'done', result = ?, error = NULL, finished_at = ? WHERE id = ? AND worker_id = ?",
+            (json.dumps(result), time.time(), item_id, worker_id)
+        ))
+
+    # Function to record a failed resume: it goes back to the queue until MAX_ATTEMPTS, unless retry is False
+    def fail(self, worker_id, item_id, error, retry = True):
+        self._transaction(lambda conn: conn.execute(
+            """UPDATE job_items
+               SET status = CASE WHEN ? AND attempts < ? THEN 'queued' ELSE 'failed' END,
+                   error = ?, lease_until = NULL, finished_at = ?
+               WHERE id = ? AND worker_id = ?""",
+            (int(retry), MAX_ATTEMPTS, error, time.time(), item_id, worker_id)
+        ))
+
+    # Function to put a resume back in the queue for retry_after seconds without counting the attempt,
+    # for failures that say nothing about the resume (Gemini quota exhausted, circuit open). Retrying at
+    # once would fail the same way and use up MAX_ATTEMPTS within seconds.
+    def defer(self, worker_id, item_id, error, retry_after):
+        self._transaction(lambda conn: conn.execute(
+            """UPDATE job_items
+               SET status = 'queued', error = ?, lease_until = NULL, not_before = ?, attempts = attempts - 1
+               WHERE id = ? AND worker_id = ? AND status = 'running'""",
+            (error, time.time() + retry_after, item_id, worker_id)
+        ))
+
+    # Function to give unfinished resumes back to the queue (e.g. a worker stopping with Ctrl+C)
+    def release(self, worker_id, item_ids):
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE job_items SET status = 'queued', lease_until = NULL, attempts = attempts - 1 WHERE id = ? AND worker_id = ? AND status = 'running'",
+            [(item_id, worker_id) for item_id in item_ids]
+        ))
+
+    # Function to count the resumes of a job per status
+    def progress(self, job_id):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)).fetchall()
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        counts.update(dict(rows))
+        counts["total"] = sum(counts.values())
+        counts["finished"] = counts["total"] == counts["done"] + counts["failed"]
+        return counts
+
+    # Function to return the finished resumes of a job in upload order:
+    # {"position", "file_name", "pdf_hash", "status", "result", "error"}
+    def results(self, job_id):
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT position, file_name, pdf_hash, status, result, error FROM job_items
+                   WHERE job_id = ? AND status IN ('done', 'failed') ORDER BY position""",
+                (job_id,)
+            ).fetchall()
+        return [{
+            "position": position,
+            "file_name": file_name,
+            "pdf_hash": pdf_hash,
+            "status": status,
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+        } for position, file_name, pdf_hash, status, result, error in rows]
+
+    # Function to delete a job with its results, and the PDFs no other job uses
+    def delete_job(self, job_id):
+        def delete(conn):
+            conn.execute("DELETE FROM job_items WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            conn.execute("DELETE FROM job_pdfs WHERE pdf_hash NOT IN (SELECT pdf_hash FROM job_items)")
+        self._transaction(delete)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+#############################
+#-------- Rate limit settings --------#
+#############################
+DEFAULT_RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", "rate_limit.sqlite3")
+DEFAULT_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "0"))  # Off unless set, e.g. 15 for the free tier
+MIN_RATE_FRACTION = 0.1  # The adaptive rate never drops below this share of requests_per_minute
+RATE_INCREASE_FRACTION = 0.05  # Each success gives back this share of requests_per_minute
+RATE_DECREASE_FACTOR = 0.5  # Each 429 halves the rate
+DEFAULT_BACKOFF_SECONDS = 10  # Pause after a 429 without a retry-delay hint
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive 429s that open the circuit
+CIRCUIT_OPEN_SECONDS = 60  # Calls fail fast for this long once the circuit is open
+MAX_WAIT_SECONDS = 120  # A caller that would wait longer for its turn fails fast instead
+
+# "retryDelay": "37s" in the error details, or "Please retry in 37.5s" in the message
+RETRY_DELAY_PATTERN = re.compile(r"""retryDelay['"]?\s*:\s*['"]?(\d+(?:\.\d+)?)s|retry in (\d+(?:\.\d+)?)\s*s""", re.IGNORECASE)
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Gemini is rate limiting this key, not calling it for another {retry_after:.0f}s")
+
+# The circuit is closed but the queue for a request slot is longer than max_wait_seconds (e.g. a low
+# requests_per_minute shared by many workers), the caller can try again later
+class RateLimitTimeoutError(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+        super().__init__(f"Waited too long for a Gemini request slot, the next one is in {retry_after:.0f}s")
+
+
+# Function to read the retry delay Gemini suggests in a RESOURCE_EXHAUSTED error, or None
+def parse_retry_delay(error):
+    match = RETRY_DELAY_PATTERN.search(str(error))
+    if match is None:
+        return None
+    return float(match.group(1) or match.group(2))
+
+# Function to check if an error is Gemini's 429 / RESOURCE_EXHAUSTED
+def is_rate_limit_error(error):
+    return getattr(error, "code", None) == 429 or "RESOURCE_EXHAUSTED" in str(error)
+
+# Function to return the seconds to wait before trying again after a quota error (a 429, an open circuit
+# or too long a queue for a request slot), or None if the error has nothing to do with quota
+def get_retry_after(error):
+    if isinstance(error, (CircuitOpenError, RateLimitTimeoutError)):
+        return error.retry_after
+    if is_rate_limit_error(error):
+        return parse_retry_delay(error) or DEFAULT_BACKOFF_SECONDS
+    return None
+
+
+#############################
+#-------- Shared rate limiter --------#
+#############################
+# Token bucket kept in SQLite, so every thread, Streamlit session and worker process using the same file
+# shares one request budget. The refill rate adapts: halved on every 429 and raised a little on every success.
+# A retry-delay hint pauses everyone until it has passed, and CIRCUIT_FAILURE_THRESHOLD 429s in a row open
+# the circuit, so callers get CircuitOpenError at once instead of queueing for minutes.
+class GeminiRateLimiter:
+    def __init__(self, path = DEFAULT_RATE_LIMIT_PATH, requests_per_minute = DEFAULT_REQUESTS_PER_MINUTE, max_wait_seconds = MAX_WAIT_SECONDS):
+        self.path = path
+        self.max_rate = requests_per_minute / 60  # Requests per second
+        self.min_rate = self.max_rate * MIN_RATE_FRACTION
+        self.burst = max(1.0, requests_per_minute / 10)  # Requests that can go out back to back after a quiet spell
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+
+        # Transactions are started by hand (BEGIN IMMEDIATE) so the read-modify-write of the bucket is atomic across processes
+        self._conn = sqlite3.connect(path, check_same_thread = False, isolation_level = None, timeout = 30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_limit (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                tokens REAL NOT NULL,
+                rate REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                blocked_until REAL NOT NULL DEFAULT 0,
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                circuit_open_until REAL NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO rate_limit (id, tokens, rate, updated_at) VALUES (1, ?, ?, ?)",
+            (self.burst, self.max_rate, time.time())
+        )
+
+    # Function to run fn(state, now) on the shared state in one transaction, writing back the state it returns
+    def _update(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, rate, updated_at, blocked_until, consecutive_failures, circuit_open_until FROM rate_limit WHERE id = 1"
+                ).fetchone()
+                state = dict(zip(["tokens", "rate", "updated_at", "blocked_until", "consecutive_failures", "circuit_open_until"], row))
+                now = time.time()
+                # Refill at the current rate (another process may use a different requests_per_minute, the bucket keeps ours)
+                state["rate"] = min(max(state["rate"], self.min_rate), self.max_rate)
+                state["tokens"] = min(self.burst, state["tokens"] + max(0.0, now - state["updated_at"]) * state["rate"])
+                state["updated_at"] = now
+                result = fn(state, now)
+                self._conn.execute(
+                    """UPDATE rate_limit SET tokens = ?, rate = ?, updated_at = ?, blocked_until = ?,
+                           consecutive_failures = ?, circuit_open_until = ? WHERE id = 1""",
+                    (state["tokens"], state["rate"], state["updated_at"], state["blocked_until"],
+                     state["consecutive_failures"], state["circuit_open_until"])
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    # Function to take one request from the bucket, returns 0 if taken or the seconds to wait before trying again
+    def _try_acquire(self):
+        def take(state, now):
+            if state["circuit_open_until"] > now:
+                raise CircuitOpenError(state["circuit_open_until"] - now)
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                return 0.0
+            return (1 - state["tokens"]) / state["rate"]
+        return self._update(take)
+
+    # Function to wait for a request slot (blocking), raising CircuitOpenError if the circuit is open and
+    # RateLimitTimeoutError instead of waiting longer than max_wait_seconds
+    def acquire(self):
+        deadline = time.time() + self.max_wait_seconds
+        while True:
+            wait = self._try_acquire()
+            if wait == 0:
+                return
+            if time.time() + wait > deadline:
+                raise RateLimitTimeoutError(wait)
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        deadline = time.time() + self.max_wait_seconds
+        while True:
+            # The SQLite lock can be held by another process, so it is taken off the event loop
+            wait = await asyncio.to_thread(self._try_acquire)
+            if wait == 0:
+                return
+            if time.time() + wait > deadline:
+                raise RateLimitTimeoutError(wait)
+            await asyncio.sleep(wait)
+
+    # Function to record a successful call: the rate creeps back up and the circuit closes
+    def record_success(self):
+        def succeed(state, now):
+            state["rate"] = min(self.max_rate, state["rate"] + self.max_rate * RATE_INCREASE_FRACTION)
+            state["consecutive_failures"] = 0
+            state["circuit_open_until"] = 0
+            # A pause set by another caller's 429 after this call went out still holds until it has passed
+            if state["blocked_until"] <= now:
+                state["blocked_until"] = 0
+        self._update(succeed)
+
+    # Function to record a 429: halve the rate, pause everyone for the suggested delay, open the circuit if it keeps happening
+    def record_rate_limited(self, retry_delay = None):
+        def fail(state, now):
+            state["rate"] = max(self.min_rate, state["rate"] * RATE_DECREASE_FACTOR)
+            state["tokens"] = min(state["tokens"], 0.0)
+            state["blocked_until"] = max(state["blocked_until"], now + (retry_delay if retry_delay is not None else DEFAULT_BACKOFF_SECONDS))
+            state["consecutive_failures"] += 1
+            if state["consecutive_failures"] >= CIRCUIT_FAILURE_THRESHOLD:
+                # Half-open afterwards: the next call goes through, and one more 429 opens the circuit again
+                state["circuit_open_until"] = max(state["blocked_until"], now + CIRCUIT_OPEN_SECONDS)
+        self._update(fail)
+
+    # Function to report the shared state (current rate in requests per minute, pause and circuit)
+    def stats(self):
+        def read(state, now):
+            return {
+                "requests_per_minute": round(state["rate"] * 60, 2),
+                "tokens": round(state["tokens"], 2),
+                "blocked_for": max(0.0, state["blocked_until"] - now),
+                "consecutive_failures": state["consecutive_failures"],
+                "circuit_open": state["circuit_open_until"] > now,
+            }
+        return self._update(read)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,120 @@
+import numpy as np
+
+
+#############################
+#-------- Scoring settings --------#
+#############################
+EDUCATION_LEVELS = ["Diploma", "Bachelor", "Master", "PhD"]
+# Weights of the ranking score. With the defaults the ranking is by skill_ratio, like the original sort,
+# experience and education only count when given a weight
+DEFAULT_RANKING_WEIGHTS = {
+    "skill_ratio": 1.0,
+    "experience": 0.0,  # Years above the requirement, scaled by the most experienced candidate in the pool
+    "education": 0.0,  # Education level, scaled so PhD is 1
+}
+DEFAULT_TOP_K = 3
+
+
+#############################
+#-------- Candidate arrays --------#
+#############################
+# Function to return the share of mandatory skills met, as in evaluate_candidate
+def mandatory_ratio(skills_met):
+    if skills_met == "no_mandatory_skills":
+        return 1.0
+    statuses = list(skills_met.values())
+    return statuses.count("meets") / len(statuses) if statuses else 0.0
+
+# Function to turn extracted_info dicts (as built for evaluate_candidate) into arrays over the whole pool:
+# experience and education vectors, a candidates x required skills matrix and the mandatory skill ratio
+def build_candidate_arrays(extracted_infos, required_info):
+    required_skills = list(required_info["skills"])
+    skill_columns = {skill: column for column, skill in enumerate(required_skills)}
+    education_rank = {level: rank for rank, level in enumerate(EDUCATION_LEVELS)}
+
+    n = len(extracted_infos)
+    experience = np.fromiter((extracted_info["experience"] for extracted_info in extracted_infos), dtype = float, count = n)
+    education = np.fromiter(
+        (education_rank.get(extracted_info["education"], -1) for extracted_info in extracted_infos),  # -1 for no recognised degree
+        dtype = np.int8, count = n
+    )
+    mandatory = np.fromiter((mandatory_ratio(extracted_info["skills_met"]) for extracted_info in extracted_infos), dtype = float, count = n)
+
+    # Collect every (candidate, skill) pair first and fill the matrix with one assignment
+    rows = []
+    columns = []
+    for row, extracted_info in enumerate(extracted_infos):
+        for skill in extracted_info["skills"]:
+            column = skill_columns.get(skill)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+    skills = np.zeros((n, len(required_skills)), dtype = bool)
+    skills[rows, columns] = True
+
+    return {
+        "experience": experience,
+        "education": education,
+        "skills": skills,
+        "mandatory": mandatory,
+    }
+
+
+#############################
+#-------- Vectorised scoring --------#
+#############################
+# Function to evaluate every candidate at once, the vectorised counterpart of evaluate_candidate
+# Returns the hard filter results, the skill counts and ratios, and the weighted ranking score
+def score_candidate_arrays(arrays, required_info, weights = None):
+    weights = {**DEFAULT_RANKING_WEIGHTS, **(weights or {})}
+    required_education = EDUCATION_LEVELS.index(required_info["education"])
+
+    meets_experience = arrays["experience"] >= required_info["experience"]
+    meets_education = arrays["education"] >= required_education
+    meets_mandatory = arrays["mandatory"] == 1.0
+    no_of_skills = arrays["skills"].sum(axis = 1)
+    skill_ratio = no_of_skills / max(arrays["skills"].shape[1], 1)  # One division for the whole pool
+
+    extra_experience = np.maximum(arrays["experience"] - required_info["experience"], 0)
+    most_extra_experience = extra_experience.max() if len(extra_experience) else 0
+    experience_score = extra_experience / most_extra_experience if most_extra_experience > 0 else np.zeros_like(extra_experience)
+    education_score = np.maximum(arrays["education"], 0) / (len(EDUCATION_LEVELS) - 1)
+
+    return {
+        "meets_experience": meets_experience,
+        "meets_education": meets_education,
+        "mandatory_ratio": arrays["mandatory"],
+        "passes": meets_experience & meets_education & meets_mandatory,
+        "no_of_skills": no_of_skills,
+        "skill_ratio": skill_ratio,
+        "score": weights["skill_ratio"] * skill_ratio + weights["experience"] * experience_score + weights["education"] * education_score,
+    }
+
+# Function to return the indices of the k best candidates passing the hard filters, best first
+# Uses a partial sort. Ties are broken by tie_breaker (higher first, e.g. BM25 relevance) if given,
+# then by input order like the original stable sort
+def top_k_indices(score, passes, k = DEFAULT_TOP_K, tie_breaker = None):
+    if tie_breaker is None:
+        tie_breaker = np.zeros(len(score))
+    candidates = np.flatnonzero(passes)
+    if k <= 0:
+        return candidates[:0]
+    if len(candidates) > k:
+        candidate_scores = score[candidates]
+        kth_score = np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k]
+        above = candidates[candidate_scores > kth_score]
+        tied = candidates[candidate_scores == kth_score]
+        tied = tied[np.lexsort((tied, -tie_breaker[tied]))][:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    order = np.lexsort((candidates, -tie_breaker[candidates], -score[candidates]))
+    return candidates[order]
+
+# Function to score a pool of extracted_info dicts and pick the top k
+# relevance is an optional per-candidate tie-breaker (e.g. ResumeIndex.score_skills)
+# Returns (indices of the top k candidates, scores from score_candidate_arrays)
+def rank_candidates(extracted_infos, required_info, k = DEFAULT_TOP_K, weights = None, relevance = None):
+    arrays = build_candidate_arrays(extracted_infos, required_info)
+    scores = score_candidate_arrays(arrays, required_info, weights)
+    if relevance is not None:
+        relevance = np.asarray(relevance, dtype = float)
+    return top_k_indices(scores["score"], scores["passes"], k, relevance), scores
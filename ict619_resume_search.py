@@ -0,0 +1,136 @@
+import heapq
+import math
+import re
+from array import array
+
+from ict619_resume_functions import SKILL_TOKEN_PATTERN, normalize_skill_text
+
+
+#############################
+#-------- Search settings --------#
+#############################
+BM25_K1 = 1.2  # Term frequency saturation
+BM25_B = 0.75  # Document length normalisation
+QUERY_PHRASE_PATTERN = re.compile(r'"([^"]+)"|(\S+)')  # "quoted phrases" and single words
+
+
+# Function to split text into tokens the same way the skill matcher does (case and hyphens do not matter)
+def tokenize(text):
+    return SKILL_TOKEN_PATTERN.findall(normalize_skill_text(text))
+
+# Function to split a free-text query into phrases, each a list of tokens ("machine learning" stays together)
+def parse_query(query):
+    phrases = []
+    for quoted, word in QUERY_PHRASE_PATTERN.findall(query):
+        tokens = tokenize(quoted or word)
+        if tokens:
+            phrases.append(tokens)
+    return phrases
+
+
+#############################
+#-------- Inverted index --------#
+#############################
+# In-process inverted index over resume texts with BM25 ranking
+# Postings keep the token positions of every term, so multi-token phrases ("machine learning", "c #") are
+# matched exactly. Documents can be added (or replaced) at any time, the collection statistics are kept up to date.
+class ResumeIndex:
+    def __init__(self, k1 = BM25_K1, b = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}  # term -> {doc number: array of positions}
+        self._doc_numbers = {}  # doc_id -> doc number
+        self._doc_ids = []  # doc number -> doc_id, None once removed
+        self._doc_lengths = []
+        self._doc_terms = []  # doc number -> terms, to remove the postings of a replaced document
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._doc_numbers)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_numbers
+
+    # Function to add a document, replacing the previous text if doc_id is already indexed
+    def add(self, doc_id, text):
+        if doc_id in self._doc_numbers:
+            self.remove(doc_id)
+
+        doc_number = len(self._doc_ids)
+        tokens = tokenize(text)
+        positions = {}
+        for position, token in enumerate(tokens):
+            positions.setdefault(token, array("I")).append(position)
+        for term, term_positions in positions.items():
+            self._postings.setdefault(term, {})[doc_number] = term_positions
+
+        self._doc_numbers[doc_id] = doc_number
+        self._doc_ids.append(doc_id)
+        self._doc_lengths.append(len(tokens))
+        self._doc_terms.append(tuple(positions))
+        self._total_length += len(tokens)
+
+    def remove(self, doc_id):
+        doc_number = self._doc_numbers.pop(doc_id)
+        for term in self._doc_terms[doc_number]:
+            postings = self._postings[term]
+            del postings[doc_number]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths[doc_number]
+        self._doc_ids[doc_number] = None
+        self._doc_terms[doc_number] = ()
+
+    # Function to return {doc number: frequency} of a phrase (a single token is a one-word phrase)
+    def _phrase_frequencies(self, tokens):
+        postings = [self._postings.get(token) for token in tokens]
+        if not all(postings):
+            return {}
+        if len(tokens) == 1:
+            return {doc_number: len(positions) for doc_number, positions in postings[0].items()}
+
+        # Walk the documents of the rarest token and check the other tokens at the following positions
+        frequencies = {}
+        rarest = min(range(len(tokens)), key = lambda i: len(postings[i]))
+        for doc_number in postings[rarest]:
+            if not all(doc_number in term_postings for term_postings in postings):
+                continue
+            starts = set(postings[0][doc_number])
+            for offset in range(1, len(tokens)):
+                starts.intersection_update(position - offset for position in postings[offset][doc_number])
+                if not starts:
+                    break
+            if starts:
+                frequencies[doc_number] = len(starts)
+        return frequencies
+
+    # Function to add the BM25 score of every phrase to scores ({doc number: score})
+    def _score_phrases(self, phrases, scores):
+        n = len(self._doc_numbers)
+        if n == 0:
+            return scores
+        average_length = self._total_length / n
+        for tokens in phrases:
+            frequencies = self._phrase_frequencies(tokens)
+            if not frequencies:
+                continue
+            idf = math.log(1 + (n - len(frequencies) + 0.5) / (len(frequencies) + 0.5))
+            for doc_number, frequency in frequencies.items():
+                length_norm = 1 - self.b + self.b * self._doc_lengths[doc_number] / average_length
+                scores[doc_number] = scores.get(doc_number, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return scores
+
+    # Function to run a free-text query ("quoted phrases" are matched as phrases), returns the k best (doc_id, score)
+    def search(self, query, k = 10):
+        scores = self._score_phrases(parse_query(query), {})
+        best = heapq.nlargest(k, scores.items(), key = lambda item: (item[1], -item[0]))
+        return [(self._doc_ids[doc_number], score) for doc_number, score in best]
+
+    # Function to score documents against a skill list, each skill is one phrase ("machine learning")
+    # Returns {doc_id: score} for the given doc_ids (0.0 if no skill matched), or for every matching document
+    def score_skills(self, skills, doc_ids = None):
+        phrases = [tokens for tokens in (tokenize(skill) for skill in skills) if tokens]
+        scores = self._score_phrases(phrases, {})
+        if doc_ids is None:
+            return {self._doc_ids[doc_number]: score for doc_number, score in scores.items()}
+        return {doc_id: scores.get(self._doc_numbers.get(doc_id), 0.0) for doc_id in doc_ids}
@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import threading
+import time
+
+from ict619_resume_functions import extract_skills, normalize_skill_text
+from ict619_resume_scoring import EDUCATION_LEVELS
+
+
+#############################
+#-------- Store settings --------#
+#############################
+DEFAULT_STORE_PATH = os.getenv("CANDIDATE_STORE_PATH", "candidate_store.sqlite3")
+
+
+# Function to turn a skill name into the key used in the skill tables (case and hyphens do not matter)
+def skill_key(skill):
+    return normalize_skill_text(skill).strip()
+
+
+#############################
+#-------- Candidate store --------#
+#############################
+# Persistent store of candidate profiles (the output of extract_profiles), so a new requisition can be
+# answered across every past applicant without pdfplumber or Gemini.
+# candidate_skills is the skill -> candidate table for every skill ever queried (listed in indexed_skills).
+# A skill queried for the first time is matched once against the stored resume texts and a new candidate is
+# matched against every skill queried so far, so queries only use SQL.
+class CandidateStore:
+    def __init__(self, path = DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        # Streamlit reruns the script on different threads, so the connection is shared behind a lock
+        self._conn = sqlite3.connect(path, check_same_thread = False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY,
+                pdf_hash TEXT NOT NULL UNIQUE,
+                file_name TEXT,
+                name TEXT,
+                email TEXT,
+                phone TEXT,
+                experience REAL NOT NULL,
+                education TEXT,
+                education_rank INTEGER NOT NULL,
+                resume_text TEXT NOT NULL,
+                skills_start INTEGER,
+                skills_end INTEGER,
+                extraction_mode TEXT,
+                used_local_layout INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates (experience);
+            CREATE INDEX IF NOT EXISTS idx_candidates_education_rank ON candidates (education_rank);
+
+            -- One row per skill found in a candidate's resume
+            CREATE TABLE IF NOT EXISTS candidate_skills (
+                skill TEXT NOT NULL,
+                candidate_id INTEGER NOT NULL,
+                PRIMARY KEY (skill, candidate_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_candidate_skills_candidate ON candidate_skills (candidate_id);
+
+            -- Skills recorded in candidate_skills for every stored candidate
+            CREATE TABLE IF NOT EXISTS indexed_skills (
+                skill TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS skill_verdicts (
+                candidate_id INTEGER NOT NULL,
+                skill TEXT NOT NULL,
+                years INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                PRIMARY KEY (candidate_id, skill, years)
+            ) WITHOUT ROWID;
+        """)
+        self._conn.commit()
+
+    # Function to save (or replace) the profile of one resume, a replaced profile keeps its place in the store
+    def add_profile(self, pdf_hash, profile, file_name = None, extraction_mode = None):
+        info = profile["info"] if isinstance(profile["info"], dict) else {}
+        skills_span = profile["skills_span"] or (None, None)
+        education_rank = EDUCATION_LEVELS.index(profile["education"]) if profile["education"] in EDUCATION_LEVELS else -1
+
+        with self._lock:
+            candidate_id = self._conn.execute(
+                """INSERT INTO candidates (pdf_hash, file_name, name, email, phone, experience, education,
+                       education_rank, resume_text, skills_start, skills_end, extraction_mode, used_local_layout, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (pdf_hash) DO UPDATE SET
+                       file_name = excluded.file_name, name = excluded.name, email = excluded.email,
+                       phone = excluded.phone, experience = excluded.experience, education = excluded.education,
+                       education_rank = excluded.education_rank, resume_text = excluded.resume_text,
+                       skills_start = excluded.skills_start, skills_end = excluded.skills_end,
+                       extraction_mode = excluded.extraction_mode, used_local_layout = excluded.used_local_layout,
+                       updated_at = excluded.updated_at
+                   RETURNING id""",
+                (pdf_hash, file_name, info.get("name"), info.get("email"), info.get("phone"),
+                 profile["experience"], profile["education"], education_rank, profile["resume_text"],
+                 skills_span[0], skills_span[1], extraction_mode, int(profile["used_local_layout"]), time.time())
+            ).fetchone()[0]
+            self._conn.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+            self._write_skill_verdicts(candidate_id, profile["skill_verdicts"])
+
+            indexed = [key for (key,) in self._conn.execute("SELECT skill FROM indexed_skills")]
+            self._write_candidate_skills({candidate_id: indexed})
+            self._conn.commit()
+
+    # Function to save the mandatory skill verdicts of a profile (e.g. after update_skill_verdicts)
+    def add_skill_verdicts(self, pdf_hash, skill_verdicts):
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM candidates WHERE pdf_hash = ?", (pdf_hash,)).fetchone()
+            if row is not None:
+                self._write_skill_verdicts(row[0], skill_verdicts)
+                self._conn.commit()
+
+    def _write_skill_verdicts(self, candidate_id, skill_verdicts):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO skill_verdicts (candidate_id, skill, years, status) VALUES (?, ?, ?, ?)",
+            [(candidate_id, skill, years, status) for skill, verdicts in skill_verdicts.items() for years, status in verdicts.items()]
+        )
+
+    # Function to rebuild a profile (as returned by extract_profile_async) from the store, or None if unknown
+    def get_profile(self, pdf_hash, extraction_mode = None):
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT id, name, email, phone, experience, education, resume_text, skills_start, skills_end,
+                          extraction_mode, used_local_layout
+                   FROM candidates WHERE pdf_hash = ?""",
+                (pdf_hash,)
+            ).fetchone()
+            if row is None or (extraction_mode is not None and row[9] != extraction_mode):
+                return None
+            verdict_rows = self._conn.execute(
+                "SELECT skill, years, status FROM skill_verdicts WHERE candidate_id = ?", (row[0],)
+            ).fetchall()
+
+        skill_verdicts = {}
+        for skill, years, status in verdict_rows:
+            skill_verdicts.setdefault(skill, {})[years] = status
+        return {
+            "info": {"name": row[1], "email": row[2], "phone": row[3]},
+            "resume_text": row[6],
+            "skills_span": (row[7], row[8]) if row[7] is not None else None,
+            "experience": row[4],
+            "education": row[5],
+            "skill_verdicts": skill_verdicts,
+            "processing_time": 0.0,
+            "used_local_layout": bool(row[10]),
+        }
+
+    # Function to match skills never queried before against every stored resume, returns the new skills
+    def index_skills(self, skills):
+        keys = {skill_key(skill) for skill in skills} - {""}
+        with self._lock:
+            indexed = {key for (key,) in self._conn.execute("SELECT skill FROM indexed_skills")}
+            new_keys = sorted(keys - indexed)
+            if not new_keys:
+                return []
+
+            candidate_ids = [candidate_id for (candidate_id,) in self._conn.execute("SELECT id FROM candidates")]
+            self._write_candidate_skills({candidate_id: new_keys for candidate_id in candidate_ids})
+            self._conn.executemany("INSERT OR IGNORE INTO indexed_skills (skill) VALUES (?)", [(key,) for key in new_keys])
+            self._conn.commit()
+        return new_keys
+
+    # Function to record which of the given skills appear in each candidate's resume (skills section if found)
+    def _write_candidate_skills(self, skill_keys_by_candidate):
+        rows = []
+        for candidate_id, keys in skill_keys_by_candidate.items():
+            if not keys:
+                continue
+            resume_text, skills_start, skills_end = self._conn.execute(
+                "SELECT resume_text, skills_start, skills_end FROM candidates WHERE id = ?", (candidate_id,)
+            ).fetchone()
+            skills_section = ("Skills", skills_start, skills_end) if skills_start is not None else None
+            found = extract_skills(skills_section, resume_text, tuple(keys))
+            rows.extend((key, candidate_id) for key in found)
+        self._conn.executemany("INSERT OR IGNORE INTO candidate_skills (skill, candidate_id) VALUES (?, ?)", rows)
+
+    # Function to answer a required_info query over every stored candidate
+    # Returns the candidates meeting experience, education and mandatory skills, most skills first
+    # (ties by oldest first), and the number of candidates whose mandatory skill verdicts are not known yet
+    def query(self, required_info, k = None):
+        required_skills = list(dict.fromkeys(skill_key(skill) for skill in required_info["skills"]))
+        self.index_skills(required_skills)
+
+        conditions = ["c.experience >= ?", "c.education_rank >= ?"]
+        params = [required_info["experience"], EDUCATION_LEVELS.index(required_info["education"])]
+        # A verdict for more years that meets also meets fewer years, like lookup_skill_verdict
+        for skill, years in required_info["mandatory_skills"].items():
+            conditions.append(
+                "EXISTS (SELECT 1 FROM skill_verdicts v WHERE v.candidate_id = c.id AND v.skill = ? AND v.years >= ? AND v.status = 'meets')"
+            )
+            params.extend([skill.lower(), years])
+
+        # One primary key probe per (candidate, required skill)
+        skill_count = " + ".join(
+            "EXISTS (SELECT 1 FROM candidate_skills s WHERE s.skill = ? AND s.candidate_id = c.id)" for _ in required_skills
+        ) or "0"
+        sql = f"""
+            SELECT c.pdf_hash, c.file_name, c.name, c.email, c.phone, c.experience, c.education, {skill_count} AS no_of_skills
+            FROM candidates c
+            WHERE {' AND '.join(conditions)}
+            ORDER BY no_of_skills DESC, c.id ASC
+        """
+        if k is not None:
+            sql += " LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, [*required_skills, *params] + ([k] if k is not None else [])).fetchall()
+            unknown_verdicts = self._count_unknown_verdicts(required_info["mandatory_skills"])
+
+        candidates = [{
+            "pdf_hash": pdf_hash,
+            "file_name": file_name,
+            "info": {"name": name, "email": email, "phone": phone},
+            "experience": experience,
+            "education": education,
+            "no_of_skills": no_of_skills,
+            "skill_ratio": no_of_skills / len(required_skills) if required_skills else 0,
+        } for pdf_hash, file_name, name, email, phone, experience, education, no_of_skills in rows]
+        return candidates, unknown_verdicts
+
+    # Candidates for which some mandatory skill has no verdict that answers the required years
+    def _count_unknown_verdicts(self, skills_experience):
+        if not skills_experience:
+            return 0
+        conditions = []
+        params = []
+        for skill, years in skills_experience.items():
+            conditions.append(
+                """NOT EXISTS (SELECT 1 FROM skill_verdicts v WHERE v.candidate_id = c.id AND v.skill = ?
+                   AND ((v.years >= ? AND v.status = 'meets') OR (v.years <= ? AND v.status = 'does not meet')))"""
+            )
+            params.extend([skill.lower(), years, years])
+        return self._conn.execute(f"SELECT COUNT(*) FROM candidates c WHERE {' OR '.join(conditions)}", params).fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,7 +1,45 @@
+import logging
+import time
 import streamlit as st
 from streamlit_tags import st_tags
-import time
-from ict619_resume_functions import extract_text_from_pdf, get_section_indices, extract_skills, get_highest_education, extract_year, calculate_experience, extract_experience_for_skills, evaluate_candidate, extract_info, extract_resume_sections
+from ict619_resume_functions import (
+    extract_pdf_layouts_cached, EXTRACTION_MODES, local_prefilter, meets_section_checks, count_extraction_calls,
+    get_local_resume_text, new_cascade_stats, record_cascade_rejection, get_prompt_size_stats, summarize_prompt_sizes,
+)
+from ict619_resume_engine import extract_profiles, update_skill_verdicts, get_profile_extracted_info, lookup_skill_verdict
+from ict619_resume_cache import ExtractionCache, hash_pdf_bytes
+from ict619_resume_scoring import rank_candidates, DEFAULT_TOP_K
+from ict619_resume_store import CandidateStore
+from ict619_resume_search import ResumeIndex
+from ict619_resume_ratelimit import CircuitOpenError, RateLimitTimeoutError
+from ict619_resume_queue import JobQueue
+from ict619_resume_metrics import metrics, span, summarize_spans, summarize_counters
+from ict619_resume_dedup import DuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+
+# On-disk cache of extraction results, opened once per Streamlit server
+@st.cache_resource
+def get_extraction_cache():
+    return ExtractionCache()
+
+extraction_cache = get_extraction_cache()
+
+# Profiles of every applicant screened so far, opened once per Streamlit server
+@st.cache_resource
+def get_candidate_store():
+    return CandidateStore()
+
+candidate_store = get_candidate_store()
+
+# Queue of background screening jobs, drained by ict619_resume_worker.py processes
+@st.cache_resource
+def get_job_queue():
+    return JobQueue()
+
+job_queue = get_job_queue()
+JOB_POLL_SECONDS = 2
 
 
 # Streamlit UI
@@ -62,6 +100,40 @@ required_info = {
     "mandatory_skills": skills_experience
 }
 
+# Number of resumes screened by Gemini at the same time
+max_concurrency = st.number_input(
+    "Number of resumes to evaluate at the same time:",
+    min_value = 1,
+    max_value = 20,
+    value = 5,
+    step = 1,
+    format = "%d"
+)
+
+# Fused sends one structured Gemini request per resume, three_calls keeps the original three requests
+extraction_mode = st.selectbox(
+    "Select the Gemini extraction mode:",
+    EXTRACTION_MODES
+)
+
+# Candidates that clearly fail the requirements on the raw text are not sent to Gemini
+use_cascade = st.checkbox("Skip Gemini for resumes that fail the local checks (experience, education, mandatory skill keywords)", value = True)
+# Fewer requests per minute for low quota tiers, at the cost of a short wait while a batch fills up
+use_batching = st.checkbox("Pack the contact info and mandatory skill checks of several resumes into one Gemini request", value = False)
+show_timings = st.checkbox("Show where the time of the last evaluation went (per stage, retries, quota errors, cache hits)", value = False)
+
+# Number of top candidates to show
+top_k = st.number_input(
+    "Number of top candidates to show:",
+    min_value = 1,
+    value = DEFAULT_TOP_K,
+    step = 1,
+    format = "%d"
+)
+
+# Optional free-text search over the uploaded resumes ("quoted phrases" are matched exactly)
+search_query = st.text_input("Search the resumes (optional):")
+
 # File uploader
 uploaded_files = st.file_uploader("Upload your resume (PDF)", type=["pdf"], accept_multiple_files=True)
 
@@ -76,103 +148,330 @@ if len(skills_required) == 0 or len(uploaded_files) == 0:
     if len(uploaded_files) == 0:
         st.warning("Please upload at least one resume.")
 else:
+    # Profiles are extracted once per uploaded file and kept for the session, keyed by PDF hash and extraction mode
+    if "profiles" not in st.session_state:
+        st.session_state.profiles = {}
+    profiles = st.session_state.profiles
+    pdf_hashes = [hash_pdf_bytes(uploaded_file) for uploaded_file in uploaded_files]
+    profile_keys = [(pdf_hash, extraction_mode) for pdf_hash in pdf_hashes]
+
+    # Layouts of the resumes the local checks kept away from Gemini, checked again when the requirements change
+    if "prefiltered" not in st.session_state:
+        st.session_state.prefiltered = {}
+    prefiltered = st.session_state.prefiltered
+    def may_pass_now(key):
+        return not use_cascade or local_prefilter(prefiltered[key]["text"], required_info)[0]
+
+    # Resumes of the same candidate (same file, same text or a slightly edited copy), keyed by PDF hash:
+    # a copy reuses the profile of the first one and is ranked once
+    if "duplicate_index" not in st.session_state:
+        st.session_state.duplicate_index = DuplicateIndex()
+    duplicate_index = st.session_state.duplicate_index
+
     if st.button("Evaluate Resume(s)"):
-        if uploaded_files:
-            candidates_data = []
+        # Applicants screened in an earlier session come back from the candidate store
+        for i, key in enumerate(profile_keys):
+            if key not in profiles:
+                stored_profile = candidate_store.get_profile(pdf_hashes[i], extraction_mode)
+                if stored_profile is not None:
+                    profiles[key] = stored_profile
+        # The same file uploaded twice is read once, both uploads share its profile
+        first_upload = {}
+        for i, key in enumerate(profile_keys):
+            first_upload.setdefault(key, i)
+        new_files = [i for i, key in enumerate(profile_keys) if first_upload[key] == i and key not in profiles and (key not in prefiltered or may_pass_now(key))]
+
+        # Stored profiles keep only the restructured text, so their copies are found from the pdfplumber
+        # text of their PDF like the new uploads below (read from the extraction cache if read before)
+        unindexed = [i for i, key in enumerate(profile_keys) if first_upload[key] == i and profiles.get(key) is not None and pdf_hashes[i] not in duplicate_index]
+        if unindexed:
+            stored_layouts = extract_pdf_layouts_cached([uploaded_files[i] for i in unindexed], [pdf_hashes[i] for i in unindexed], extraction_cache)
+            for i, layout in zip(unindexed, stored_layouts):
+                with span("dedup"):
+                    duplicate_index.add(pdf_hashes[i], pdf_hashes[i], layout["text"] if layout is not None else None)
+        if new_files:
             progress_placeholder = st.empty()
 
-            # Process each uploaded file
-            for uploaded_file in uploaded_files:
-                progress_placeholder.subheader(f"Evaluating {uploaded_file.name}")
-
-                start_time = time.time()
-                
-                # Extract text from the current PDF
-                initial_resume = extract_text_from_pdf(uploaded_file) # Using pdf plumber first
-                resume_text = extract_resume_sections(initial_resume) # Pass text extracted to Gemini
-
-                # Extract name, email and phone number
-                candidate_info = extract_info(resume_text)
-
-                # Extract education, work and skills section
-                section_index = get_section_indices(resume_text)
-                education_section = next((item for item in section_index if item[0] == "Education"), None)
-                work_section = next((item for item in section_index if item[0] == "Work Experience"), None)
-                skills_section = next((item for item in section_index if item[0] == "Skills"), None) # Find the tuple corresponding to "Skills"
-                
-                # Extract skills, highest education and working years from respective sections
-                extracted_skills = extract_skills(skills_section, resume_text, skills_required)
-                highest_education = get_highest_education(education_section, resume_text)
-                work_years = extract_year(work_section, resume_text)
-                working_experience = calculate_experience(work_years)
-
-                # Extract experience for required skills using Gemini
-                if skills_experience != {}:
-                    skills_experience_from_resume = extract_experience_for_skills(resume_text, skills_experience)
-                else: #  Handle if no mandatory skills entered
-                    skills_experience_from_resume = "no_mandatory_skills"
-
-                # Store extracted information
-                extracted_info = {
-                    "experience": working_experience,
-                    "education": highest_education,
-                    "skills": extracted_skills,
-                    "skills_met": skills_experience_from_resume
-                }
-
-
-                # Evaluate candidate based on extracted info vs required info
-                result = evaluate_candidate(             
-                    extracted_info,
-                    required_info
+            # Extract text from every new PDF using pdfplumber first, in parallel worker processes
+            # (skipped for PDFs already in the cache)
+            cache_stats_before = extraction_cache.stats()
+            prompt_stats_before = get_prompt_size_stats()
+            metrics_before = metrics.snapshot()
+            progress_placeholder.subheader(f"Reading {len(new_files)} resume(s)")
+            pdf_layouts = extract_pdf_layouts_cached([uploaded_files[i] for i in new_files], [pdf_hashes[i] for i in new_files], extraction_cache)
+
+            # Skip PDFs that timed out or could not be parsed instead of failing the whole batch
+            readable = []
+            for i, layout in zip(new_files, pdf_layouts):
+                if layout is None:
+                    profiles[profile_keys[i]] = None  # Not read again on every rerun
+                else:
+                    readable.append((i, layout))
+
+            # Copies of a resume read in this run or profiled earlier get no Gemini call of their own
+            duplicates = []  # (i, layout, PDF hash of the first resume)
+            readable_hashes = {pdf_hashes[i] for i, _ in readable}
+            unique = []
+            for i, layout in readable:
+                with span("dedup"):
+                    canonical_hash, kind, _ = duplicate_index.add(pdf_hashes[i], pdf_hashes[i], layout["text"])
+                if canonical_hash != pdf_hashes[i] and (canonical_hash in readable_hashes or (canonical_hash, extraction_mode) in profiles):
+                    duplicates.append((i, layout, canonical_hash))
+                else:
+                    unique.append((i, layout))
+            readable = unique
+
+            # Cascade stage 1: resumes that clearly fail the requirements get no Gemini call
+            if use_cascade:
+                cascade_stats = new_cascade_stats()
+                kept = []
+                for i, layout in readable:
+                    cascade_stats["resumes"] += 1
+                    with span("local_prefilter"):
+                        can_pass = local_prefilter(layout["text"], required_info)[0]
+                    if can_pass:
+                        kept.append((i, layout))
+                    else:
+                        prefiltered[profile_keys[i]] = layout
+                        # A resume with a trusted local layout would not have needed the restructuring call
+                        calls = count_extraction_calls(extraction_mode, skills_experience, get_local_resume_text(layout) is not None)
+                        record_cascade_rejection(cascade_stats, "local_checks", calls)
+                st.session_state.last_cascade_stats = (
+                    f"Local checks: {cascade_stats['rejected']['local_checks']} resume(s) not sent to Gemini "
+                    f"({cascade_stats['calls_saved']['local_checks']} call(s) saved)"
                 )
+                readable = kept
+            for i, _ in readable:
+                prefiltered.pop(profile_keys[i], None)
 
-                end_time = time.time()
-                # Calculate processing time in seconds
-                processing_time = end_time - start_time
-                print("processing time for", candidate_info['name'], ":", processing_time, "s")
-                print("----------")
-                print("working experience:", working_experience, "years")
-                print("education level:", highest_education)
-                print("skills:", extracted_skills)
-                print("mandatory skills met:", skills_experience_from_resume)
-                print("===========================")
-                
-                # Ensure candidate meets mandatory criteria
-                if result[:3] == [1, 1, 1.0]:  
-                    candidates_data.append({
-                        "info": candidate_info,
-                        "skill_ratio": result[3], 
-                        "no_of_skills": result[4],
-                        "filename": uploaded_file.name
-                    })
-
-            # Results output
-            progress_placeholder = progress_placeholder.subheader("The top 3 candidates that meet the following criteria:")
-            if skills_experience_from_resume != "no_mandatory_skills":
-                st.markdown(f"""
-                    - **{work_years_required}** years of working experience  
-                    - At least a **{education_required}** degree
-                    - All mandatory skills **({', '.join(specific_skills_required)})** with the required experience level  
-                    - Possess the highest number of additional relevant skills (out of **{len(required_info['skills'])}** skills)
-                """)
-            else:
-                st.markdown(f"""
-                    - **{work_years_required}** years of working experience  
-                    - At least a **{education_required}** degree
-                    - Possess the highest number of additional relevant skills (out of **{len(required_info['skills'])}** skills)
-                """)
-            st.markdown("___")
-            # Sort candidates by skill_ratio in descending order
-            top_candidates = sorted(candidates_data, key=lambda c: c["skill_ratio"], reverse=True)
-
-            # Select the top 3 candidates
-            selected_candidates = top_candidates[:3]
-
-            # Display final selected candidates (only once)
-            if selected_candidates:
-                for candidate in selected_candidates:
-                    st.write(f"✅ {candidate['filename']} | {candidate['info']['name']} | {candidate['info']['email']} | {candidate['info']['phone']} | Number of skills: {candidate['no_of_skills']}/{len(required_info['skills'])}")
+            # Extract the requirement-independent profiles concurrently with Gemini
+            evaluated_files = []
+            progress_placeholder.subheader(f"Evaluating {len(readable)} resume(s)")
+            def show_progress(index, profile):
+                evaluated_files.append(uploaded_files[readable[index][0]].name)
+                progress_placeholder.subheader(f"Evaluated {evaluated_files[-1]} ({len(evaluated_files)}/{len(readable)})")
+
+            try:
+                new_profiles = extract_profiles(
+                    [layout["text"] for _, layout in readable],
+                    max_concurrency = max_concurrency, on_result = show_progress,
+                    pdf_hashes = [pdf_hashes[i] for i, _ in readable], cache = extraction_cache,
+                    extraction_mode = extraction_mode, local_layouts = [layout for _, layout in readable],
+                    skills_experience = skills_experience, batch = use_batching
+                )
+            except (CircuitOpenError, RateLimitTimeoutError) as e:  # Shared with every other session, so waiting here would not help
+                progress_placeholder.empty()
+                st.error(f"⚠️ {e}. Please try again later.")
+                st.stop()
+
+            for (i, _), profile in zip(readable, new_profiles):
+                profiles[profile_keys[i]] = profile
+                candidate_store.add_profile(pdf_hashes[i], profile, uploaded_files[i].name, extraction_mode)
+                logger.info("profile name=%s seconds=%.2f experience=%s education=%s local_layout=%s",
+                            profile["info"].get("name"), profile["processing_time"], profile["experience"],
+                            profile["education"], profile["used_local_layout"])
+            for i, layout, canonical_hash in duplicates:
+                canonical_key = (canonical_hash, extraction_mode)
+                if profiles.get(canonical_key) is not None:
+                    profiles[profile_keys[i]] = profiles[canonical_key]
+                    candidate_store.add_profile(pdf_hashes[i], profiles[canonical_key], uploaded_files[i].name, extraction_mode)
+                else:  # The first resume was kept away from Gemini by the local checks, so is this copy
+                    prefiltered[profile_keys[i]] = layout
+            if duplicates:
+                st.session_state.last_duplicate_stats = f"Duplicates: {len(duplicates)} resume(s) reused the extraction of an earlier copy"
+
+            progress_placeholder.empty()
+            cache_stats = extraction_cache.stats()
+            st.session_state.last_cache_stats = (
+                f"Extraction cache: {cache_stats['hits'] - cache_stats_before['hits']} hits, "
+                f"{cache_stats['misses'] - cache_stats_before['misses']} misses ({cache_stats['entries']} entries stored)"
+            )
+            st.session_state.last_prompt_stats = summarize_prompt_sizes(prompt_stats_before, get_prompt_size_stats())
+            metrics_after = metrics.snapshot()
+            st.session_state.last_run_spans = summarize_spans(metrics_before, metrics_after)
+            st.session_state.last_run_counters = summarize_counters(metrics_before, metrics_after)
+            metrics.write_prometheus()  # Only if METRICS_PATH is set
+
+    # Once every upload has a profile, any change to the requirements only re-scores the profiles,
+    # so the ranking below is rebuilt on every rerun without pressing the button again
+    if all(key in profiles or key in prefiltered for key in profile_keys):
+        for uploaded_file, key in zip(uploaded_files, profile_keys):
+            if profiles.get(key, False) is None:
+                st.warning(f"Could not read {uploaded_file.name}, it was skipped.")
+        # Each candidate is ranked once, copies are listed below the ranking
+        scored_files = []
+        scored_hashes = []
+        collapsed_files = []
+        ranked_candidates = set()  # PDF hash of the first resume of each candidate
+        for uploaded_file, key in zip(uploaded_files, profile_keys):
+            if profiles.get(key) is None:
+                continue
+            canonical_hash = duplicate_index.canonical_key(key[0])
+            if canonical_hash in ranked_candidates:
+                collapsed_files.append(uploaded_file.name)
+                continue
+            ranked_candidates.add(canonical_hash)
+            scored_files.append((uploaded_file, profiles[key]))
+            scored_hashes.append(key[0])
+        reconsidered = [key for key in profile_keys if key in prefiltered and key not in profiles and may_pass_now(key)]
+        if reconsidered:
+            st.info(f"{len(reconsidered)} resume(s) skipped by the local checks may meet the new criteria. Press 'Evaluate Resume(s)' to screen them.")
+
+        # Only mandatory skill verdicts never asked before go back to Gemini, and with the cascade
+        # only for candidates meeting the experience and education requirements (cascade stage 2)
+        verdict_profiles = [profile for _, profile in scored_files if not use_cascade or meets_section_checks(profile, required_info)]
+        section_rejected = sum(
+            1 for _, profile in scored_files
+            if use_cascade and not meets_section_checks(profile, required_info)
+            and any(lookup_skill_verdict(profile, skill, years) is None for skill, years in skills_experience.items())
+        )
+        with st.spinner("Checking mandatory skills..."):
+            try:
+                verdict_calls = update_skill_verdicts(verdict_profiles, skills_experience, max_concurrency, batch = use_batching)
+            except (CircuitOpenError, RateLimitTimeoutError) as e:
+                st.error(f"⚠️ {e}. Please try again later.")
+                st.stop()
+        if verdict_calls:
+            for key in profile_keys:
+                if profiles.get(key) is not None:  # Not in profiles when the local checks rejected it
+                    candidate_store.add_skill_verdicts(key[0], profiles[key]["skill_verdicts"])
+
+        # Full-text index of the session's resumes, new profiles are added incrementally
+        if "resume_index" not in st.session_state:
+            st.session_state.resume_index = ResumeIndex()
+        resume_index = st.session_state.resume_index
+        for pdf_hash, (_, profile) in zip(scored_hashes, scored_files):
+            if pdf_hash not in resume_index:
+                resume_index.add(pdf_hash, profile["resume_text"])
+
+        # Score the whole pool at once, only candidates meeting the mandatory criteria are ranked
+        # Candidates with the same skill ratio are ordered by BM25 relevance to the required skills
+        extracted_infos = [get_profile_extracted_info(profile, required_info) for _, profile in scored_files]
+        skill_relevance = resume_index.score_skills(required_info["skills"], scored_hashes)
+        top_indices, scores = rank_candidates(
+            extracted_infos, required_info, k = top_k,
+            relevance = [skill_relevance[pdf_hash] for pdf_hash in scored_hashes]
+        )
+
+        # Results output
+        st.subheader(f"The top {top_k} candidates that meet the following criteria:")
+        if skills_experience != {}:
+            st.markdown(f"""
+                - **{work_years_required}** years of working experience  
+                - At least a **{education_required}** degree
+                - All mandatory skills **({', '.join(specific_skills_required)})** with the required experience level  
+                - Possess the highest number of additional relevant skills (out of **{len(required_info['skills'])}** skills)
+            """)
+        else:
+            st.markdown(f"""
+                - **{work_years_required}** years of working experience  
+                - At least a **{education_required}** degree
+                - Possess the highest number of additional relevant skills (out of **{len(required_info['skills'])}** skills)
+            """)
+        st.markdown("___")
+        # Display final selected candidates (only once)
+        if len(top_indices) > 0:
+            for i in top_indices:
+                uploaded_file, profile = scored_files[i]
+                candidate_info = profile["info"]
+                st.write(f"✅ {uploaded_file.name} | {candidate_info['name']} | {candidate_info['email']} | {candidate_info['phone']} | Number of skills: {scores['no_of_skills'][i]}/{len(required_info['skills'])}")
+        else:
+            st.write("❌ No candidates meet the criteria.")
+
+        # Free-text search results, whether or not the candidates meet the criteria
+        if search_query.strip():
+            file_names = {pdf_hash: uploaded_file.name for pdf_hash, (uploaded_file, _) in zip(scored_hashes, scored_files)}
+            # The index may also hold resumes removed from the uploader, only the current ones are shown
+            search_results = [result for result in resume_index.search(search_query, k = len(resume_index)) if result[0] in file_names][:top_k]
+            st.subheader(f"Resumes matching \"{search_query}\":")
+            if search_results:
+                for pdf_hash, relevance in search_results:
+                    st.write(f"🔎 {file_names[pdf_hash]} | relevance {relevance:.2f}")
             else:
-                st.write("❌ No candidates meet the criteria.")
+                st.write("❌ No resumes match the search.")
+
+        if collapsed_files:
+            st.caption(f"Duplicate resumes ranked once: {', '.join(collapsed_files)}")
+
+        # Cache hits of the last extraction and Gemini calls made for this ranking
+        if "last_cache_stats" in st.session_state:
+            st.caption(st.session_state.last_cache_stats)
+        if "last_prompt_stats" in st.session_state:
+            st.caption(st.session_state.last_prompt_stats)
+        if "last_duplicate_stats" in st.session_state:
+            st.caption(st.session_state.last_duplicate_stats)
+        st.caption(f"Mandatory skill checks sent to Gemini for this ranking: {verdict_calls}")
+        if show_timings and "last_run_spans" in st.session_state:
+            # Stages overlap: screen_resume / extract_profile contain the llm_request spans, which contain the llm_call attempts
+            st.dataframe(st.session_state.last_run_spans, use_container_width = True)
+            st.caption(", ".join(f"{name}: {value}" for name, value in st.session_state.last_run_counters.items()) or "No retries, quota errors or cache lookups")
+        if use_cascade:
+            if "last_cascade_stats" in st.session_state:
+                st.caption(st.session_state.last_cascade_stats)
+            st.caption(f"Section checks: {section_rejected} mandatory skill check(s) skipped for candidates below the experience or education requirement")
+
+
+#############################
+#-------- Background screening --------#
+#############################
+# Large batches are screened by worker processes (python ict619_resume_worker.py, as many as needed) instead
+# of this session, which only polls the job and shows the results as they come in
+poll_job = False
+if len(skills_required) > 0 and len(uploaded_files) > 0:
+    if st.button("Screen in the background with the worker queue"):
+        st.session_state.job_id = job_queue.submit_job(
+            [(uploaded_file.name, uploaded_file) for uploaded_file in uploaded_files], required_info,
+            extraction_mode = extraction_mode, cascade = use_cascade, batch = use_batching
+        )
+        st.session_state.job_skill_count = len(required_info["skills"])
+
+if "job_id" in st.session_state:
+    job_id = st.session_state.job_id
+    job_progress = job_queue.progress(job_id)
+    finished_count = job_progress["done"] + job_progress["failed"]
+    st.subheader(f"Background job #{job_id}")
+    st.progress(finished_count / max(job_progress["total"], 1), text = f"{finished_count}/{job_progress['total']} resume(s) screened")
+    if job_progress["running"] == 0 and job_progress["queued"] > 0:
+        st.caption("Waiting for a worker. Start one with: python ict619_resume_worker.py")
+
+    # The job keeps the requirements it was submitted with
+    job_records = []
+    for item in job_queue.results(job_id):
+        if item["status"] == "failed":
+            st.warning(f"Could not screen {item['file_name']}: {item['error']}")
+        else:
+            job_records.append(item["result"])
+    # One entry per candidate, copies of a resume are screened but not ranked again
+    job_top = sorted((record for record in job_records if record["meets_requirements"] and record.get("duplicate_of") is None), key = lambda record: record["skill_ratio"], reverse = True)[:top_k]
+    st.write(f"The top {top_k} candidates screened so far that meet the criteria:")
+    if job_top:
+        for record in job_top:
+            st.write(f"✅ {record['file']} | {record['name']} | {record['email']} | {record['phone']} | Number of skills: {record['no_of_skills']}/{st.session_state.job_skill_count}")
+    else:
+        st.write("❌ No candidates meet the criteria yet." if not job_progress["finished"] else "❌ No candidates meet the criteria.")
+    poll_job = not job_progress["finished"]
+
+
+#############################
+#-------- Past applicants --------#
+#############################
+# Rank every applicant screened before straight from the candidate store, without pdfplumber or Gemini
+stored_count = candidate_store.count()
+if len(skills_required) > 0 and stored_count > 0:
+    if st.checkbox(f"Search past applicants ({stored_count} stored)"):
+        past_candidates, unknown_verdicts = candidate_store.query(required_info, k = top_k)
+        st.subheader(f"The top {top_k} past applicants that meet the criteria:")
+        if past_candidates:
+            for candidate in past_candidates:
+                candidate_info = candidate["info"]
+                st.write(f"✅ {candidate['file_name']} | {candidate_info['name']} | {candidate_info['email']} | {candidate_info['phone']} | Number of skills: {candidate['no_of_skills']}/{len(required_info['skills'])}")
+        else:
+            st.write("❌ No past applicants meet the criteria.")
+        if unknown_verdicts:
+            st.caption(f"{unknown_verdicts} past applicant(s) were never checked for these mandatory skill levels and are not ranked.")
+
 
+# Keep polling the background job until every resume is screened
+if poll_job:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
@@ -0,0 +1,193 @@
+import datetime
+import os
+import random
+import textwrap
+
+
+#############################
+#-------- Synthetic resume settings --------#
+#############################
+PAGE_WIDTH = 612  # US Letter, in points
+PAGE_HEIGHT = 792
+MARGIN = 50
+FONT_SIZE = 10
+LINE_HEIGHT = 13
+CHARS_PER_POINT = 0.19  # Rough Helvetica 10pt characters per point of line width, for wrapping
+
+LENGTHS = {"short": (1, 2), "medium": (3, 4), "long": (5, 8)}  # Jobs per resume
+LAYOUTS = ["single", "two_column"]
+SKILL_DENSITIES = {"sparse": (2, 4), "typical": (5, 9), "dense": (10, 16)}  # Skills listed per resume
+
+FIRST_NAMES = ["Jane", "Wei Ming", "Aisha", "Rahul", "Siti", "Daniel", "Mei Ling", "Arjun", "Nur", "Marcus", "Priya", "Kenji"]
+LAST_NAMES = ["Tan", "Lim", "Kumar", "Rahman", "Ng", "Wong", "Lee", "Singh", "Chua", "Ong", "Goh", "Fernandez"]
+COMPANIES = ["ABC Technologies", "Lion City Bank", "Orchid Logistics", "Merlion Analytics", "Straits Health", "Harbour Retail Group"]
+TITLES = ["Software Engineer", "Data Analyst", "Backend Developer", "Business Analyst", "DevOps Engineer", "Data Scientist"]
+SKILLS = [
+    "python", "java", "sql", "docker", "aws", "react", "kubernetes", "spark", "tableau", "excel",
+    "javascript", "typescript", "go", "c++", "power bi", "machine learning", "git", "linux", "azure", "pandas",
+]
+DEGREES = {
+    "Diploma": ["Diploma in Information Technology", "Advanced Diploma of Business Informatics"],
+    "Bachelor": ["Bachelor of Science in Computer Science", "B.Sc. Computer Science", "BEng (Hons) Electrical Engineering", "Bachelor of Commerce"],
+    "Master": ["Master of Business Administration", "MSc Data Science", "M.Eng. Software Engineering"],
+    "PhD": ["PhD in Statistics", "Doctor of Philosophy (Physics)"],
+}
+SCHOOLS = ["National University of Singapore", "Nanyang Polytechnic", "Singapore Management University", "University of Melbourne"]
+CURRENT_YEAR = datetime.date.today().year
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Date range styles seen in real resumes, e.g. "2015 - 2020", "Mar 2015 - Present", "03/2015 - 07/2020"
+DATE_FORMATS = {
+    "years": lambda start, end, rng: f"{start} - {end}",
+    "years_tight": lambda start, end, rng: f"{start}-{end}",
+    "month_year": lambda start, end, rng: f"{rng.choice(MONTHS)} {start} - {rng.choice(MONTHS)} {end}",
+    "numeric": lambda start, end, rng: f"{rng.randint(1, 12):02d}/{start} - {rng.randint(1, 12):02d}/{end}",
+    "to_present": lambda start, end, rng: f"{rng.choice(MONTHS)} {start} to {'Present' if end == CURRENT_YEAR else f'{rng.choice(MONTHS)} {end}'}",
+}
+
+
+#############################
+#-------- Minimal PDF writer --------#
+#############################
+# Function to escape text for a PDF string literal (Helvetica with the standard encoding, ASCII only)
+def escape_pdf_text(text):
+    text = text.encode("ascii", "replace").decode("ascii")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+# Function to build a PDF from pages of (x, y, text) lines, with a real text layer pdfplumber can read
+def build_pdf(pages):
+    page_count = len(pages)
+    font_id = 3 + 2 * page_count
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(page_count))}] /Count {page_count} >>",
+    ]
+    for i, lines in enumerate(pages):
+        content = "".join(f"BT /F1 {FONT_SIZE} Tf {x:.1f} {y:.1f} Td ({escape_pdf_text(text)}) Tj ET\n" for x, y, text in lines)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Contents {4 + 2 * i} 0 R /Resources << /Font << /F1 {font_id} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}endstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start = 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{body}\nendobj\n".encode("ascii")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("ascii")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+    return bytes(output)
+
+# Function to lay out one column of text lines from top to bottom, starting new pages as needed
+# Returns pages of (x, y, text), merged into existing pages so two columns share them
+def place_column(lines, x, width, pages = None, first_y = PAGE_HEIGHT - MARGIN):
+    pages = pages if pages is not None else []
+    page_index, y = 0, first_y
+    for line in lines:
+        for wrapped in textwrap.wrap(line, max(10, int(width * CHARS_PER_POINT))) or [""]:
+            if y < MARGIN:
+                page_index, y = page_index + 1, first_y
+            while len(pages) <= page_index:
+                pages.append([])
+            if wrapped:
+                pages[page_index].append((x, y, wrapped))
+            y -= LINE_HEIGHT
+    return pages
+
+
+#############################
+#-------- Synthetic resumes --------#
+#############################
+# Function to write the sections of one random resume, returns (header lines, sections, truth)
+# truth holds what a perfect extraction should find: name, email, education level and the listed skills
+def make_resume_content(rng, length, skill_density, date_format):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    name = f"{first} {last}"
+    email = f"{first.lower().replace(' ', '.')}.{last.lower()}{rng.randint(1, 999)}@example.com"
+    phone = f"+65 {rng.choice('689')}{rng.randint(100, 999)} {rng.randint(1000, 9999)}"
+    skills = rng.sample(SKILLS, rng.randint(*SKILL_DENSITIES[skill_density]))
+
+    jobs = []
+    end = CURRENT_YEAR
+    for _ in range(rng.randint(*LENGTHS[length])):
+        start = end - rng.randint(1, 4)
+        used = rng.sample(skills, min(len(skills), rng.randint(1, 3)))
+        jobs += [
+            f"{rng.choice(TITLES)}, {rng.choice(COMPANIES)}",
+            DATE_FORMATS[date_format](start, end, rng),
+            f"- Built and maintained services using {', '.join(used)} for internal and customer-facing teams.",
+            f"- Worked with stakeholders to deliver {rng.randint(2, 9)} projects on time and improved reporting.",
+            "",
+        ]
+        end = start - rng.randint(0, 1)
+
+    education_level = rng.choice(list(DEGREES))
+    degrees = [education_level] + ([rng.choice(list(DEGREES))] if rng.random() < 0.3 else [])
+    education = []
+    for level in degrees:
+        graduated = end - rng.randint(0, 2)
+        education += [rng.choice(DEGREES[level]), f"{rng.choice(SCHOOLS)}, {graduated - rng.randint(2, 4)} - {graduated}", ""]
+    highest = max(degrees, key = list(DEGREES).index)
+
+    sections = {
+        "Summary": [f"{rng.choice(TITLES)} with experience across {', '.join(skills[:3])} and a focus on reliable delivery."],
+        "Work Experience": jobs,
+        "Education": education,
+        "Skills": [", ".join(skills)],
+    }
+    truth = {"name": name, "email": email, "education": highest, "skills": skills}
+    return [name, email, phone], sections, truth
+
+# Function to lay out resume content as pages of (x, y, text), in one column or with a sidebar
+# (contact, skills, education)
+def layout_resume_pages(header, sections, layout):
+    if layout == "single":
+        lines = header + [""]
+        for heading, body in sections.items():
+            lines += [heading] + body + [""]
+        return place_column(lines, MARGIN, PAGE_WIDTH - 2 * MARGIN)
+
+    sidebar_width = 170
+    gap = 30
+    sidebar = header + ["", "Skills"] + sections["Skills"] + ["", "Education"] + sections["Education"]
+    main = []
+    for heading in ["Summary", "Work Experience"]:
+        main += [heading] + sections[heading] + [""]
+    pages = place_column(sidebar, MARGIN, sidebar_width)
+    return place_column(main, MARGIN + sidebar_width + gap, PAGE_WIDTH - 2 * MARGIN - sidebar_width - gap, pages)
+
+# Function to render resume content as a PDF
+def render_resume_pdf(header, sections, layout):
+    return build_pdf(layout_resume_pages(header, sections, layout))
+
+# Function to generate a reproducible corpus of resume PDFs mixing layouts, lengths, date formats,
+# degree strings and skill densities. Returns [{"file_name", "data", "layout", "length", "date_format",
+# "skill_density", "truth"}]
+def generate_corpus(count, seed = 0, layouts = LAYOUTS, lengths = tuple(LENGTHS), date_formats = tuple(DATE_FORMATS), skill_densities = tuple(SKILL_DENSITIES)):
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        layout, length = rng.choice(layouts), rng.choice(lengths)
+        date_format, skill_density = rng.choice(date_formats), rng.choice(skill_densities)
+        header, sections, truth = make_resume_content(rng, length, skill_density, date_format)
+        corpus.append({
+            "file_name": f"resume_{i:05d}_{layout}_{length}.pdf",
+            "data": render_resume_pdf(header, sections, layout),
+            "layout": layout,
+            "length": length,
+            "date_format": date_format,
+            "skill_density": skill_density,
+            "truth": truth,
+        })
+    return corpus
+
+# Function to write a corpus to a directory, e.g. to screen it with ict619_resume_batch.py
+def write_corpus(corpus, directory):
+    os.makedirs(directory, exist_ok = True)
+    for item in corpus:
+        with open(os.path.join(directory, item["file_name"]), "wb") as f:
+            f.write(item["data"])
@@ -0,0 +1,87 @@
+import argparse
+import os
+import socket
+import sys
+import time
+
+from ict619_resume_engine import iter_screen_pdfs
+from ict619_resume_cache import ExtractionCache
+from ict619_resume_queue import JobQueue, DEFAULT_QUEUE_PATH, DEFAULT_LEASE_SECONDS
+from ict619_resume_batch import build_record
+from ict619_resume_metrics import metrics, enable_json_logs, serve_metrics, DEFAULT_METRICS_PATH
+
+
+#############################
+#-------- Worker --------#
+#############################
+# Function to screen the claimed resumes of one job, storing each result as soon as it is ready
+def screen_claimed_items(queue, worker_id, job, items, cache, args):
+    pending = {item["id"] for item in items}
+    try:
+        results = iter_screen_pdfs(
+            [item["data"] for item in items], job["required_info"],
+            max_concurrency = args.max_concurrency, cache = cache,
+            pdf_hashes = [item["pdf_hash"] for item in items], **job["options"],
+        )
+        for result in results:
+            item = items[result["index"]]
+            if result["retry_after"] is not None:
+                # Quota exhausted or circuit open: no other worker would do better before retry_after
+                queue.defer(worker_id, item["id"], result["error"], result["retry_after"])
+                print(f"⚠️ Job {job['id']} {item['file_name']}: {result['error']} (retrying in {result['retry_after']:.0f}s)", file = sys.stderr)
+            elif result["screened"] is None:
+                # An unreadable PDF stays unreadable, anything else is tried again up to MAX_ATTEMPTS times
+                retry = result["error"] != "Could not extract text from PDF"
+                queue.fail(worker_id, item["id"], result["error"], retry = retry)
+                print(f"⚠️ Job {job['id']} {item['file_name']}: {result['error']}", file = sys.stderr)
+            else:
+                duplicate_of = items[result["duplicate_of"]]["file_name"] if result["duplicate_of"] is not None else None
+                queue.complete(worker_id, item["id"], build_record(item["file_name"], item["pdf_hash"], result["screened"], duplicate_of))
+                print(f"Job {job['id']} {item['file_name']}: screened in {result['screened']['processing_time']:.1f}s")
+            pending.discard(item["id"])
+            queue.renew(worker_id, pending, args.lease_seconds)  # Still alive, keep the rest of the claim
+    finally:
+        # Interrupted or crashed mid-claim: hand the unfinished resumes back straight away
+        if pending:
+            queue.release(worker_id, pending)
+
+def run_worker(args):
+    queue = JobQueue(args.queue)
+    cache = None if args.no_cache else ExtractionCache()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    print(f"Worker {worker_id} polling {args.queue}")
+    if args.metrics_json:
+        enable_json_logs()
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"Metrics at http://localhost:{args.metrics_port}/metrics")
+
+    try:
+        while True:
+            job, items = queue.claim(worker_id, args.claim_size, args.lease_seconds)
+            if job is None:
+                if args.once:
+                    break
+                time.sleep(args.poll_seconds)
+                continue
+            screen_claimed_items(queue, worker_id, job, items, cache, args)
+            metrics.write_prometheus(args.metrics_file)
+    except KeyboardInterrupt:
+        print("Worker stopped.", file = sys.stderr)
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Screen resumes submitted to the job queue. Run several to drain it in parallel.")
+    parser.add_argument("--queue", default = DEFAULT_QUEUE_PATH, help = "Job queue file, shared by the UI and every worker")
+    parser.add_argument("--claim-size", type = int, default = 10, help = "Resumes claimed from the queue at a time")
+    parser.add_argument("--max-concurrency", type = int, default = 5, help = "Resumes sent to Gemini at the same time")
+    parser.add_argument("--lease-seconds", type = int, default = DEFAULT_LEASE_SECONDS, help = "Seconds before resumes of a silent worker are claimed again")
+    parser.add_argument("--poll-seconds", type = float, default = 2, help = "Wait between checks of an empty queue")
+    parser.add_argument("--no-cache", action = "store_true", help = "Do not use the on-disk extraction cache")
+    parser.add_argument("--metrics-port", type = int, default = None, help = "Serve this worker's metrics for Prometheus at http://<host>:<port>/metrics")
+    parser.add_argument("--metrics-file", default = DEFAULT_METRICS_PATH, help = "Rewrite this worker's metrics (Prometheus text) in this file after every claim, one file per worker")
+    parser.add_argument("--metrics-json", action = "store_true", help = "Log every timing span and counter as a JSON line on stderr")
+    parser.add_argument("--once", action = "store_true", help = "Exit when the queue is empty instead of waiting for new jobs")
+    run_worker(parser.parse_args())
@@ -0,0 +1,19 @@
+import os
+import sys
+import tempfile
+
+# Every SQLite file (cache, store, rate limiter, queue) goes to a temporary directory and Gemini is
+# replaced by the offline stub, before any module of the app reads its settings
+TEST_DATA_DIR = tempfile.mkdtemp(prefix = "ict619_resume_tests_")
+os.environ.update({
+    "LLM_BACKEND": "stub",
+    "GEMINI_API_KEY": "test",
+    "GEMINI_REQUESTS_PER_MINUTE": "0",
+    "RESUME_CACHE_PATH": os.path.join(TEST_DATA_DIR, "resume_cache.sqlite3"),
+    "CANDIDATE_STORE_PATH": os.path.join(TEST_DATA_DIR, "candidate_store.sqlite3"),
+    "RATE_LIMIT_PATH": os.path.join(TEST_DATA_DIR, "rate_limit.sqlite3"),
+    "JOB_QUEUE_PATH": os.path.join(TEST_DATA_DIR, "job_queue.sqlite3"),
+})
+os.environ.pop("METRICS_PATH", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+
+import pytest
+
+import ict619_resume_engine
+import ict619_resume_functions
+from ict619_resume_batch import run_batch, load_checkpoint
+from ict619_resume_engine import iter_screen_pdfs
+from ict619_resume_llm import StubBackend, set_llm_backend, load_genai
+from ict619_resume_ratelimit import GeminiRateLimiter
+from ict619_resume_synthetic import generate_corpus, write_corpus
+
+REQUIREMENTS = {"experience": 0, "education": "Diploma", "skills": ["python", "sql"], "mandatory_skills": {}}
+
+
+# Stub whose restructuring call fails like a Gemini outage (a 503 is not retried)
+class FailingSectionsBackend(StubBackend):
+    def respond(self, prompt, task = None):
+        if task == "sections":
+            raise load_genai().errors.ServerError(503, {"error": {"code": 503, "status": "UNAVAILABLE", "message": "Backend down."}})
+        return super().respond(prompt, task)
+
+@pytest.fixture
+def failing_sections(monkeypatch):
+    # Never trust the local layout, so every resume needs the restructuring call
+    monkeypatch.setattr(ict619_resume_functions, "LAYOUT_CONFIDENCE_THRESHOLD", 2.0)
+    previous = set_llm_backend(FailingSectionsBackend())
+    yield
+    set_llm_backend(previous)
+
+def batch_args(tmp_path, **options):
+    args = {
+        "pdf_dir": str(tmp_path / "pdfs"), "requirements": str(tmp_path / "requirements.json"),
+        "output": str(tmp_path / "results.jsonl"), "checkpoint": None, "recursive": False,
+        "max_concurrency": 2, "chunk_size": 10, "extraction_mode": "three_calls", "no_cache": True,
+        "no_cascade": True, "no_dedup": False, "batch_requests": False, "log_prompts": False,
+        "timings": False, "metrics_json": False, "metrics_file": None, "top": 3,
+    }
+    args.update(options)
+    return argparse.Namespace(**args)
+
+def test_three_calls_sections_error_is_reported(failing_sections):
+    corpus = generate_corpus(3, seed = 7)
+    results = list(iter_screen_pdfs([item["data"] for item in corpus], REQUIREMENTS, extraction_mode = "three_calls"))
+    assert len(results) == 3
+    for item in results:
+        assert item["screened"] is None
+        assert "ServerError" in item["error"]
+
+def test_batch_does_not_checkpoint_failed_sections(failing_sections, tmp_path):
+    write_corpus(generate_corpus(3, seed = 8), str(tmp_path / "pdfs"))
+    with open(tmp_path / "requirements.json", "w") as f:
+        json.dump(REQUIREMENTS, f)
+    args = batch_args(tmp_path)
+    run_batch(args)
+
+    assert not os.path.exists(args.output) or os.path.getsize(args.output) == 0
+    assert load_checkpoint(args.output + ".checkpoint") == set()  # Retried on the next run
+
+# Shared budget of one request a minute that nobody may wait for: every call after the first times out
+@pytest.fixture
+def saturated_limiter(tmp_path, monkeypatch):
+    limiter = GeminiRateLimiter(str(tmp_path / "rate_limit.sqlite3"), requests_per_minute = 1, max_wait_seconds = 0)
+    for module in (ict619_resume_functions, ict619_resume_engine):  # Async calls and their retry waits
+        monkeypatch.setattr(module, "get_rate_limiter", lambda: limiter)
+    previous = set_llm_backend(StubBackend(use_rate_limiter = True))
+    yield
+    set_llm_backend(previous)
+    limiter.close()
+
+def test_batch_stops_when_the_rate_limiter_is_saturated(saturated_limiter, tmp_path, capsys):
+    write_corpus(generate_corpus(6, seed = 9), str(tmp_path / "pdfs"))
+    with open(tmp_path / "requirements.json", "w") as f:
+        json.dump(REQUIREMENTS, f)
+    args = batch_args(tmp_path, extraction_mode = "fused", max_concurrency = 1, chunk_size = 2)
+    run_batch(args)
+
+    assert "Stopped: Gemini quota exhausted" in capsys.readouterr().err
+    assert len(load_checkpoint(args.output + ".checkpoint")) <= 1  # The rest is left for the next run
@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+from ict619_resume_engine import parse_batch_response, GeminiBatcher, extract_info_async
+from ict619_resume_llm import StubBackend, STUB_DOCUMENT_PATTERN
+
+FIELDS = ["name", "email", "phone"]
+SKILLS = {"python": 2, "SQL": 0}
+
+
+def info_entry(doc_id, name):
+    return {"doc_id": doc_id, "name": name, "email": None, "phone": "6591234567"}
+
+def test_info_entries():
+    response = json.dumps({"documents": [info_entry(2, "Wei Lim"), info_entry("1 ", "Jane Tan")]})
+    assert parse_batch_response(response, "info", 2, FIELDS) == {
+        0: {"name": "Jane Tan", "email": None, "phone": "6591234567"},
+        1: {"name": "Wei Lim", "email": None, "phone": "6591234567"},
+    }
+
+def test_malformed_responses():
+    for response in ["not json", "[]", '{"docs": []}', '{"documents": {"doc_id": 1}}', '{"documents": null}', None]:
+        assert parse_batch_response(response, "info", 2, FIELDS) == {}
+
+def test_partial_and_malformed_entries():
+    response = json.dumps({"documents": [
+        "garbage",
+        {"name": "No id"},
+        {"doc_id": 2, "name": "Missing email", "phone": None},  # Incomplete: asked again alone
+        info_entry(3, "Aisha Rahman"),
+        info_entry(9, "Not in the batch"),
+    ]})
+    assert parse_batch_response(response, "info", 3, FIELDS) == {2: {"name": "Aisha Rahman", "email": None, "phone": "6591234567"}}
+
+def test_skill_entries():
+    response = json.dumps({"documents": [
+        {"doc_id": 1, "mandatory_skills": [{"skill": "Python", "status": "meets"}, {"skill": "sql", "status": "does not meet"}]},
+        {"doc_id": 2, "mandatory_skills": [{"skill": "python", "status": "meets"}]},  # SQL missing
+        {"doc_id": 3, "mandatory_skills": [{"skill": "python"}, {"skill": "sql", "status": "meets"}]},
+        {"doc_id": 4, "mandatory_skills": "meets"},
+    ]})
+    assert parse_batch_response(response, "skills", 4, skills_experience = SKILLS) == {0: {"python": "meets", "SQL": "does not meet"}}
+
+
+# Stub that leaves the first document out of every batched answer and adds a malformed entry
+class PartialBatchBackend(StubBackend):
+    def respond(self, prompt, task = None):
+        response = super().respond(prompt, task)
+        if STUB_DOCUMENT_PATTERN.search(prompt):
+            answer = json.loads(response)
+            answer["documents"] = answer["documents"][1:] + ["garbage"]
+            response = json.dumps(answer)
+        return response
+
+def test_batcher_asks_missing_documents_alone():
+    resumes = [f"{name}\n{name.split()[0].lower()}@example.com\n+65 9123 456{i}\n\nSkills\nPython" for i, name in enumerate(["Jane Tan", "Wei Lim", "Aisha Rahman"])]
+
+    async def run():
+        session = PartialBatchBackend().open_async()
+        batcher = GeminiBatcher(session, window_seconds = 0.05)
+        batched = await asyncio.gather(*(batcher.extract_info(resume) for resume in resumes))
+        alone = [await extract_info_async(resume, session) for resume in resumes]
+        return batcher, batched, alone
+
+    batcher, batched, alone = asyncio.run(run())
+    assert batched == alone
+    assert (batcher.batched_calls, batcher.batched_documents, batcher.fallback_documents) == (1, 2, 1)
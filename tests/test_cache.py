@@ -0,0 +1,111 @@
+import asyncio
+import io
+
+import pytest
+
+import ict619_resume_cache
+from ict619_resume_cache import ExtractionCache, hash_pdf_bytes, EVICT_EVERY
+from ict619_resume_engine import cached_llm_result
+from ict619_resume_llm import StubBackend, set_llm_backend
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"))
+    yield cache
+    cache.close()
+
+def test_get_and_set(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ExtractionCache(path)
+    key = cache.make_key("hash-1", "info", 1, "gemini-2.0-flash")
+    assert cache.get(key) is None
+    cache.set(key, {"name": "Jane Tan", "phone": None})
+    assert cache.get(key) == {"name": "Jane Tan", "phone": None}
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    cache.close()
+
+    cache = ExtractionCache(path)  # Survives a restart, the counters are per process
+    assert cache.get(key) == {"name": "Jane Tan", "phone": None}
+    assert {name: cache.stats()[name] for name in ("hits", "misses", "entries")} == {"hits": 1, "misses": 0, "entries": 1}
+    cache.clear()
+    assert cache.get(key) is None and cache.stats()["entries"] == 0
+    cache.close()
+
+def test_key_changes_with_every_part(cache):
+    key = cache.make_key("hash-1", "info", 1, "gemini-2.0-flash")
+    assert key == cache.make_key("hash-1", "info", 1, "gemini-2.0-flash")
+    assert len({key, cache.make_key("hash-2", "info", 1, "gemini-2.0-flash"), cache.make_key("hash-1", "sections", 1, "gemini-2.0-flash"),
+                cache.make_key("hash-1", "info", 2, "gemini-2.0-flash"), cache.make_key("hash-1", "info", 1, "gemini-2.0-flash-lite")}) == 5
+
+def test_pdf_hash_of_every_input(tmp_path):
+    data = b"%PDF-1.4 resume"
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(data)
+    file = io.BytesIO(data)
+    file.read(4)
+    assert hash_pdf_bytes(data) == hash_pdf_bytes(str(path)) == hash_pdf_bytes(io.BytesIO(data)) == hash_pdf_bytes(bytearray(data))
+    assert file.tell() == 4
+
+def test_least_recently_used_are_evicted(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(ict619_resume_cache.time, "time", lambda: now[0])
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), max_bytes = 100)
+    for i in range(4):
+        now[0] += 1
+        cache.set(f"key-{i}", "x" * 38)  # 40 bytes once encoded
+    now[0] += 1
+    cache.get("key-0")  # Used again, so key-1 is now the oldest
+    cache.evict()
+    assert [cache.get(f"key-{i}") is not None for i in range(4)] == [True, False, False, True]
+    assert cache.stats()["size_bytes"] == 80
+    cache.close()
+
+def test_eviction_runs_every_few_writes(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "cache.sqlite3"), max_bytes = 10 * 40)
+    for i in range(EVICT_EVERY):
+        cache.set(f"key-{i}", "x" * 38)
+    assert cache.stats()["entries"] == 10
+    cache.close()
+
+def test_old_entries_expire(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(ict619_resume_cache.time, "time", lambda: now[0])
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ExtractionCache(path, max_age_days = 30)
+    cache.set("old", 1)
+    now[0] += 20 * 24 * 60 * 60
+    cache.set("recent", 2)
+    cache.close()
+
+    now[0] += 15 * 24 * 60 * 60
+    cache = ExtractionCache(path, max_age_days = 30)  # Evicted when opened
+    assert cache.get("old") is None and cache.get("recent") == 2
+    cache.close()
+
+def test_cached_llm_result_misses_after_a_model_or_prompt_change(cache):
+    calls = []
+    async def compute():
+        calls.append(1)
+        return {"name": "Jane Tan"}
+    def run(prompt_version = 1):
+        return asyncio.run(cached_llm_result(cache, "hash-1", "info", prompt_version, compute, is_valid = lambda info: info != {}))
+
+    previous = set_llm_backend(StubBackend())
+    try:
+        assert run() == run() == {"name": "Jane Tan"}
+        assert len(calls) == 1
+        run(prompt_version = 2)
+        assert len(calls) == 2
+        set_llm_backend(StubBackend(task_models = {"info": "gemini-2.5-flash"}))
+        run()
+        assert len(calls) == 3
+    finally:
+        set_llm_backend(previous)
+
+def test_failed_results_are_not_cached(cache):
+    async def compute():
+        return {}
+    for _ in range(2):
+        assert asyncio.run(cached_llm_result(cache, "hash-1", "info", 1, compute, is_valid = lambda info: info != {})) == {}
+    assert cache.stats()["entries"] == 0
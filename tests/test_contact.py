@@ -0,0 +1,23 @@
+from ict619_resume_functions import extract_contact_locally, find_name, find_phone, CONTACT_CONFIDENCE_THRESHOLD
+
+
+def test_contact_details():
+    info, confidence = extract_contact_locally("Jane Tan\njane.tan@example.com | +65 9123 4567\n\nSummary\nBackend developer.")
+    assert info == {"name": "Jane Tan", "email": "jane.tan@example.com", "phone": "6591234567"}
+    assert min(confidence.values()) >= CONTACT_CONFIDENCE_THRESHOLD
+
+def test_labelled_phone():
+    assert find_phone("Mobile: 9123 4567") == ("6591234567", 0.95)
+
+def test_job_title_is_not_a_name():
+    for title in ["Software Engineer", "Data Scientist", "Senior Business Analyst", "Product Manager", "Backend Developer"]:
+        name, confidence = find_name(f"{title}\nsome.one@example.com")
+        assert name is None and confidence < CONTACT_CONFIDENCE_THRESHOLD
+
+    # The name below the title is still found, but not trusted without the email
+    assert find_name("Data Scientist\nJane Tan\nMobile: 9123 4567") == ("Jane Tan", 0.6)
+    assert find_name("Data Scientist\nJane Tan\njane.tan@example.com", "jane.tan@example.com") == ("Jane Tan", 0.95)
+
+def test_unlabelled_number_is_checked_by_gemini():
+    assert find_phone("Expected salary: 9000 8000")[1] < CONTACT_CONFIDENCE_THRESHOLD
+    assert find_phone("Jane Tan\n9123 4567")[1] < CONTACT_CONFIDENCE_THRESHOLD
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from ict619_resume_dedup import DuplicateIndex, normalize_words, shingle_hashes, minhash_signature, estimate_similarity
+
+WORDS = ["python", "sql", "docker", "engineer", "singapore", "bank", "data", "pipeline", "team", "led", "built", "api",
+         "cloud", "report", "analyst", "project", "manager", "design", "testing", "support", "customer", "sales"]
+
+
+def make_text(seed, length = 400):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+# Function to change every n-th word, so the shingle Jaccard similarity drops by a known amount
+def edit_words(text, every):
+    words = text.split()
+    return " ".join("edited" if i % every == 0 else word for i, word in enumerate(words))
+
+def jaccard(text, other_text):
+    hashes, other_hashes = shingle_hashes(normalize_words(text)), shingle_hashes(normalize_words(other_text))
+    return len(hashes & other_hashes) / len(hashes | other_hashes)
+
+def test_signature_estimates_jaccard():
+    text = make_text(1)
+    for every in (20, 50, 100):
+        edited = edit_words(text, every)
+        estimate = estimate_similarity(minhash_signature(shingle_hashes(normalize_words(text))),
+                                       minhash_signature(shingle_hashes(normalize_words(edited))))
+        assert estimate == pytest.approx(jaccard(text, edited), abs = 0.12)
+
+def test_exact_and_same_text():
+    index = DuplicateIndex()
+    text = make_text(1)
+    assert index.add("a.pdf", "hash-a", text) == ("a.pdf", None, None)
+    assert index.add("copy.pdf", "hash-a", text) == ("a.pdf", "exact", 1.0)
+    # Re-exported: another file, same words with other spacing, case and punctuation
+    assert index.add("export.pdf", "hash-b", text.upper().replace(" ", ",\n")) == ("a.pdf", "same_text", 1.0)
+
+def test_near_duplicate_threshold():
+    index = DuplicateIndex(threshold = 0.85)
+    text = make_text(1)
+    index.add("a.pdf", "hash-a", text)
+
+    slightly_edited = edit_words(text, 100)  # A few words changed: Jaccard ~0.9
+    assert jaccard(text, slightly_edited) > 0.85
+    canonical_key, kind, similarity = index.add("edited.pdf", "hash-b", slightly_edited)
+    assert (canonical_key, kind) == ("a.pdf", "near") and similarity >= 0.85
+
+    rewritten = edit_words(text, 10)  # Every 10th word changed: Jaccard ~0.35
+    assert jaccard(text, rewritten) < 0.5
+    assert index.add("rewritten.pdf", "hash-c", rewritten) == ("rewritten.pdf", None, None)
+    assert index.add("other.pdf", "hash-d", make_text(2)) == ("other.pdf", None, None)
+
+def test_copies_map_to_the_first_resume():
+    index = DuplicateIndex()
+    text = make_text(1)
+    index.add("a.pdf", "hash-a", text)
+    index.add("edited.pdf", "hash-b", edit_words(text, 100))
+    # Close to the near duplicate too, but only the first resume of a group is indexed
+    assert index.add("edited_again.pdf", "hash-c", edit_words(edit_words(text, 100), 97))[0] == "a.pdf"
+
+def test_add_is_idempotent():
+    index = DuplicateIndex()
+    text = make_text(1)
+    index.add("a.pdf", "hash-a", text)
+    index.add("copy.pdf", "hash-a", text)
+    # Added again (e.g. on a Streamlit rerun): same answers, not duplicates of themselves
+    assert index.add("a.pdf", "hash-a", text) == ("a.pdf", None, None)
+    assert index.add("copy.pdf", "hash-a", text) == ("a.pdf", "exact", 1.0)
+    assert "copy.pdf" in index and "new.pdf" not in index
+    assert (index.canonical_key("copy.pdf"), index.canonical_key("a.pdf")) == ("a.pdf", "a.pdf")
+
+def test_no_text_layer():
+    index = DuplicateIndex()
+    assert index.add("scan.pdf", "hash-a", "") == ("scan.pdf", None, None)
+    assert index.add("other_scan.pdf", "hash-b", None) == ("other_scan.pdf", None, None)
+    assert index.add("scan_copy.pdf", "hash-a", "") == ("scan.pdf", "exact", 1.0)
+
+def test_bands_must_cover_the_signature():
+    with pytest.raises(ValueError):
+        DuplicateIndex(bands = 10, rows = 10)
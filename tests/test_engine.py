@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# A process that used the shared event loop closes its LLM session and the backend's connections on exit
+def test_shared_session_is_closed_at_exit():
+    script = textwrap.dedent("""
+        from ict619_resume_engine import run_on_event_loop, open_async_client
+        from ict619_resume_llm import StubBackend, StubAsyncSession, set_llm_backend
+
+        class Session(StubAsyncSession):
+            async def aclose(self):
+                print("session closed", flush = True)
+
+        class Backend(StubBackend):
+            def open_async(self):
+                return Session(self)
+
+            async def aclose(self):
+                print("backend closed", flush = True)
+
+        set_llm_backend(Backend())
+        first, second = run_on_event_loop(lambda _: open_async_client()), run_on_event_loop(lambda _: open_async_client())
+        assert first is second  # Shared, so not closed after each run
+        print("done", flush = True)
+    """)
+    result = subprocess.run([sys.executable, "-c", script], cwd = REPO_DIR, capture_output = True, text = True, timeout = 60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split("\n") == ["done", "session closed", "backend closed", ""]
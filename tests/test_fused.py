@@ -0,0 +1,60 @@
+import json
+
+from ict619_resume_functions import parse_fused_response, scan_resume
+from ict619_resume_engine import iter_screen_pdfs
+from ict619_resume_synthetic import generate_corpus
+
+SKILLS = {"Python": 2, "SQL": 0}
+REQUIREMENTS = {"experience": 2, "education": "Bachelor", "skills": ["python", "sql", "docker"], "mandatory_skills": {"python": 2}}
+
+
+def fused_answer(**fields):
+    answer = {
+        "education": "Bachelor of Science, NUS\n2012 - 2016",
+        "work_experience": "Software Engineer, ABC Technologies\n2016 - 2024",
+        "skills": "• Python, SQL",
+        "name": "Jane Tan", "email": "jane.tan@example.com", "phone": None,
+        "mandatory_skills": [{"skill": "python", "status": "meets"}, {"skill": "sql", "status": "does not meet"}],
+    }
+    answer.update(fields)
+    return json.dumps(answer)
+
+def test_parse_fused_response():
+    resume_text, candidate_info, skills_met = parse_fused_response(fused_answer(), SKILLS)
+    assert candidate_info == {"name": "Jane Tan", "email": "jane.tan@example.com", "phone": None}
+    assert skills_met == {"Python": "meets", "SQL": "does not meet"}  # Skill names as entered
+    assert list(scan_resume(resume_text)["sections"]) == ["Education", "Work Experience", "Skills"]
+    assert "•" not in resume_text
+
+def test_missing_fields():
+    # A skill the model skipped does not meet, a missing contact field is None, a null section is empty
+    resume_text, candidate_info, skills_met = parse_fused_response(
+        fused_answer(mandatory_skills = [{"skill": "PYTHON", "status": "meets"}], skills = None), SKILLS
+    )
+    assert skills_met == {"Python": "meets", "SQL": "does not meet"}
+    assert resume_text.endswith("Skills\n")
+    answer = json.loads(fused_answer())
+    del answer["phone"]
+    assert parse_fused_response(json.dumps(answer), SKILLS)[1]["phone"] is None
+
+def test_malformed_responses():
+    answer = json.loads(fused_answer())
+    del answer["work_experience"]
+    for response in ["not json", "", "[]", json.dumps(answer), fused_answer(mandatory_skills = "meets"),
+                     fused_answer(mandatory_skills = [{"status": "meets"}]), None]:
+        assert parse_fused_response(response, SKILLS) is None
+
+# The stub cannot untangle two columns like Gemini does, so only resumes read in order by the local layout are compared
+def test_fused_and_three_calls_give_the_same_profile():
+    corpus = generate_corpus(12, seed = 11)
+    screened = {}
+    for extraction_mode in ("fused", "three_calls"):
+        results = iter_screen_pdfs([item["data"] for item in corpus], REQUIREMENTS, extraction_mode = extraction_mode, dedup = False)
+        screened[extraction_mode] = {result["index"]: result["screened"] for result in results}
+
+    compared = [i for i in range(len(corpus)) if screened["fused"][i]["used_local_layout"]]
+    assert {corpus[i]["layout"] for i in compared} == {"single", "two_column"}
+    for i in compared:
+        fused, three_calls = screened["fused"][i], screened["three_calls"][i]
+        assert (fused["info"], fused["extracted_info"], fused["result"]) == (three_calls["info"], three_calls["extracted_info"], three_calls["result"])
+        assert fused["info"]["name"] == corpus[i]["truth"]["name"]
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+import ict619_resume_llm
+from ict619_resume_llm import GeminiBackend, StubBackend, load_genai
+from ict619_resume_ratelimit import is_rate_limit_error, parse_retry_delay
+
+PROMPTS = [f"Extract the contact info of resume {i}" for i in range(40)]
+
+
+# Function to return the error raised by each prompt's first attempt (None when it was answered)
+def first_attempt_errors(backend):
+    errors = []
+    for prompt in PROMPTS:
+        try:
+            backend.generate(prompt, task = "info")
+            errors.append(None)
+        except Exception as e:
+            errors.append(type(e).__name__)
+    return errors
+
+def test_rate_limit_errors():
+    backend = StubBackend(rate_limit_rate = 1, retry_delay = 7)
+    with pytest.raises(load_genai().errors.ClientError) as error:
+        backend.generate(PROMPTS[0])
+    assert is_rate_limit_error(error.value) and parse_retry_delay(error.value) == 7
+    assert (backend.calls, backend.errors) == (1, 1)
+
+def test_server_errors():
+    with pytest.raises(load_genai().errors.ServerError) as error:
+        StubBackend(server_error_rate = 1).generate(PROMPTS[0])
+    assert error.value.code == 503 and not is_rate_limit_error(error.value)
+
+def test_errors_are_reproducible():
+    errors = first_attempt_errors(StubBackend(rate_limit_rate = 0.3, server_error_rate = 0.2, seed = 5))
+    assert errors == first_attempt_errors(StubBackend(rate_limit_rate = 0.3, server_error_rate = 0.2, seed = 5))
+    assert {"ClientError", "ServerError", None} == set(errors)
+    assert errors != first_attempt_errors(StubBackend(rate_limit_rate = 0.3, server_error_rate = 0.2, seed = 6))
+
+def test_retries_are_planned_per_attempt():
+    backend = StubBackend(rate_limit_rate = 0.5, seed = 1)
+    answers = []
+    for _ in range(10):  # A failed prompt gets through on a later attempt
+        try:
+            answers.append(backend.generate(PROMPTS[0], task = "info"))
+        except Exception:
+            pass
+    assert answers and backend.calls == 10 and 0 < backend.errors < 10
+
+def test_latency():
+    backend = StubBackend(latency = 0.05, jitter = 0.05)
+    start = time.perf_counter()
+    backend.generate(PROMPTS[0])
+    assert 0.05 <= time.perf_counter() - start < 0.5
+
+    # Async calls wait concurrently
+    async def run():
+        session = backend.open_async()
+        start = time.perf_counter()
+        await asyncio.gather(*(session.generate(prompt) for prompt in PROMPTS[:10]))
+        await session.aclose()
+        return time.perf_counter() - start
+    assert 0.05 <= asyncio.run(run()) < 0.5
+
+def test_gemini_sessions_share_the_backend_client():
+    backend = GeminiBackend("test")
+    assert backend.open_async()._client is backend.open_async()._client is backend.client.aio
+    backend.close()
+
+@pytest.mark.parametrize("aiohttp", [False, True])
+def test_httpx_arguments_only_for_httpx(monkeypatch, aiohttp):
+    monkeypatch.setattr(ict619_resume_llm, "has_aiohttp", lambda: aiohttp)
+    backend = GeminiBackend("test")
+    assert "limits" in backend.http_options.client_args
+    assert (backend.http_options.async_client_args is None) == aiohttp
+    assert backend.http_options.timeout == ict619_resume_llm.HTTP_TIMEOUT_SECONDS * 1000
+    backend.close()
@@ -0,0 +1,50 @@
+from ict619_resume_metrics import Metrics, format_labels
+
+
+def make_metrics():
+    metrics = Metrics(buckets = [0.1, 1, 10])
+    metrics.observe("llm_call", 0.05, task = "info")
+    metrics.observe("llm_call", 0.5, task = "info")
+    metrics.observe("llm_call", 30, task = "info")
+    metrics.observe("evaluate", 0.01)
+    metrics.increment("llm_calls_saved", 2, stage = "local_checks")
+    metrics.increment("llm_calls_saved", 1, stage = "section_checks")
+    metrics.increment("cache_hits", task = None)  # None labels are dropped
+    return metrics
+
+def test_histogram_lines():
+    lines = make_metrics().render_prometheus().splitlines()
+    assert lines[:2] == ["# HELP resume_stage_seconds Time spent per screening stage", "# TYPE resume_stage_seconds histogram"]
+    # Buckets are cumulative, +Inf and _count hold every observation
+    assert lines[8:14] == [
+        'resume_stage_seconds_bucket{stage="llm_call",task="info",le="0.1"} 1',
+        'resume_stage_seconds_bucket{stage="llm_call",task="info",le="1"} 2',
+        'resume_stage_seconds_bucket{stage="llm_call",task="info",le="10"} 2',
+        'resume_stage_seconds_bucket{stage="llm_call",task="info",le="+Inf"} 3',
+        'resume_stage_seconds_sum{stage="llm_call",task="info"} 30.550000',
+        'resume_stage_seconds_count{stage="llm_call",task="info"} 3',
+    ]
+    assert lines[7] == 'resume_stage_seconds_count{stage="evaluate"} 1'  # Sorted by stage
+
+def test_counter_lines():
+    text = make_metrics().render_prometheus()
+    assert text.endswith("\n")
+    counter_lines = text.split("# TYPE resume_cache_hits_total counter\n", 1)[1].splitlines()
+    assert counter_lines == [
+        "resume_cache_hits_total 1",
+        "# TYPE resume_llm_calls_saved_total counter",
+        'resume_llm_calls_saved_total{stage="local_checks"} 2',
+        'resume_llm_calls_saved_total{stage="section_checks"} 1',
+    ]
+
+def test_label_escaping():
+    assert format_labels(()) == ""
+    assert format_labels((("file", 'C:\\cv "final"\n.pdf'),)) == '{file="C:\\\\cv \\"final\\"\\n.pdf"}'
+
+def test_write_prometheus(tmp_path):
+    metrics = make_metrics()
+    path = tmp_path / "resume.prom"
+    metrics.write_prometheus(str(path))
+    assert path.read_text(encoding = "utf-8") == metrics.render_prometheus()
+    assert [p.name for p in tmp_path.iterdir()] == ["resume.prom"]  # No temporary file left behind
+    metrics.write_prometheus(None)  # Off when METRICS_PATH is unset
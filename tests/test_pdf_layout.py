@@ -0,0 +1,52 @@
+import io
+import random
+
+import pytest
+
+from ict619_resume_functions import LAYOUT_CONFIDENCE_THRESHOLD
+from ict619_resume_pdf import reconstruct_page_layout, _find_gutter
+from ict619_resume_synthetic import make_resume_content, layout_resume_pages, build_pdf, MARGIN, LENGTHS, SKILL_DENSITIES, DATE_FORMATS
+
+pdfplumber = pytest.importorskip("pdfplumber")
+
+
+# Function to return (pdfplumber page, expected text) pairs: the lines of each column top to bottom,
+# left column first
+def render_pages(seed, layout, count):
+    rng = random.Random(seed)
+    for _ in range(count):
+        header, sections, _ = make_resume_content(rng, rng.choice(list(LENGTHS)), rng.choice(list(SKILL_DENSITIES)), rng.choice(list(DATE_FORMATS)))
+        pages = layout_resume_pages(header, sections, layout)
+        with pdfplumber.open(io.BytesIO(build_pdf(pages))) as pdf:
+            for page, lines in zip(pdf.pages, pages):
+                if lines:
+                    yield page, lines, "\n".join(text for _, _, text in sorted(lines, key = lambda line: (line[0], -line[1])))
+
+def normalize(text):
+    return " ".join(text.split())
+
+def test_single_column_order():
+    for page, _, expected in render_pages(1, "single", 10):
+        text, confidence = reconstruct_page_layout(page)
+        assert normalize(text) == normalize(expected)
+        assert confidence >= LAYOUT_CONFIDENCE_THRESHOLD
+
+def test_sidebar_gutter_lies_between_the_columns():
+    for page, lines, _ in render_pages(2, "two_column", 20):
+        words = page.extract_words()
+        main_x0 = min((x for x, _, _ in lines if x > MARGIN), default = None)
+        sidebar_words = [word for word in words if main_x0 is not None and word["x1"] < main_x0]
+        if not sidebar_words or len(sidebar_words) == len(words):
+            continue  # A page holding only one of the columns
+        gutter = _find_gutter(words)
+        assert gutter is not None and max(word["x1"] for word in sidebar_words) < gutter < main_x0
+
+def test_two_column_order_or_low_confidence():
+    confident = 0
+    for page, _, expected in render_pages(3, "two_column", 40):
+        text, confidence = reconstruct_page_layout(page)
+        if confidence >= LAYOUT_CONFIDENCE_THRESHOLD:
+            # Text confident enough to skip the restructuring call must be in reading order
+            assert normalize(text) == normalize(expected)
+            confident += 1
+    assert confident > 0
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ict619_resume_pdf
+from ict619_resume_pdf import extract_texts_from_pdfs, iter_texts_from_pdfs
+from ict619_resume_synthetic import generate_corpus
+
+
+# Worker stand-in: the PDF's bytes give its page count, every chunk takes 10 seconds
+@pytest.fixture
+def chunk_budgets(monkeypatch):
+    budgets = []
+    def extract_pages(source, start, stop, timeout, layout = False):
+        budgets.append((start, timeout))
+        page_count = int(source)
+        return page_count, [f"page {page}" for page in range(start, min(stop, page_count))], 10.0
+    pool = ThreadPoolExecutor(max_workers = 4)
+    monkeypatch.setattr(ict619_resume_pdf, "_extract_pages", extract_pages)
+    monkeypatch.setattr(ict619_resume_pdf, "get_pdf_pool", lambda *args, **kwargs: pool)
+    yield budgets
+    pool.shutdown()
+
+def test_chunks_share_the_document_timeout(chunk_budgets):
+    results = {index: (text, error) for index, text, error in iter_texts_from_pdfs([b"20", b"80"], timeout = 60, pages_per_task = 8)}
+    assert results[0] == ("".join(f"page {page}\n" for page in range(20)), None)  # 3 chunks, 30 seconds
+    assert results[1] == (None, "PdfTimeoutError: PDF extraction timed out")  # 10 chunks, 100 seconds
+    # Later chunks only get what the first one left
+    assert {timeout for start, timeout in chunk_budgets if start > 0} == {50.0}
+
+def test_extract_texts():
+    corpus = generate_corpus(3, seed = 4)
+    texts = extract_texts_from_pdfs([item["data"] for item in corpus] + [b"not a pdf"], pages_per_task = 1)
+    for item, text in zip(corpus, texts):
+        assert item["truth"]["name"] in text
+    assert texts[3] is None
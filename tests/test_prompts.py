@@ -0,0 +1,36 @@
+import time
+
+from ict619_resume_functions import build_prompt_context, select_header, select_resume_context
+
+RESUME = """Jane Tan
+jane.tan@example.com | +65 9123 4567
+
+Summary
+Backend developer.
+
+Work Experience
+Software Engineer, ABC Technologies
+2019 - 2024
+
+Education
+Bachelor of Science in Computer Science
+
+Skills
+Python, SQL, Docker
+"""
+
+def test_select_sections():
+    assert select_header(RESUME, 100).startswith("Jane Tan")
+    assert "Summary" not in select_header(RESUME, 100)
+
+    context = select_resume_context(RESUME, ["Work Experience", "Skills"], 100)
+    assert "ABC Technologies" in context and "Docker" in context
+    assert "Bachelor" not in context and "jane.tan" not in context
+
+# Runs of spaces after a heading made the old section regexes backtrack for seconds per prompt
+def test_prompt_context_is_linear():
+    resume_text = "Education" + " " * 20_000 + "x"
+    start = time.perf_counter()
+    for task in ("info", "sections", "skills", "fused"):
+        build_prompt_context(task, resume_text)
+    assert time.perf_counter() - start < 1
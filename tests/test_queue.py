@@ -0,0 +1,161 @@
+import argparse
+
+import pytest
+
+import ict619_resume_engine
+import ict619_resume_functions
+import ict619_resume_queue
+import ict619_resume_worker
+from ict619_resume_llm import StubBackend, set_llm_backend
+from ict619_resume_queue import JobQueue, MAX_ATTEMPTS
+from ict619_resume_ratelimit import GeminiRateLimiter, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS
+from ict619_resume_worker import screen_claimed_items
+from ict619_resume_synthetic import generate_corpus
+
+REQUIREMENTS = {"experience": 0, "education": "Diploma", "skills": ["python", "sql"], "mandatory_skills": {}}
+WORKER_ARGS = argparse.Namespace(max_concurrency = 2, lease_seconds = 60)
+
+
+# Clock under the test's control, shared by every queue of a test (as if they were separate workers)
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ict619_resume_queue.time, "time", clock.time)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "job_queue.sqlite3"))
+    yield queue
+    queue.close()
+
+def submit(queue, count):
+    return queue.submit_job([(f"resume_{i}.pdf", f"pdf {i}".encode()) for i in range(count)], REQUIREMENTS, extraction_mode = "fused")
+
+def test_claim_is_exclusive(clock, queue):
+    job_id = submit(queue, 3)
+    job, items = queue.claim("worker-1", limit = 2)
+    assert job["id"] == job_id and job["options"] == {"extraction_mode": "fused"}
+    assert [item["file_name"] for item in items] == ["resume_0.pdf", "resume_1.pdf"]
+    assert items[0]["data"] == b"pdf 0"
+
+    _, items = queue.claim("worker-2", limit = 2)
+    assert [item["file_name"] for item in items] == ["resume_2.pdf"]
+    assert queue.claim("worker-3") == (None, [])
+    assert queue.progress(job_id)["running"] == 3
+
+def test_expired_lease_is_claimed_again(clock, queue):
+    job_id = submit(queue, 2)
+    _, items = queue.claim("worker-1", lease_seconds = 60)
+
+    clock.now += 30
+    queue.renew("worker-1", [items[0]["id"]], lease_seconds = 60)  # Still busy with the first resume only
+    clock.now += 45
+    _, taken_over = queue.claim("worker-2")
+    assert [item["id"] for item in taken_over] == [items[1]["id"]]
+
+    # The silent worker's late result is dropped, the new owner's is kept
+    queue.complete("worker-1", items[1]["id"], {"name": "late"})
+    queue.complete("worker-2", items[1]["id"], {"name": "Wei Lim"})
+    queue.complete("worker-1", items[0]["id"], {"name": "Jane Tan"})
+    assert [result["result"] for result in queue.results(job_id)] == [{"name": "Jane Tan"}, {"name": "Wei Lim"}]
+    assert queue.progress(job_id)["finished"]
+
+def test_failures_are_requeued_until_max_attempts(clock, queue):
+    job_id = submit(queue, 2)
+    for attempt in range(MAX_ATTEMPTS):
+        _, items = queue.claim("worker-1", limit = 1)
+        assert items[0]["file_name"] == "resume_0.pdf"
+        queue.fail("worker-1", items[0]["id"], "RESOURCE_EXHAUSTED")
+    assert queue.progress(job_id) == {"queued": 1, "running": 0, "done": 0, "failed": 1, "total": 2, "finished": False}
+
+    _, items = queue.claim("worker-1")
+    queue.fail("worker-1", items[0]["id"], "Could not extract text from PDF", retry = False)
+    assert [result["error"] for result in queue.results(job_id)] == ["RESOURCE_EXHAUSTED", "Could not extract text from PDF"]
+
+def test_release_does_not_count_an_attempt(clock, queue):
+    job_id = submit(queue, 1)
+    for _ in range(MAX_ATTEMPTS + 1):
+        _, items = queue.claim("worker-1")
+        queue.release("worker-1", [item["id"] for item in items])
+    _, items = queue.claim("worker-1")
+    queue.fail("worker-1", items[0]["id"], "RESOURCE_EXHAUSTED")
+    assert queue.progress(job_id)["queued"] == 1
+
+def test_deferred_resume_waits_and_keeps_its_attempts(clock, queue):
+    job_id = submit(queue, 1)
+    for _ in range(MAX_ATTEMPTS + 1):
+        _, items = queue.claim("worker-1")
+        queue.defer("worker-1", items[0]["id"], "CircuitOpenError: open", 30)
+        assert queue.claim("worker-2") == (None, [])  # Not before 30 seconds
+        clock.now += 30
+    assert queue.progress(job_id)["queued"] == 1
+
+def test_delete_job_keeps_shared_pdfs(queue):
+    first, second = submit(queue, 2), submit(queue, 1)
+    queue.delete_job(first)
+    _, items = queue.claim("worker-1")
+    assert [item["data"] for item in items] == [b"pdf 0"]
+    queue.delete_job(second)
+    assert queue._conn.execute("SELECT COUNT(*) FROM job_pdfs").fetchone()[0] == 0
+
+def test_worker_stores_results(queue):
+    corpus = generate_corpus(2, seed = 3)
+    pdf_files = [(item["file_name"], item["data"]) for item in corpus]
+    job_id = queue.submit_job(pdf_files + [("copy.pdf", corpus[0]["data"]), ("broken.pdf", b"not a pdf")], REQUIREMENTS, extraction_mode = "fused")
+    job, items = queue.claim("worker-1")
+    screen_claimed_items(queue, "worker-1", job, items, None, WORKER_ARGS)
+
+    results = queue.results(job_id)
+    assert [result["status"] for result in results] == ["done", "done", "done", "failed"]
+    assert results[2]["result"]["duplicate_of"] == corpus[0]["file_name"]
+    assert results[3]["error"] == "Could not extract text from PDF"  # Not retried
+    assert queue.progress(job_id)["finished"]
+
+def test_interrupted_worker_releases_its_claim(queue, monkeypatch):
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+        yield
+    monkeypatch.setattr(ict619_resume_worker, "iter_screen_pdfs", interrupted)
+
+    job_id = submit(queue, 2)
+    job, items = queue.claim("worker-1")
+    with pytest.raises(KeyboardInterrupt):
+        screen_claimed_items(queue, "worker-1", job, items, None, WORKER_ARGS)
+    assert queue.progress(job_id)["queued"] == 2
+    _, items = queue.claim("worker-2")
+    assert len(items) == 2
+
+# Gemini keeps refusing: the worker's calls go through a limiter whose circuit is open
+@pytest.fixture
+def open_circuit(tmp_path, monkeypatch):
+    limiter = GeminiRateLimiter(str(tmp_path / "rate_limit.sqlite3"), requests_per_minute = 60)
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        limiter.record_rate_limited(retry_delay = 1)
+    for module in (ict619_resume_functions, ict619_resume_engine):  # Async calls and their retry waits
+        monkeypatch.setattr(module, "get_rate_limiter", lambda: limiter)
+    previous = set_llm_backend(StubBackend(use_rate_limiter = True))
+    yield
+    set_llm_backend(previous)
+    limiter.close()
+
+def test_worker_keeps_resumes_queued_while_the_circuit_is_open(open_circuit, queue):
+    corpus = generate_corpus(2, seed = 5)
+    job_id = queue.submit_job([(item["file_name"], item["data"]) for item in corpus], REQUIREMENTS, extraction_mode = "fused")
+    for _ in range(MAX_ATTEMPTS + 1):
+        job, items = queue.claim("worker-1")
+        if job is None:  # Put off until the circuit closes
+            break
+        screen_claimed_items(queue, "worker-1", job, items, None, WORKER_ARGS)
+
+    assert queue.progress(job_id)["queued"] == 2
+    assert queue.results(job_id) == []
+    retry_at = queue._conn.execute("SELECT MIN(not_before) FROM job_items WHERE job_id = ?", (job_id,)).fetchone()[0]
+    assert retry_at > ict619_resume_queue.time.time() + CIRCUIT_OPEN_SECONDS - 5
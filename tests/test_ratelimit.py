@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+import ict619_resume_ratelimit
+from ict619_resume_ratelimit import (
+    GeminiRateLimiter, CircuitOpenError, RateLimitTimeoutError, parse_retry_delay,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS, DEFAULT_BACKOFF_SECONDS,
+)
+
+
+# Clock under the test's control, shared by every limiter of a test (as if they were separate processes)
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ict619_resume_ratelimit.time, "time", clock.time)
+    monkeypatch.setattr(ict619_resume_ratelimit.time, "sleep", clock.sleep)
+    return clock
+
+@pytest.fixture
+def make_limiter(tmp_path):
+    limiters = []
+    def make(**options):
+        limiter = GeminiRateLimiter(str(tmp_path / "rate_limit.sqlite3"), **options)
+        limiters.append(limiter)
+        return limiter
+    yield make
+    for limiter in limiters:
+        limiter.close()
+
+def test_parse_retry_delay():
+    assert parse_retry_delay('{"retryDelay": "37s"}') == 37
+    assert parse_retry_delay("Please retry in 12.5s.") == 12.5
+    assert parse_retry_delay("quota exceeded") is None
+
+def test_token_bucket(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute = 60)  # One per second, burst of 6
+    for _ in range(6):
+        assert limiter._try_acquire() == 0
+    assert limiter._try_acquire() == pytest.approx(1.0)
+    clock.sleep(1)
+    assert limiter._try_acquire() == 0
+
+def test_rate_adapts_to_429s(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute = 60)
+    limiter.record_rate_limited(retry_delay = 5)
+    stats = limiter.stats()
+    assert stats["requests_per_minute"] == 30 and stats["blocked_for"] == 5
+    assert limiter._try_acquire() == pytest.approx(5)  # Everyone sits out the retry delay
+
+    for _ in range(3):
+        limiter.record_rate_limited()
+    assert limiter.stats()["requests_per_minute"] == 6  # Never below MIN_RATE_FRACTION
+
+    clock.sleep(DEFAULT_BACKOFF_SECONDS)
+    limiter.record_success()
+    assert limiter.stats()["requests_per_minute"] == 9  # Creeps back up
+
+def test_circuit_opens_and_half_opens(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute = 60)
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        limiter.record_rate_limited(retry_delay = 1)
+    assert not limiter.stats()["circuit_open"]
+    limiter.record_rate_limited(retry_delay = 1)
+    assert limiter.stats()["circuit_open"]
+    with pytest.raises(CircuitOpenError):
+        limiter.acquire()
+
+    # Half-open: the next call goes through, one more 429 opens the circuit again
+    clock.sleep(CIRCUIT_OPEN_SECONDS)
+    limiter.acquire()
+    limiter.record_rate_limited(retry_delay = 1)
+    assert limiter.stats()["circuit_open"]
+
+    # A success closes it
+    clock.sleep(CIRCUIT_OPEN_SECONDS)
+    limiter.acquire()
+    limiter.record_success()
+    stats = limiter.stats()
+    assert not stats["circuit_open"] and stats["consecutive_failures"] == 0
+
+def test_long_queue_is_a_timeout_not_an_open_circuit(clock, make_limiter):
+    limiter = make_limiter(requests_per_minute = 6, max_wait_seconds = 5)  # One every 10s, burst of 1
+    limiter.acquire()
+    with pytest.raises(RateLimitTimeoutError):
+        limiter.acquire()
+    with pytest.raises(RateLimitTimeoutError):
+        asyncio.run(limiter.acquire_async())
+    assert not limiter.stats()["circuit_open"]
+
+def test_success_keeps_another_callers_backoff(clock, make_limiter):
+    worker = make_limiter(requests_per_minute = 60)
+    other_worker = make_limiter(requests_per_minute = 60)
+    other_worker.record_rate_limited(retry_delay = 30)
+    worker.record_success()  # A call that went out before the 429
+    assert worker.stats()["blocked_for"] == 30
+
+    clock.sleep(30)
+    worker.record_success()
+    assert worker.stats()["blocked_for"] == 0
@@ -0,0 +1,50 @@
+import pytest
+
+from ict619_resume_functions import (
+    scan_resume, get_section_indices, extract_year, get_highest_education, SCANNER_HEADING_CLASSIFIERS,
+)
+from ict619_resume_pdf import extract_layouts_from_pdfs
+from ict619_resume_synthetic import generate_corpus
+
+
+@pytest.fixture(scope = "module")
+def corpus_texts():
+    corpus = generate_corpus(30, seed = 3)
+    layouts = extract_layouts_from_pdfs([item["data"] for item in corpus])
+    return [text for layout in layouts for text in (layout["text"], layout["layout_text"])]
+
+# The legacy heading patterns start with "^\s*(\w+\s+)?", which can take in the line before a heading
+# (e.g. "2014\nSummary", the end of a date range broken across lines in a narrow column)
+def legacy_heading_takes_previous_line(text, section_ranges):
+    for _, start, _ in section_ranges:
+        first_line = text[start:].split("\n", 1)[0].strip()
+        if first_line and not any(classifier.fullmatch(first_line) for classifier in SCANNER_HEADING_CLASSIFIERS.values()):
+            return True
+    return False
+
+def test_scanner_matches_the_legacy_sweeps(corpus_texts):
+    compared = 0
+    for text in corpus_texts:
+        legacy_ranges = get_section_indices(text)
+        scan = scan_resume(text)
+        if legacy_heading_takes_previous_line(text, legacy_ranges):
+            # The scanner starts the section at the heading itself
+            for _, start, _ in scan["section_ranges"]:
+                first_line = text[start:].split("\n", 1)[0].strip()
+                assert any(classifier.fullmatch(first_line) for classifier in SCANNER_HEADING_CLASSIFIERS.values())
+            continue
+        compared += 1
+        assert scan["section_ranges"] == legacy_ranges
+        assert scan["years"] == {item[0]: extract_year(item, text) for item in legacy_ranges}
+        education_section = next((item for item in legacy_ranges if item[0] == "Education"), None)
+        assert scan["highest_education"] == get_highest_education(education_section, text)
+    assert compared >= len(corpus_texts) * 0.9
+
+def test_scanner_on_edge_cases():
+    for text in ["", "Jane Tan\nEngineer", "Education\n", "Skills\nPython\nEducation\nDiploma, 2019\nWork Experience\nJan 2020 - Present\n2015 - 2019"]:
+        legacy_ranges = get_section_indices(text)
+        scan = scan_resume(text)
+        assert scan["section_ranges"] == legacy_ranges
+        assert scan["years"] == {item[0]: extract_year(item, text) for item in legacy_ranges}
+        education_section = next((item for item in legacy_ranges if item[0] == "Education"), None)
+        assert scan["highest_education"] == get_highest_education(education_section, text)
@@ -0,0 +1,50 @@
+import random
+
+import numpy as np
+
+from ict619_resume_functions import evaluate_candidate
+from ict619_resume_scoring import EDUCATION_LEVELS, rank_candidates, top_k_indices
+
+REQUIRED_INFO = {"experience": 3, "education": "Bachelor", "skills": ["python", "sql", "docker", "aws"]}
+
+
+def make_pool(count, seed = 0):
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(count):
+        mandatory = rng.choice(["no_mandatory_skills", {"python": "meets"}, {"python": "meets", "sql": "does not meet"}])
+        pool.append({
+            "experience": rng.choice([0.0, 2.5, 3.0, 6.0, 10.0]),
+            "education": rng.choice(EDUCATION_LEVELS + ["No degree"]),
+            "skills": rng.sample(REQUIRED_INFO["skills"], rng.randint(0, 4)),
+            "skills_met": mandatory,
+        })
+    return pool
+
+def test_matches_evaluate_candidate():
+    pool = make_pool(200)
+    indices, scores = rank_candidates(pool, REQUIRED_INFO, k = 10)
+
+    results = [evaluate_candidate(extracted_info, REQUIRED_INFO) for extracted_info in pool]
+    passing = [i for i, result in enumerate(results) if result[:3] == [1, 1, 1.0]]
+    assert list(np.flatnonzero(scores["passes"])) == passing
+    assert list(scores["skill_ratio"]) == [result[3] for result in results]
+    # Same order as the original stable sort by skill ratio
+    assert list(indices) == sorted(passing, key = lambda i: results[i][3], reverse = True)[:10]
+
+def test_top_k_ties():
+    score = np.array([0.5, 1.0, 0.5, 0.5, 0.25])
+    passes = np.array([True, True, True, True, False])
+    assert list(top_k_indices(score, passes, k = 3)) == [1, 0, 2]  # Input order among ties
+    assert list(top_k_indices(score, passes, k = 3, tie_breaker = np.array([0, 0, 1, 2, 9]))) == [1, 3, 2]
+    assert list(top_k_indices(score, passes, k = 10)) == [1, 0, 2, 3]
+    assert len(top_k_indices(score, passes, k = 0)) == 0
+
+def test_weights():
+    pool = [
+        {"experience": 4.0, "education": "Bachelor", "skills": ["python", "sql"], "skills_met": "no_mandatory_skills"},
+        {"experience": 12.0, "education": "PhD", "skills": ["python"], "skills_met": "no_mandatory_skills"},
+    ]
+    assert list(rank_candidates(pool, REQUIRED_INFO)[0]) == [0, 1]
+    assert list(rank_candidates(pool, REQUIRED_INFO, weights = {"experience": 1.0})[0]) == [1, 0]
+    assert list(rank_candidates([], REQUIRED_INFO)[0]) == []
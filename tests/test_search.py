@@ -0,0 +1,39 @@
+import math
+
+from ict619_resume_search import ResumeIndex, parse_query
+
+
+def test_parse_query():
+    assert parse_query('"machine learning" Python c++') == [["machine", "learning"], ["python"], ["c", "+", "+"]]
+
+def test_phrases_and_ranking():
+    index = ResumeIndex()
+    index.add("a", "Built machine learning models in Python and learning dashboards")
+    index.add("b", "Machine tools operator, learning Python")
+    index.add("c", "Python Python Python developer")
+
+    assert [doc_id for doc_id, _ in index.search('"machine learning"')] == ["a"]  # Both words, in order
+    assert {doc_id for doc_id, _ in index.search("machine learning")} == {"a", "b"}
+    assert index.search("python", k = 1)[0][0] == "c"  # Highest term frequency
+    assert index.search("java") == []
+
+def test_bm25_score():
+    index = ResumeIndex(k1 = 1.2, b = 0.75)
+    index.add("a", "python sql")
+    index.add("b", "java go")
+    # One of two documents matches, term frequency 1, documents of the average length
+    expected = math.log(1 + (2 - 1 + 0.5) / (1 + 0.5)) * 1 * 2.2 / (1 + 1.2)
+    assert math.isclose(dict(index.search("python"))["a"], expected)
+
+def test_replace_and_remove():
+    index = ResumeIndex()
+    index.add("a", "python")
+    index.add("b", "java")
+    index.add("a", "golang")  # Replaces the previous text
+    assert len(index) == 2
+    assert index.search("python") == []
+    assert [doc_id for doc_id, _ in index.search("golang")] == ["a"]
+
+    index.remove("b")
+    assert "b" not in index and index.search("java") == []
+    assert index.score_skills(["golang", "java"], ["a", "b"]) == {"a": index.score_skills(["golang"])["a"], "b": 0.0}
@@ -0,0 +1,38 @@
+from ict619_resume_functions import extract_year, calculate_experience, get_highest_education, get_section_indices, this_year
+
+RESUME = """Jane Tan
+
+Work Experience
+Senior Engineer, ABC Technologies
+Jan 2020 - Present
+Engineer, Strait Logistics
+2015 to 2019
+
+Education
+Bachelor of Engineering, NUS, 2011 - 2015
+"""
+
+def section(name, resume_text = RESUME):
+    return next(item for item in get_section_indices(resume_text) if item[0] == name)
+
+def test_extract_year():
+    assert extract_year(section("Work Experience"), RESUME) == [(2020, this_year), (2015, 2019)]
+    assert extract_year(section("Education"), RESUME) == [(2011, 2015)]
+    assert extract_year(None, RESUME) == []
+
+    # Without a single range, the standalone years of the section are used
+    resume_text = "Work Experience\nEngineer since 2018, promoted in 2021\n"
+    assert extract_year(section("Work Experience", resume_text), resume_text) == [2018, 2021]
+
+def test_calculate_experience():
+    assert calculate_experience([(2020, this_year), (2015, 2019)]) == this_year - 2015
+    assert calculate_experience([2018, 2021]) == 3
+    assert calculate_experience([(2019, None)]) == 0  # Open range: only the start year is known
+    assert calculate_experience([]) == 0
+
+def test_get_highest_education():
+    assert get_highest_education(section("Education"), RESUME) == "Bachelor"
+    resume_text = "Jane Tan\nMaster of Science in Analytics, 2018\nBSc Computer Science, 2014\n"
+    # No education heading: the whole resume is searched
+    assert get_highest_education(None, resume_text) == "Master"
+    assert get_highest_education(None, "Jane Tan\nEngineer") == "No degree found"
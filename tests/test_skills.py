@@ -0,0 +1,59 @@
+import json
+import random
+import re
+
+import ict619_resume_functions
+from ict619_resume_functions import SkillMatcher, extract_skills, get_skill_matcher, get_skill_aliases
+
+SKILL_NAMES = ["python", "java", "javascript", "sql", "machine learning", "learning", "deep learning", "docker",
+               "project management", "management", "excel", "data analysis", "react", "go", "aws"]
+
+
+# The per-skill regex search extract_skills used before the matcher
+def regex_skills(text, skills_required):
+    text = re.sub(r'\s+', ' ', text).lower().replace('-', ' ')
+    return [skill for skill in skills_required if re.search(r'\b' + re.escape(skill.lower()) + r'\b', text)]
+
+def test_matches_the_regex_search():
+    rng = random.Random(6)
+    words = SKILL_NAMES + ["team", "built", "pipelines", "with", "and", "javabeans", "pythonic", "Machine-Learning", "DOCKER"]
+    for _ in range(200):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 30)))
+        skills = rng.sample(SKILL_NAMES, 6)
+        assert SkillMatcher(skills, aliases = {}).match(text) == regex_skills(text, skills), text
+
+def test_overlapping_skills():
+    matcher = SkillMatcher(["machine learning", "learning", "deep learning"], aliases = {})
+    assert matcher.match("Deep learning and machine learning") == ["machine learning", "learning", "deep learning"]
+    assert matcher.match("Machine\n  learning") == ["machine learning", "learning"]  # Broken across lines
+
+def test_aliases():
+    matcher = SkillMatcher(["JavaScript", "Kubernetes", "Java"])
+    assert matcher.match("JS, k8s") == ["JavaScript", "Kubernetes"]
+    assert matcher.match("javascript") == ["JavaScript"]  # Java is not a prefix match
+    assert SkillMatcher(["js"]).match("Built with JavaScript") == ["js"]  # Any name of the group
+
+def test_case_hyphens_and_symbols():
+    matcher = SkillMatcher(["Scikit-Learn", "C++", "C#", "node.js"])
+    assert matcher.match("scikit learn, c++ and NODE.JS") == ["Scikit-Learn", "C++", "node.js"]
+    assert matcher.match("c, csharp") == ["C#"]
+    assert regex_skills("scikit learn", ["Scikit-Learn"]) == []  # The old search missed hyphenated skill names
+
+def test_extract_skills_reads_the_skills_section():
+    resume_text = "Work Experience\nUsed Docker\n\nSkills\nPython, SQL"
+    skills_section = ("Skills", resume_text.index("Skills"), len(resume_text))
+    assert extract_skills(skills_section, resume_text, ["docker", "python", "sql"]) == ["python", "sql"]
+    assert extract_skills(None, resume_text, ["docker", "python"]) == ["docker", "python"]
+
+def test_taxonomy_file(tmp_path, monkeypatch):
+    path = tmp_path / "skill_taxonomy.json"
+    path.write_text(json.dumps({"javascript": ["ecmascript"], "terraform": ["tf", "hcl"]}))
+    monkeypatch.setattr(ict619_resume_functions, "SKILL_TAXONOMY_PATH", str(path))
+    get_skill_aliases.cache_clear()
+    get_skill_matcher.cache_clear()
+    try:
+        matcher = get_skill_matcher(("JavaScript", "Terraform"))
+        assert matcher.match("ECMAScript, JS and HCL") == ["JavaScript", "Terraform"]
+    finally:
+        get_skill_aliases.cache_clear()
+        get_skill_matcher.cache_clear()
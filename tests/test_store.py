@@ -0,0 +1,76 @@
+import pytest
+
+from ict619_resume_store import CandidateStore
+
+
+def make_profile(name, experience, education, skills, skill_verdicts = None):
+    resume_text = f"{name}\n\nWork Experience\nEngineer, 2015 - 2024\n\nSkills\n{', '.join(skills)}\n"
+    skills_start = resume_text.index("Skills")
+    return {
+        "info": {"name": name, "email": f"{name.split()[0].lower()}@example.com", "phone": "6591234567"},
+        "resume_text": resume_text,
+        "skills_span": (skills_start, len(resume_text)),
+        "experience": experience,
+        "education": education,
+        "skill_verdicts": skill_verdicts or {},
+        "processing_time": 1.5,
+        "used_local_layout": True,
+    }
+
+@pytest.fixture
+def store(tmp_path):
+    store = CandidateStore(str(tmp_path / "store.sqlite3"))
+    yield store
+    store.close()
+
+def test_profile_round_trip(tmp_path):
+    path = str(tmp_path / "store.sqlite3")
+    profile = make_profile("Jane Tan", 9.0, "Master", ["python", "sql"], {"python": {3: "meets"}})
+    store = CandidateStore(path)
+    store.add_profile("hash-1", profile, "jane.pdf", "fused")
+    store.close()
+
+    store = CandidateStore(path)  # Survives a restart
+    stored = store.get_profile("hash-1", "fused")
+    assert stored == {**profile, "processing_time": 0.0}
+    assert store.get_profile("hash-1", "three_calls") is None  # Extracted with another mode
+    assert store.get_profile("unknown") is None
+    store.close()
+
+def test_replaced_profile_and_verdicts(store):
+    store.add_profile("hash-1", make_profile("Jane Tan", 2.0, "Bachelor", ["python"]))
+    store.add_profile("hash-2", make_profile("Wei Lim", 5.0, "Bachelor", ["python"]))
+    store.add_profile("hash-1", make_profile("Jane Tan", 4.0, "Bachelor", ["python", "sql"]))
+    store.add_skill_verdicts("hash-1", {"sql": {2: "does not meet"}})
+    assert store.count() == 2
+
+    profile = store.get_profile("hash-1")
+    assert profile["experience"] == 4.0
+    assert profile["skill_verdicts"] == {"sql": {2: "does not meet"}}
+    # Same skill count: the replaced profile keeps its place before the later candidate
+    candidates, _ = store.query({"experience": 0, "education": "Diploma", "skills": ["python"], "mandatory_skills": {}})
+    assert [candidate["pdf_hash"] for candidate in candidates] == ["hash-1", "hash-2"]
+
+def test_query(store):
+    store.add_profile("a", make_profile("Jane Tan", 6.0, "Master", ["python", "sql", "docker"], {"python": {5: "meets"}}))
+    store.add_profile("b", make_profile("Wei Lim", 8.0, "Bachelor", ["python", "sql"], {"python": {2: "does not meet"}}))
+    store.add_profile("c", make_profile("Aisha Rahman", 1.0, "PhD", ["python", "sql", "docker"]))
+    store.add_profile("d", make_profile("Rahul Singh", 7.0, "Bachelor", ["python"]))
+
+    required_info = {"experience": 3, "education": "Bachelor", "skills": ["Python", "SQL", "Docker"], "mandatory_skills": {}}
+    candidates, unknown = store.query(required_info)
+    assert [candidate["pdf_hash"] for candidate in candidates] == ["a", "b", "d"]
+    assert [candidate["no_of_skills"] for candidate in candidates] == [3, 2, 1]
+    assert candidates[0]["skill_ratio"] == 1.0 and unknown == 0
+
+    # A verdict for 5 years that meets also meets 4; d has no verdict yet, c has none either
+    candidates, unknown = store.query({**required_info, "mandatory_skills": {"python": 4}}, k = 5)
+    assert [candidate["pdf_hash"] for candidate in candidates] == ["a"]
+    assert unknown == 2
+
+    # A new candidate is matched against the skills queried so far
+    store.add_profile("e", make_profile("Siti Ng", 4.0, "Master", ["docker"]))
+    candidates, _ = store.query(required_info, k = 1)
+    assert [candidate["pdf_hash"] for candidate in candidates] == ["a"]
+    candidates, _ = store.query({**required_info, "skills": ["docker"]})
+    assert {candidate["pdf_hash"]: candidate["no_of_skills"] for candidate in candidates} == {"a": 1, "e": 1, "b": 0, "d": 0}
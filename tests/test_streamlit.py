@@ -0,0 +1,54 @@
+import io
+import os
+
+import pytest
+import streamlit as st
+import streamlit_tags
+
+from ict619_resume_synthetic import generate_corpus
+
+AppTest = pytest.importorskip("streamlit.testing.v1").AppTest
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ict619_resume_streamlit.py")
+
+
+# The tag input is a custom component and the uploader cannot be driven by AppTest, both are replaced
+def start_app(monkeypatch, pdf_files):
+    def upload(*args, **kwargs):
+        files = []
+        for file_name, data in pdf_files:
+            uploaded_file = io.BytesIO(data)
+            uploaded_file.name = file_name
+            files.append(uploaded_file)
+        return files
+    monkeypatch.setattr(streamlit_tags, "st_tags", lambda **kwargs: ["python", "sql"])
+    monkeypatch.setattr(st, "file_uploader", upload)
+    return AppTest.from_file(APP_PATH, default_timeout = 120).run()
+
+@pytest.fixture
+def app(monkeypatch):
+    return start_app(monkeypatch, [(item["file_name"], item["data"]) for item in generate_corpus(12, seed = 1)])
+
+def test_requirements_changed_after_cascade_rejection(app):
+    app.selectbox[0].set_value("Master").run()
+    app.button[0].click().run()
+    assert not app.exception
+    assert app.session_state.prefiltered  # Some resumes were rejected by the local checks
+
+    # Adding a mandatory skill reruns the verdict checks, which must skip the locally rejected resumes
+    app.multiselect[0].set_value(["python"]).run()
+    assert not app.exception
+    assert any(caption.value.startswith("Mandatory skill checks sent to Gemini") for caption in app.caption)
+
+def test_copy_of_a_stored_profile_is_ranked_once(monkeypatch):
+    resume = generate_corpus(1, seed = 2)[0]
+    app = start_app(monkeypatch, [(resume["file_name"], resume["data"])])
+    app.button[0].click().run()
+    assert not app.exception
+
+    # A later session: the first file comes from the candidate store, the other is a re-export of it
+    # (another file, the same text)
+    copy = ("copy.pdf", resume["data"] + b"\n% re-exported\n")
+    app = start_app(monkeypatch, [(resume["file_name"], resume["data"]), copy])
+    app.button[0].click().run()
+    assert not app.exception
+    assert any(caption.value == "Duplicate resumes ranked once: copy.pdf" for caption in app.caption)
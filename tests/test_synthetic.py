@@ -0,0 +1,26 @@
+import io
+
+import pytest
+
+from ict619_resume_synthetic import generate_corpus, write_corpus
+
+pdfplumber = pytest.importorskip("pdfplumber")
+
+
+def test_same_seed_same_corpus():
+    assert generate_corpus(6, seed = 7) == generate_corpus(6, seed = 7)
+    assert [item["truth"] for item in generate_corpus(6, seed = 8)] != [item["truth"] for item in generate_corpus(6, seed = 7)]
+
+def test_pdfs_are_readable():
+    for item in generate_corpus(8, seed = 2):
+        with pdfplumber.open(io.BytesIO(item["data"])) as pdf:
+            text = "\n".join(page.extract_text() or "" for page in pdf.pages)
+        truth = item["truth"]
+        assert truth["name"] in text and truth["email"] in text
+        assert all(skill in text for skill in truth["skills"])
+
+def test_options_and_write(tmp_path):
+    corpus = generate_corpus(4, seed = 1, layouts = ["two_column"], lengths = ["short"])
+    assert {(item["layout"], item["length"]) for item in corpus} == {("two_column", "short")}
+    write_corpus(corpus, str(tmp_path / "corpus"))
+    assert sorted(p.name for p in (tmp_path / "corpus").iterdir()) == [item["file_name"] for item in corpus]